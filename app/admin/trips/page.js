@@ -29,6 +29,8 @@ export default function AdminTripsPage() {
   const { user, loading: authLoading, isAdmin } = useAuth();
   const [trips, setTrips] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const router = useRouter();
 
   useEffect(() => {
@@ -42,12 +44,14 @@ export default function AdminTripsPage() {
     }
   }, [user, authLoading, isAdmin]);
 
-  async function fetchTrips() {
+  // Without a cursor this loads the first page; with one it appends the next
+  async function fetchTrips(cursor = null) {
     try {
-      const response = await fetch('/api/admin/trips');
+      const response = await fetch(cursor ? `/api/admin/trips?cursor=${encodeURIComponent(cursor)}` : '/api/admin/trips');
       if (response.ok) {
         const data = await response.json();
-        setTrips(data.trips);
+        setTrips((loaded) => cursor ? [...loaded, ...data.trips] : data.trips);
+        setNextCursor(data.next_cursor);
       }
     } catch (error) {
       console.error('Error fetching trips:', error);
@@ -56,6 +60,15 @@ export default function AdminTripsPage() {
     }
   }
 
+  async function loadMore() {
+    setLoadingMore(true);
+    await fetchTrips(nextCursor);
+    setLoadingMore(false);
+  }
+
+  // The summary cards count the trips loaded so far; "+" marks that more exist
+  const more = nextCursor ? '+' : '';
+
   const formatPrice = (cents, currency = 'EUR') => {
     return new Intl.NumberFormat('en-US', {
       style: 'currency',
@@ -108,7 +121,7 @@ export default function AdminTripsPage() {
               <CardTitle className="text-sm font-medium text-gray-600">Total Trips</CardTitle>
             </CardHeader>
             <CardContent>
-              <div className="text-2xl font-bold">{trips.length}</div>
+              <div className="text-2xl font-bold">{trips.length}{more}</div>
             </CardContent>
           </Card>
           <Card>
@@ -117,7 +130,7 @@ export default function AdminTripsPage() {
             </CardHeader>
             <CardContent>
               <div className="text-2xl font-bold">
-                {trips.filter(t => t.active).length}
+                {trips.filter(t => t.active).length}{more}
               </div>
             </CardContent>
           </Card>
@@ -127,7 +140,7 @@ export default function AdminTripsPage() {
             </CardHeader>
             <CardContent>
               <div className="text-2xl font-bold">
-                {trips.filter(t => t.featured).length}
+                {trips.filter(t => t.featured).length}{more}
               </div>
             </CardContent>
           </Card>
@@ -137,7 +150,7 @@ export default function AdminTripsPage() {
             </CardHeader>
             <CardContent>
               <div className="text-2xl font-bold">
-                {trips.reduce((sum, t) => sum + (t.departures?.length || 0), 0)}
+                {trips.reduce((sum, t) => sum + (t.departures?.length || 0), 0)}{more}
               </div>
             </CardContent>
           </Card>
@@ -251,6 +264,14 @@ export default function AdminTripsPage() {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="text-center mt-8">
+            <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more trips'}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
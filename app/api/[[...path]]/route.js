@@ -1,7 +1,22 @@
-import { NextResponse } from 'next/server';
 import { getDatabase } from '@/lib/db';
-import { getCurrentUser, requireAuth, requireAdmin, DemoAuth } from '@/lib/auth';
+import {
+  getCurrentUser, requireAuth, requireAdmin, DemoAuth,
+  createSessionToken, revokeSession, SESSION_COOKIE, SESSION_MAX_AGE, TEST_IDENTITY_EMAIL
+} from '@/lib/auth';
 import { getPaymentProvider } from '@/lib/payments';
+import { getWebhookQueueStats } from '@/lib/webhooks';
+import { parsePagination, pageStages, pageResult, wantsField } from '@/lib/pagination';
+import { catalogCache, cachedJson, invalidateCatalog } from '@/lib/cache';
+import { getDashboardStats, recordBookingCreated } from '@/lib/stats';
+import { parseTripFilters } from '@/lib/search';
+import { EXPORTS, exportResponse } from '@/lib/export';
+import { jsonResponse, withServerTiming } from '@/lib/timing';
+import { withCapture } from '@/lib/capture';
+import { BULK_KINDS, buildTrip, buildDeparture, bulkInsert, parseBulkRequest } from '@/lib/bulk';
+import {
+  parseDepartureIds, getAvailability, availabilityStream, publishAvailability, availabilitySubscribers
+} from '@/lib/availability';
+import { processMetrics, recordError } from '@/lib/metrics';
 import { v4 as uuidv4 } from 'uuid';
 import { cookies } from 'next/headers';
 
@@ -17,41 +32,45 @@ async function handleAuth(request, segments) {
   const method = request.method;
   
   if (segments[0] === 'login' && method === 'POST') {
-    const { type } = await request.json();
+    const { type, email, name } = await request.json();
+    
+    if (email !== undefined && !(typeof email === 'string' && TEST_IDENTITY_EMAIL.test(email))) {
+      throw new Error('Invalid test identity');
+    }
+    const identity = email ? { email, name } : {};
     
     let user;
     if (type === 'admin') {
-      user = await DemoAuth.loginAsAdmin();
+      user = await DemoAuth.loginAsAdmin(identity);
     } else {
-      user = await DemoAuth.loginAsDemoUser();
+      user = await DemoAuth.loginAsDemoUser(identity);
     }
     
-    const response = NextResponse.json({ user, success: true });
-    response.cookies.set('demo-session', JSON.stringify({ 
-      email: user.email, 
-      role: user.role 
-    }), {
+    const response = jsonResponse({ user, success: true });
+    // Signed session: authenticated requests can trust it without a users lookup
+    response.cookies.set(SESSION_COOKIE, createSessionToken(user), {
       httpOnly: true,
       secure: process.env.NODE_ENV === 'production',
       sameSite: 'strict',
-      maxAge: 30 * 24 * 60 * 60 // 30 days
+      maxAge: SESSION_MAX_AGE
     });
     
     return response;
   }
   
   if (segments[0] === 'logout' && method === 'POST') {
-    const response = NextResponse.json({ success: true });
-    response.cookies.delete('demo-session');
+    await revokeSession(request.cookies.get(SESSION_COOKIE)?.value);
+    const response = jsonResponse({ success: true });
+    response.cookies.delete(SESSION_COOKIE);
     return response;
   }
   
   if (segments[0] === 'me' && method === 'GET') {
     const user = await getCurrentUser();
-    return NextResponse.json({ user });
+    return jsonResponse({ user });
   }
   
-  return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  return jsonResponse({ error: 'Not found' }, { status: 404 });
 }
 
 // TRIPS ENDPOINTS
@@ -60,62 +79,102 @@ async function handleTrips(request, segments) {
   const method = request.method;
   
   if (method === 'GET' && segments.length === 0) {
-    // Get all active trips with departures
-    const trips = await db.collection('trips').aggregate([
-      { $match: { active: true } },
-      {
-        $lookup: {
-          from: 'departures',
-          localField: 'id',
-          foreignField: 'trip_id',
-          as: 'departures'
-        }
-      },
-      {
-        $lookup: {
-          from: 'trip_images',
-          localField: 'id',
-          foreignField: 'trip_id',
-          as: 'images'
-        }
-      },
-      { $sort: { featured: -1, created_at: -1 } }
-    ]).toArray();
-    
-    return NextResponse.json({ trips });
+    // Get a page of active trips with departures, filtered in the database
+    return cachedJson(request, catalogCache, async () => {
+      const page = parsePagination(request, { featured: -1, created_at: -1, id: -1 });
+      const { tripMatch, departureMatch } = parseTripFilters(request);
+      
+      if (departureMatch) {
+        // Covered by the departures { start_date, base_price_cents, trip_id } index
+        const tripIds = await db.collection('departures').distinct('trip_id', departureMatch);
+        tripMatch.id = { $in: tripIds };
+      }
+      
+      const lookups = [];
+      if (wantsField(page, 'departures')) {
+        lookups.push({
+          $lookup: {
+            from: 'departures',
+            localField: 'id',
+            foreignField: 'trip_id',
+            // Only return the departures that matched the date/price filters
+            ...(departureMatch && { pipeline: [{ $match: departureMatch }] }),
+            as: 'departures'
+          }
+        });
+      }
+      if (wantsField(page, 'images')) {
+        lookups.push({
+          $lookup: {
+            from: 'trip_images',
+            localField: 'id',
+            foreignField: 'trip_id',
+            as: 'images'
+          }
+        });
+      }
+      
+      const docs = await db.collection('trips').aggregate([
+        { $match: tripMatch },
+        // `featured` is always a boolean (see buildTrip and normalizeTrips), so the
+        // { active, featured, created_at, id } index serves this sort
+        ...pageStages(page, lookups)
+      ]).toArray();
+      
+      const { items: trips, next_cursor } = pageResult(page, docs);
+      return { trips, next_cursor };
+    });
   }
   
   if (method === 'GET' && segments[0]) {
     // Get single trip by slug
-    const slug = segments[0];
-    const trip = await db.collection('trips').findOne({ slug, active: true });
-    
-    if (!trip) {
-      return NextResponse.json({ error: 'Trip not found' }, { status: 404 });
-    }
-    
-    const departures = await db.collection('departures').find({ trip_id: trip.id }).toArray();
-    const images = await db.collection('trip_images').find({ trip_id: trip.id }).sort({ sort_order: 1 }).toArray();
-    
-    return NextResponse.json({ trip: { ...trip, departures, images } });
+    return cachedJson(request, catalogCache, async () => {
+      const slug = segments[0];
+      const trip = await db.collection('trips').findOne({ slug, active: true });
+      
+      if (!trip) {
+        return jsonResponse({ error: 'Trip not found' }, { status: 404 });
+      }
+      
+      const [departures, images] = await Promise.all([
+        db.collection('departures').find({ trip_id: trip.id }).toArray(),
+        db.collection('trip_images').find({ trip_id: trip.id }).sort({ sort_order: 1 }).toArray()
+      ]);
+      
+      return { trip: { ...trip, departures, images } };
+    });
   }
   
   if (method === 'POST') {
     await requireAdmin();
-    const tripData = await request.json();
-    
-    const trip = {
-      id: uuidv4(),
-      slug: tripData.title.toLowerCase().replace(/[^a-z0-9]+/g, '-'),
-      ...tripData,
-      created_at: new Date()
-    };
+    const trip = buildTrip(await request.json());
     
     await db.collection('trips').insertOne(trip);
-    return NextResponse.json({ trip });
+    invalidateCatalog();
+    return jsonResponse({ trip });
+  }
+  
+  return jsonResponse({ error: 'Not found' }, { status: 404 });
+}
+
+// DEPARTURES ENDPOINTS
+async function handleDepartures(request, segments) {
+  const method = request.method;
+  
+  if (segments[0] === 'availability' && method === 'GET') {
+    const ids = parseDepartureIds(request);
+    const db = await getDatabase();
+    
+    if (segments[1] === 'stream') {
+      return availabilityStream(db, ids, request);
+    }
+    
+    // Seat counts change with every booking, so this is never served from the catalog cache
+    const departures = await getAvailability(db, ids);
+    return jsonResponse({ departures }, { headers: { 'Cache-Control': 'no-store' } });
   }
   
-  return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  return jsonResponse({ error: 'Not found' }, { status: 404 });
 }
 
 // BOOKINGS ENDPOINTS
@@ -126,108 +185,159 @@ async function handleBookings(request, segments) {
   
   if (method === 'GET') {
     const query = user.role === 'admin' ? {} : { user_id: user.id };
-    const bookings = await db.collection('bookings').aggregate([
-      { $match: query },
-      {
+    // `departure_id` narrows the list to one departure (served by its own index)
+    const departureId = new URL(request.url).searchParams.get('departure_id');
+    if (departureId) {
+      query.departure_id = departureId;
+    }
+    const page = parsePagination(request, { created_at: -1, id: -1 });
+    const lookups = [];
+    if (wantsField(page, 'trip')) {
+      lookups.push({
         $lookup: {
           from: 'trips',
           localField: 'trip_id',
           foreignField: 'id',
           as: 'trip'
         }
-      },
-      {
+      });
+    }
+    if (wantsField(page, 'departure')) {
+      lookups.push({
         $lookup: {
           from: 'departures',
           localField: 'departure_id',
           foreignField: 'id',
           as: 'departure'
         }
-      },
-      { $sort: { created_at: -1 } }
+      });
+    }
+    
+    const docs = await db.collection('bookings').aggregate([
+      { $match: query },
+      ...pageStages(page, lookups)
     ]).toArray();
     
-    return NextResponse.json({ bookings });
+    const { items: bookings, next_cursor } = pageResult(page, docs);
+    return jsonResponse({ bookings, next_cursor });
   }
   
   if (method === 'POST') {
     const { departure_id, seats = 1 } = await request.json();
     
-    // Get departure details
-    const departure = await db.collection('departures').findOne({ id: departure_id });
-    if (!departure) {
-      return NextResponse.json({ error: 'Departure not found' }, { status: 404 });
+    if (!Number.isInteger(seats) || seats < 1) {
+      return jsonResponse({ error: 'Invalid number of seats' }, { status: 400 });
     }
     
-    // Check availability
-    if (departure.spots_left < seats) {
-      return NextResponse.json({ error: 'Not enough spots available' }, { status: 400 });
+    // Reserve seats atomically: the filter only matches while enough spots are left
+    // and the departure still takes bookings (the same rule availabilityOf reports as
+    // `closed`), so concurrent buyers can never drive spots_left below zero
+    const now = new Date();
+    const departure = await db.collection('departures').findOneAndUpdate(
+      {
+        id: departure_id,
+        spots_left: { $gte: seats },
+        start_date: { $gte: now },
+        $or: [{ booking_deadline: null }, { booking_deadline: { $gte: now } }]
+      },
+      { $inc: { spots_left: -seats } },
+      { returnDocument: 'after' }
+    );
+    
+    if (!departure) {
+      // Slow path only: tell a missing or closed departure apart from a sold-out one
+      const existing = await db.collection('departures').findOne(
+        { id: departure_id },
+        { projection: { _id: 0, id: 1, spots_left: 1, start_date: 1, booking_deadline: 1 } }
+      );
+      if (!existing) {
+        return jsonResponse({ error: 'Departure not found' }, { status: 404 });
+      }
+      if (existing.start_date < now) {
+        return jsonResponse({ error: 'Departure has already started' }, { status: 400 });
+      }
+      if (existing.booking_deadline && existing.booking_deadline < now) {
+        return jsonResponse({ error: 'Booking deadline has passed' }, { status: 400 });
+      }
+      return jsonResponse({ error: 'Not enough spots available' }, { status: 400 });
     }
     
+    // spots_left changed, so cached catalog responses are stale
+    invalidateCatalog();
+    publishAvailability(departure);
+    
     const totalPrice = departure.base_price_cents * seats;
     const depositAmount = departure.allow_free_rsvp ? 0 : departure.deposit_cents * seats;
+    const bookingId = uuidv4();
     
-    const booking = {
-      id: uuidv4(),
-      user_id: user.id,
-      trip_id: departure.trip_id,
-      departure_id: departure.id,
-      seats,
-      status: departure.allow_free_rsvp ? 'reserved_unpaid' : 'pending_deposit',
-      total_price_cents: totalPrice,
-      deposit_paid_cents: 0,
-      balance_due_cents: totalPrice - depositAmount,
-      created_at: new Date(),
-      updated_at: new Date()
-    };
-    
-    await db.collection('bookings').insertOne(booking);
-    
-    // Update departure spots
-    await db.collection('departures').updateOne(
-      { id: departure_id },
-      { $inc: { spots_left: -seats } }
-    );
-    
-    if (departure.allow_free_rsvp) {
-      // Free RSVP - booking complete
-      await db.collection('bookings').updateOne(
-        { id: booking.id },
-        { $set: { status: 'reserved_unpaid' } }
-      );
+    let session = null;
+    let booking;
+    try {
+      if (!departure.allow_free_rsvp) {
+        // Create payment session before writing so the booking is stored once, complete
+        const paymentProvider = getPaymentProvider();
+        session = await paymentProvider.createCheckoutSession({
+          amount: depositAmount,
+          currency: departure.currency,
+          metadata: {
+            booking_id: bookingId,
+            type: 'deposit'
+          }
+        });
+      }
       
-      return NextResponse.json({ booking, payment_required: false });
-    } else {
-      // Create payment session
-      const paymentProvider = getPaymentProvider();
-      const session = await paymentProvider.createCheckoutSession({
-        amount: depositAmount,
-        currency: departure.currency,
-        metadata: {
-          booking_id: booking.id,
-          type: 'deposit'
-        }
-      });
+      booking = {
+        id: bookingId,
+        user_id: user.id,
+        trip_id: departure.trip_id,
+        departure_id: departure.id,
+        seats,
+        status: departure.allow_free_rsvp ? 'reserved_unpaid' : 'pending_deposit',
+        total_price_cents: totalPrice,
+        deposit_paid_cents: 0,
+        balance_due_cents: totalPrice - depositAmount,
+        ...(session && { stripe_checkout_session_id: session.id }),
+        created_at: new Date(),
+        updated_at: new Date()
+      };
       
-      await db.collection('bookings').updateOne(
-        { id: booking.id },
-        { 
-          $set: { 
-            stripe_checkout_session_id: session.id,
-            status: 'pending_deposit'
-          } 
-        }
+      await db.collection('bookings').insertOne(booking);
+    } catch (error) {
+      // Checkout or the insert failed after the reservation: give the seats back
+      const restored = await db.collection('departures').findOneAndUpdate(
+        { id: departure.id },
+        { $inc: { spots_left: seats } },
+        { returnDocument: 'after' }
       );
-      
-      return NextResponse.json({ 
-        booking, 
-        payment_required: true, 
-        checkout_url: session.url 
-      });
+      invalidateCatalog();
+      if (restored) {
+        publishAvailability(restored);
+      }
+      throw error;
     }
+    
+    try {
+      await recordBookingCreated(db);
+    } catch (error) {
+      // The booking is stored; a missed increment only leaves the dashboard counter
+      // low until it is next rebuilt, so don't fail the request over it
+      recordError();
+      console.error('Failed to update booking counter:', error);
+    }
+    
+    if (!session) {
+      // Free RSVP - booking complete
+      return jsonResponse({ booking, payment_required: false });
+    }
+    
+    return jsonResponse({ 
+      booking, 
+      payment_required: true, 
+      checkout_url: session.url 
+    });
   }
   
-  return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  return jsonResponse({ error: 'Not found' }, { status: 404 });
 }
 
 // ADMIN ENDPOINTS
@@ -237,86 +347,101 @@ async function handleAdmin(request, segments) {
   const method = request.method;
   
   if (segments[0] === 'dashboard' && method === 'GET') {
-    // Get dashboard stats
-    const totalBookings = await db.collection('bookings').countDocuments();
-    const totalRevenue = await db.collection('payments').aggregate([
-      { $match: { status: 'succeeded', type: { $ne: 'refund' } } },
-      { $group: { _id: null, total: { $sum: '$amount_cents' } } }
-    ]).toArray();
-    
-    const upcomingDepartures = await db.collection('departures').aggregate([
-      { $match: { start_date: { $gte: new Date() } } },
-      {
-        $lookup: {
-          from: 'trips',
-          localField: 'trip_id',
-          foreignField: 'id',
-          as: 'trip'
+    // Counters are maintained incrementally, so this no longer scans bookings/payments
+    const [stats, upcomingDepartures] = await Promise.all([
+      getDashboardStats(db),
+      db.collection('departures').aggregate([
+        { $match: { start_date: { $gte: new Date() } } },
+        { $sort: { start_date: 1 } },
+        { $limit: 5 },
+        // Join only the five departures we keep
+        {
+          $lookup: {
+            from: 'trips',
+            localField: 'trip_id',
+            foreignField: 'id',
+            as: 'trip'
+          }
         }
-      },
-      { $limit: 5 },
-      { $sort: { start_date: 1 } }
-    ]).toArray();
+      ]).toArray()
+    ]);
     
-    return NextResponse.json({
+    return jsonResponse({
       stats: {
-        total_bookings: totalBookings,
-        total_revenue: totalRevenue[0]?.total || 0,
+        total_bookings: stats.total_bookings,
+        total_revenue: stats.total_revenue_cents,
         upcoming_departures: upcomingDepartures.length
       },
       upcoming_departures: upcomingDepartures
     });
   }
   
+  if (BULK_KINDS[segments[0]] && segments[1] === 'bulk' && method === 'POST') {
+    // One bulkWrite per batch instead of one request per document
+    const result = await bulkInsert(db, segments[0], parseBulkRequest(await request.json()));
+    if (result.created > 0) {
+      invalidateCatalog();
+    }
+    return jsonResponse(result);
+  }
+  
   if (segments[0] === 'trips') {
     if (method === 'GET') {
-      const trips = await db.collection('trips').aggregate([
-        {
+      const page = parsePagination(request, { created_at: -1, id: -1 });
+      const lookups = [];
+      if (wantsField(page, 'departures')) {
+        lookups.push({
           $lookup: {
             from: 'departures',
             localField: 'id',
             foreignField: 'trip_id',
             as: 'departures'
           }
-        },
-        { $sort: { created_at: -1 } }
-      ]).toArray();
+        });
+      }
+      
+      const docs = await db.collection('trips').aggregate(pageStages(page, lookups)).toArray();
       
-      return NextResponse.json({ trips });
+      const { items: trips, next_cursor } = pageResult(page, docs);
+      return jsonResponse({ trips, next_cursor });
     }
     
     if (method === 'POST') {
-      const tripData = await request.json();
-      
-      const trip = {
-        id: uuidv4(),
-        slug: tripData.title.toLowerCase().replace(/[^a-z0-9]+/g, '-'),
-        ...tripData,
-        created_at: new Date()
-      };
+      const trip = buildTrip(await request.json());
       
       await db.collection('trips').insertOne(trip);
-      return NextResponse.json({ trip });
+      invalidateCatalog();
+      return jsonResponse({ trip });
     }
   }
   
   if (segments[0] === 'departures' && method === 'POST') {
-    const departureData = await request.json();
-    
-    const departure = {
-      id: uuidv4(),
-      ...departureData,
-      start_date: new Date(departureData.start_date),
-      end_date: new Date(departureData.end_date),
-      booking_deadline: departureData.booking_deadline ? new Date(departureData.booking_deadline) : null,
-      spots_left: departureData.capacity
-    };
+    const departure = buildDeparture(await request.json());
     
     await db.collection('departures').insertOne(departure);
-    return NextResponse.json({ departure });
+    invalidateCatalog();
+    return jsonResponse({ departure });
+  }
+  
+  if (segments[0] === 'export' && method === 'GET' && EXPORTS[segments[1]]) {
+    // Streamed straight from the cursor; never materialized in memory
+    return exportResponse(db, segments[1], request);
   }
   
-  return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  if (segments[0] === 'metrics' && method === 'GET') {
+    // Process health for soak tests; reads no collections
+    return jsonResponse({
+      ...processMetrics(),
+      catalog_cache: catalogCache.stats(),
+      availability_streams: availabilitySubscribers()
+    }, { headers: { 'Cache-Control': 'no-store' } });
+  }
+  
+  if (segments[0] === 'webhooks' && method === 'GET') {
+    return jsonResponse({ queue: await getWebhookQueueStats() });
+  }
+  
+  return jsonResponse({ error: 'Not found' }, { status: 404 });
 }
 
 // PAYMENTS ENDPOINTS
@@ -329,33 +454,38 @@ async function handlePayments(request, segments) {
     
     try {
       const paymentProvider = getPaymentProvider();
-      await paymentProvider.processWebhook(body, signature);
+      // Acknowledged as soon as the event is queued; the webhook worker applies it
+      const result = await paymentProvider.processWebhook(body, signature);
       
-      return NextResponse.json({ received: true });
+      return jsonResponse(result);
     } catch (error) {
       console.error('Webhook error:', error);
-      return NextResponse.json({ error: 'Webhook processing failed' }, { status: 400 });
+      return jsonResponse({ error: 'Webhook processing failed' }, { status: 400 });
     }
   }
   
-  return NextResponse.json({ error: 'Not found' }, { status: 404 });
+  return jsonResponse({ error: 'Not found' }, { status: 404 });
 }
 
 // MAIN ROUTER
+function serve(request) {
+  return withServerTiming(request, () => withCapture(request, () => handleRequest(request)));
+}
+
 export async function GET(request) {
-  return handleRequest(request);
+  return serve(request);
 }
 
 export async function POST(request) {
-  return handleRequest(request);
+  return serve(request);
 }
 
 export async function PUT(request) {
-  return handleRequest(request);
+  return serve(request);
 }
 
 export async function DELETE(request) {
-  return handleRequest(request);
+  return serve(request);
 }
 
 async function handleRequest(request) {
@@ -363,7 +493,7 @@ async function handleRequest(request) {
     const segments = getPathSegments(request);
     
     if (segments.length === 0) {
-      return NextResponse.json({ message: 'TravelwithDENCHE API' });
+      return jsonResponse({ message: 'TravelwithDENCHE API' });
     }
     
     const route = segments[0];
@@ -374,6 +504,8 @@ async function handleRequest(request) {
         return await handleAuth(request, subSegments);
       case 'trips':
         return await handleTrips(request, subSegments);
+      case 'departures':
+        return await handleDepartures(request, subSegments);
       case 'bookings':
         return await handleBookings(request, subSegments);
       case 'admin':
@@ -381,20 +513,25 @@ async function handleRequest(request) {
       case 'payments':
         return await handlePayments(request, subSegments);
       default:
-        return NextResponse.json({ error: 'Route not found' }, { status: 404 });
+        return jsonResponse({ error: 'Route not found' }, { status: 404 });
     }
   } catch (error) {
     console.error('API Error:', error);
     
     if (error.message === 'Authentication required') {
-      return NextResponse.json({ error: 'Authentication required' }, { status: 401 });
+      return jsonResponse({ error: 'Authentication required' }, { status: 401 });
     }
     
     if (error.message === 'Admin access required') {
-      return NextResponse.json({ error: 'Admin access required' }, { status: 403 });
+      return jsonResponse({ error: 'Admin access required' }, { status: 403 });
+    }
+    
+    if (['Invalid cursor', 'Invalid fields', 'Invalid filters', 'Invalid test identity', 'Invalid bulk request'].includes(error.message)) {
+      return jsonResponse({ error: error.message }, { status: 400 });
     }
     
-    return NextResponse.json({ 
+    recordError();
+    return jsonResponse({ 
       error: 'Internal server error',
       message: process.env.NODE_ENV === 'development' ? error.message : undefined
     }, { status: 500 });
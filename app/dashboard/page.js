@@ -14,6 +14,8 @@ export default function DashboardPage() {
   const { user, loading: authLoading } = useAuth();
   const [bookings, setBookings] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const router = useRouter();
 
   useEffect(() => {
@@ -27,12 +29,14 @@ export default function DashboardPage() {
     }
   }, [user, authLoading]);
 
-  async function fetchBookings() {
+  // Without a cursor this loads the first page; with one it appends the next
+  async function fetchBookings(cursor = null) {
     try {
-      const response = await fetch('/api/bookings');
+      const response = await fetch(cursor ? `/api/bookings?cursor=${encodeURIComponent(cursor)}` : '/api/bookings');
       if (response.ok) {
         const data = await response.json();
-        setBookings(data.bookings);
+        setBookings((loaded) => cursor ? [...loaded, ...data.bookings] : data.bookings);
+        setNextCursor(data.next_cursor);
       }
     } catch (error) {
       console.error('Error fetching bookings:', error);
@@ -41,6 +45,15 @@ export default function DashboardPage() {
     }
   }
 
+  async function loadMore() {
+    setLoadingMore(true);
+    await fetchBookings(nextCursor);
+    setLoadingMore(false);
+  }
+
+  // The stats cover the bookings loaded so far; "+" marks that more exist
+  const more = nextCursor ? '+' : '';
+
   const formatPrice = (cents, currency) => {
     return new Intl.NumberFormat('en-US', {
       style: 'currency',
@@ -99,7 +112,7 @@ export default function DashboardPage() {
             </CardHeader>
             <CardContent>
               <div className="text-2xl font-bold">
-                {bookings.filter(b => !['cancelled', 'refunded'].includes(b.status)).length}
+                {bookings.filter(b => !['cancelled', 'refunded'].includes(b.status)).length}{more}
               </div>
             </CardContent>
           </Card>
@@ -113,7 +126,7 @@ export default function DashboardPage() {
                   b.departure?.[0]?.start_date && 
                   new Date(b.departure[0].start_date) > new Date() &&
                   !['cancelled', 'refunded'].includes(b.status)
-                ).length}
+                ).length}{more}
               </div>
             </CardContent>
           </Card>
@@ -128,7 +141,7 @@ export default function DashboardPage() {
                     .filter(b => ['reserved_deposit_paid', 'paid_in_full'].includes(b.status))
                     .reduce((sum, b) => sum + (b.deposit_paid_cents || 0), 0),
                   'EUR'
-                )}
+                )}{more}
               </div>
             </CardContent>
           </Card>
@@ -220,6 +233,14 @@ export default function DashboardPage() {
               ))}
             </div>
           )}
+
+          {nextCursor && (
+            <div className="text-center mt-6">
+              <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more bookings'}
+              </Button>
+            </div>
+          )}
         </div>
 
         {/* Quick Actions */}
@@ -20,10 +20,10 @@ export default function HomePage() {
 
   async function fetchFeaturedTrips() {
     try {
-      const response = await fetch('/api/trips');
+      const response = await fetch('/api/trips?featured=true&limit=3&fields=slug,title,subtitle,hero_image_url,difficulty,meeting_point,group_size_min,group_size_max,departures');
       if (response.ok) {
         const data = await response.json();
-        setFeaturedTrips(data.trips.filter(trip => trip.featured).slice(0, 3));
+        setFeaturedTrips(data.trips);
       }
     } catch (error) {
       console.error('Error fetching trips:', error);
@@ -38,6 +38,43 @@ export default function TripDetailPage() {
     }
   }, [params.slug]);
 
+  const departureIds = trip?.departures?.map((departure) => departure.id).join(',');
+
+  // Keep spots_left live without reloading the whole trip document
+  useEffect(() => {
+    if (!departureIds) {
+      return;
+    }
+    const events = new EventSource(`/api/departures/availability/stream?ids=${encodeURIComponent(departureIds)}`);
+    events.addEventListener('snapshot', (event) => {
+      applyAvailability(JSON.parse(event.data).departures);
+    });
+    events.addEventListener('availability', (event) => {
+      applyAvailability([JSON.parse(event.data)]);
+    });
+    return () => events.close();
+  }, [departureIds]);
+
+  function applyAvailability(updates) {
+    const byId = new Map(updates.map((update) => [update.id, update]));
+    const merge = (departure) => byId.has(departure.id)
+      ? { ...departure, spots_left: byId.get(departure.id).spots_left }
+      : departure;
+    setTrip((current) => current && { ...current, departures: current.departures.map(merge) });
+    setSelectedDeparture((current) => current && merge(current));
+  }
+
+  async function refreshAvailability() {
+    try {
+      const response = await fetch(`/api/departures/availability?ids=${encodeURIComponent(departureIds)}`);
+      if (response.ok) {
+        applyAvailability((await response.json()).departures);
+      }
+    } catch (error) {
+      console.error('Error refreshing availability:', error);
+    }
+  }
+
   async function fetchTrip() {
     try {
       const response = await fetch(`/api/trips/${params.slug}`);
@@ -104,6 +141,8 @@ export default function TripDetailPage() {
       } else {
         const errorData = await response.json();
         toast.error(errorData.error || 'Booking failed');
+        // Most likely sold out in the meantime; show the current seat counts
+        refreshAvailability();
       }
     } catch (error) {
       console.error('Booking error:', error);
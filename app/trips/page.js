@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
@@ -10,51 +10,74 @@ import { CalendarDays, MapPin, Users, Search, Filter, Euro } from 'lucide-react'
 import Link from 'next/link';
 import { LoadingSpinner } from '@/components/ui/loading-spinner';
 
+// Fields the trip cards render; images and long markdown bodies are left out
+const CARD_FIELDS = [
+  'slug', 'title', 'subtitle', 'hero_image_url', 'difficulty', 'featured', 'meeting_point',
+  'group_size_min', 'group_size_max', 'highlights', 'departures'
+].join(',');
+
 export default function TripsPage() {
-  const [trips, setTrips] = useState([]);
   const [filteredTrips, setFilteredTrips] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [difficultyFilter, setDifficultyFilter] = useState('all');
+  const requestRef = useRef(null);
 
   useEffect(() => {
-    fetchTrips();
-  }, []);
+    // The cursor belongs to the previous filters; don't offer their next page
+    setNextCursor(null);
+    // Debounce typing so each keystroke doesn't hit the API
+    const timer = setTimeout(() => fetchTrips(), searchTerm ? 300 : 0);
+    return () => {
+      clearTimeout(timer);
+      requestRef.current?.abort();
+    };
+  }, [searchTerm, difficultyFilter]);
 
-  useEffect(() => {
-    filterTrips();
-  }, [trips, searchTerm, difficultyFilter]);
+  // Without a cursor this starts a fresh result list for the current filters;
+  // with one it appends the next page
+  async function fetchTrips(cursor = null) {
+    const params = new URLSearchParams({ fields: CARD_FIELDS });
+    if (searchTerm.trim()) {
+      params.set('q', searchTerm.trim());
+    }
+    if (difficultyFilter !== 'all') {
+      params.set('difficulty', difficultyFilter);
+    }
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+
+    // Only the latest request may touch the list: a slower response for older
+    // filters, or a page of them, is aborted instead of overwriting newer results
+    requestRef.current?.abort();
+    const controller = new AbortController();
+    requestRef.current = controller;
 
-  async function fetchTrips() {
     try {
-      const response = await fetch('/api/trips');
+      const response = await fetch(`/api/trips?${params}`, { signal: controller.signal });
       if (response.ok) {
         const data = await response.json();
-        setTrips(data.trips);
+        setFilteredTrips((trips) => cursor ? [...trips, ...data.trips] : data.trips);
+        setNextCursor(data.next_cursor);
       }
     } catch (error) {
-      console.error('Error fetching trips:', error);
+      if (error.name !== 'AbortError') {
+        console.error('Error fetching trips:', error);
+      }
     } finally {
-      setLoading(false);
+      if (!controller.signal.aborted) {
+        setLoading(false);
+      }
     }
   }
 
-  function filterTrips() {
-    let filtered = trips;
-
-    if (searchTerm) {
-      filtered = filtered.filter(trip =>
-        trip.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        trip.subtitle?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        trip.meeting_point?.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-
-    if (difficultyFilter !== 'all') {
-      filtered = filtered.filter(trip => trip.difficulty === difficultyFilter);
-    }
-
-    setFilteredTrips(filtered);
+  async function loadMore() {
+    setLoadingMore(true);
+    await fetchTrips(nextCursor);
+    setLoadingMore(false);
   }
 
   const formatPrice = (cents, currency) => {
@@ -126,7 +149,7 @@ export default function TripsPage() {
         {/* Results */}
         <div className="mb-6">
           <p className="text-gray-600">
-            {filteredTrips.length} trip{filteredTrips.length !== 1 ? 's' : ''} found
+            {filteredTrips.length}{nextCursor ? '+' : ''} trip{filteredTrips.length !== 1 ? 's' : ''} found
           </p>
         </div>
 
@@ -223,6 +246,14 @@ export default function TripsPage() {
           ))}
         </div>
 
+        {nextCursor && (
+          <div className="text-center mt-8">
+            <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more trips'}
+            </Button>
+          </div>
+        )}
+
         {filteredTrips.length === 0 && !loading && (
           <div className="text-center py-12">
             <div className="max-w-md mx-auto">
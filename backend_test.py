@@ -5,18 +5,110 @@ Tests authentication, trips, bookings, admin dashboard, and payment mock system
 """
 
 import requests
+import base64
 import json
 import time
 import os
 from datetime import datetime, timedelta
+from fnmatch import fnmatch
+from urllib.parse import quote, urlsplit
+
+from perf_metrics import Histogram, TimingRecorder, db_command_count
+from tests.helpers import departure_payload
 
 # Get base URL from environment - use localhost for testing
 BASE_URL = "http://localhost:3000"
 API_BASE = f"{BASE_URL}/api"
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'travelwithdenche')
+# Prefix for the <prefix>.json / <prefix>.csv timing report written by run_all_tests
+TIMING_REPORT = os.environ.get('TIMING_REPORT', 'timing_report')
+
+# Most MongoDB commands one request may issue, read from the Server-Timing `db` metric.
+# Keys are fnmatch patterns over "METHOD /path". A list endpoint that starts issuing a
+# query per item blows straight through its budget.
+QUERY_BUDGETS = {
+    # upsert + read back, + a stored revocation when the login changes the user's role
+    'POST /api/auth/login': 3,
+    # the stored revocation
+    'POST /api/auth/logout': 1,
+    'GET /api/auth/me': 1,
+    # distinct (date/price filters) + aggregate + getMore
+    'GET /api/trips': 3,
+    'GET /api/trips/*': 3,
+    'POST /api/trips': 1,
+    # reserve + not-found check + insert + counter update
+    'POST /api/bookings': 4,
+    'GET /api/bookings': 2,
+    # one find on the departures id index; stream events after the snapshot are pushed, not queried
+    'GET /api/departures/availability': 1,
+    'GET /api/departures/availability/stream': 1,
+    # counters (rebuilt on first read) + upcoming departures
+    'GET /api/admin/dashboard': 5,
+    'GET /api/admin/trips': 2,
+    'POST /api/admin/trips': 1,
+    'POST /api/admin/departures': 1,
+    # bulkWrite; departures also check their trips with one distinct
+    'POST /api/admin/trips/bulk': 1,
+    'POST /api/admin/departures/bulk': 2,
+    'GET /api/admin/webhooks': 1,
+    'GET /api/admin/metrics': 0,
+    # rows are streamed after the headers; at most the first cursor batch is counted
+    'GET /api/admin/export/*': 2,
+    'POST /api/payments/webhook': 1,
+}
+
+def query_budget(endpoint):
+    """Declared MongoDB command budget for "METHOD /path", or None when undeclared"""
+    return next((limit for pattern, limit in QUERY_BUDGETS.items() if fnmatch(endpoint, pattern)), None)
+
+class TimedSession(requests.Session):
+    """requests.Session that records wall time, TTFB and size of every call"""
+
+    def __init__(self, recorder):
+        super().__init__()
+        self.recorder = recorder
+        self.category = 'setup'
+        self.cache_counts = {'HIT': 0, 'MISS': 0}
+        # endpoint -> most MongoDB commands seen in a single response
+        self.db_commands = {}
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().request(method, url, *args, **kwargs)
+        wall_ms = (time.perf_counter() - start) * 1000
+        # elapsed stops once the response headers are parsed, i.e. time-to-first-byte
+        ttfb_ms = response.elapsed.total_seconds() * 1000
+        endpoint = f"{method.upper()} {urlsplit(url).path}"
+        self.recorder.record(self.category, endpoint, wall_ms, ttfb_ms, len(response.content))
+        cache_status = response.headers.get('X-Cache')
+        if cache_status in self.cache_counts:
+            self.cache_counts[cache_status] += 1
+        commands = db_command_count(response.headers.get('Server-Timing'))
+        if commands is not None:
+            self.db_commands[endpoint] = max(commands, self.db_commands.get(endpoint, 0))
+        return response
 
 class TravelwithDENCHEAPITester:
+    # (category, scenario method) pairs in execution order
+    SUITES = [
+        ('auth', 'test_auth_system'),
+        ('auth', 'test_session_auth'),
+        ('trips', 'test_trips_api'),
+        ('trips', 'test_catalog_cache'),
+        ('trips', 'test_trip_search'),
+        ('bookings', 'test_bookings_system'),
+        ('bookings', 'test_booking_reservation_path'),
+        ('admin', 'test_admin_dashboard'),
+        ('payments', 'test_payment_mock_system'),
+        ('database', 'test_database_validation'),
+        ('database', 'test_pagination'),
+        ('budgets', 'test_query_budgets')
+    ]
+
     def __init__(self):
-        self.session = requests.Session()
+        self.timings = TimingRecorder()
+        self.session = TimedSession(self.timings)
         self.admin_cookies = None
         self.user_cookies = None
         self.test_results = {
@@ -25,7 +117,8 @@ class TravelwithDENCHEAPITester:
             'bookings': {'passed': 0, 'failed': 0, 'details': []},
             'admin': {'passed': 0, 'failed': 0, 'details': []},
             'payments': {'passed': 0, 'failed': 0, 'details': []},
-            'database': {'passed': 0, 'failed': 0, 'details': []}
+            'database': {'passed': 0, 'failed': 0, 'details': []},
+            'budgets': {'passed': 0, 'failed': 0, 'details': []}
         }
         
     def log_result(self, category, test_name, passed, details=""):
@@ -118,10 +211,13 @@ class TravelwithDENCHEAPITester:
         except Exception as e:
             self.log_result('auth', 'Auth/me user', False, f"Exception: {str(e)}")
 
-        # Test 5: Logout functionality
+        # Test 5: Logout functionality (on a throwaway session, since logout revokes it)
         try:
+            login = self.session.post(f"{API_BASE}/auth/login", 
+                                    json={"type": "user"},
+                                    timeout=10)
             response = self.session.post(f"{API_BASE}/auth/logout", 
-                                       cookies=self.admin_cookies,
+                                       cookies=login.cookies,
                                        timeout=10)
             
             if response.status_code == 200:
@@ -132,9 +228,73 @@ class TravelwithDENCHEAPITester:
                     self.log_result('auth', 'Logout', False, f"Invalid response: {data}")
             else:
                 self.log_result('auth', 'Logout', False, f"Status: {response.status_code}")
+            
+            # The logged-out session cookie must no longer authenticate
+            replay = self.session.get(f"{API_BASE}/bookings", cookies=login.cookies, timeout=10)
+            if replay.status_code == 401:
+                self.log_result('auth', 'Logout revokes session', True)
+            else:
+                self.log_result('auth', 'Logout revokes session', False, f"Expected 401, got: {replay.status_code}")
         except Exception as e:
             self.log_result('auth', 'Logout', False, f"Exception: {str(e)}")
 
+    def test_session_auth(self, requests_per_cookie=20):
+        """Test signed session cookies and measure the users lookups they save"""
+        print("\n🪪 Testing Session Authentication...")
+        
+        session_value = self.user_cookies.get('demo-session') if self.user_cookies else None
+        if not session_value or not session_value.startswith('v1.'):
+            self.log_result('auth', 'Signed session cookie', False, f"Unexpected cookie: {session_value}")
+            return
+        self.log_result('auth', 'Signed session cookie', True)
+        
+        version, payload, signature = session_value.split('.')
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        forged_claims = dict(claims, role='admin')
+        forged_payload = base64.urlsafe_b64encode(json.dumps(forged_claims).encode()).decode().rstrip('=')
+        
+        legacy_value = quote(json.dumps({'email': claims['email'], 'role': claims['role']}))
+        
+        # Tampered, forged or unsigned cookies must not authenticate
+        for label, value, path, expected in (
+            ('Tampered signature rejected', f"{version}.{payload}.{signature[:-2]}xx", '/bookings', 401),
+            ('Forged role rejected', f"{version}.{forged_payload}.{signature}", '/admin/dashboard', 401),
+            ('Legacy unsigned cookie rejected', legacy_value, '/bookings', 401),
+            ('User role denied admin access', session_value, '/admin/dashboard', 403)
+        ):
+            try:
+                response = self.session.get(f"{API_BASE}{path}", cookies={'demo-session': value}, timeout=10)
+                if response.status_code == expected:
+                    self.log_result('auth', label, True)
+                else:
+                    self.log_result('auth', label, False, f"Expected {expected}, got: {response.status_code}")
+            except Exception as e:
+                self.log_result('auth', label, False, f"Exception: {str(e)}")
+        
+        # Signed sessions skip the users collection: no MongoDB command on any request,
+        # read per response from Server-Timing so parallel traffic can't skew the count
+        try:
+            latencies = Histogram()
+            commands = []
+            for _ in range(requests_per_cookie):
+                start = time.perf_counter()
+                response = self.session.get(f"{API_BASE}/auth/me", cookies={'demo-session': session_value}, timeout=10)
+                latencies.record((time.perf_counter() - start) * 1000)
+                commands.append(db_command_count(response.headers.get('Server-Timing')))
+            counted = [count for count in commands if count is not None]
+            lookups = sum(counted) if counted else None
+            print(f"   signed cookie: p50 {latencies.percentile(50):.1f}ms"
+                  + (f", {lookups} MongoDB commands over {requests_per_cookie} requests" if lookups is not None else ""))
+            
+            user = response.json().get('user') or {}
+            if user.get('email') != claims['email'] or (lookups is not None and lookups > 0):
+                self.log_result('auth', 'Signed session skips users lookup', False,
+                                f"User: {user.get('email')}, commands: {lookups}")
+            else:
+                self.log_result('auth', 'Signed session skips users lookup', True)
+        except Exception as e:
+            self.log_result('auth', 'Signed session skips users lookup', False, f"Exception: {str(e)}")
+
     def test_trips_api(self):
         """Test Trips API"""
         print("\n🏔️ Testing Trips API...")
@@ -212,6 +372,138 @@ class TravelwithDENCHEAPITester:
         except Exception as e:
             self.log_result('trips', 'Invalid trip slug handling', False, f"Exception: {str(e)}")
 
+    def test_catalog_cache(self, warm_reads=20):
+        """Test the trip catalog response cache and its invalidation"""
+        print("\n🧊 Testing Catalog Cache...")
+        
+        detail_url = f"{API_BASE}/trips/alps-hiking-escape"
+        
+        # Test 1: An admin write invalidates, so the next read is cold and later reads are warm
+        try:
+            departure_id = self.create_test_departure(4, True)
+            cold_start = time.perf_counter()
+            cold = self.session.get(detail_url, timeout=10)
+            cold_ms = (time.perf_counter() - cold_start) * 1000
+            
+            warm = Histogram()
+            statuses = []
+            for _ in range(warm_reads):
+                start = time.perf_counter()
+                response = self.session.get(detail_url, timeout=10)
+                warm.record((time.perf_counter() - start) * 1000)
+                statuses.append(response.headers.get('X-Cache'))
+            
+            hit_ratio = statuses.count('HIT') / warm_reads
+            print(f"   Cold read {cold_ms:.1f}ms, warm p50 {warm.percentile(50):.1f}ms, "
+                  f"warm hit ratio {hit_ratio:.0%}")
+            
+            departures = cold.json().get('trip', {}).get('departures', [])
+            if not any(d.get('id') == departure_id for d in departures):
+                self.log_result('trips', 'Cache invalidation on admin write', False, "New departure missing from detail")
+            elif cold.headers.get('X-Cache') != 'MISS' or hit_ratio < 1:
+                self.log_result('trips', 'Cache invalidation on admin write', False,
+                                f"Cold: {cold.headers.get('X-Cache')}, warm statuses: {set(statuses)}")
+            else:
+                self.log_result('trips', 'Cache invalidation on admin write', True)
+        except Exception as e:
+            self.log_result('trips', 'Cache invalidation on admin write', False, f"Exception: {str(e)}")
+        
+        # Test 2: A booking changes spots_left, which must be visible immediately
+        try:
+            self.session.get(detail_url, timeout=10)
+            self.session.post(f"{API_BASE}/bookings",
+                            json={"departure_id": departure_id, "seats": 1},
+                            cookies=self.user_cookies,
+                            timeout=10)
+            departures = self.session.get(detail_url, timeout=10).json().get('trip', {}).get('departures', [])
+            spots_left = next((d.get('spots_left') for d in departures if d.get('id') == departure_id), None)
+            if spots_left == 3:
+                self.log_result('trips', 'Cache invalidation on booking', True)
+            else:
+                self.log_result('trips', 'Cache invalidation on booking', False, f"Stale spots_left: {spots_left}")
+        except Exception as e:
+            self.log_result('trips', 'Cache invalidation on booking', False, f"Exception: {str(e)}")
+        
+        # Test 3: Conditional requests with a matching ETag get 304 Not Modified
+        try:
+            response = self.session.get(f"{API_BASE}/trips", timeout=10)
+            etag = response.headers.get('ETag')
+            conditional = self.session.get(f"{API_BASE}/trips", headers={'If-None-Match': etag}, timeout=10)
+            if etag and conditional.status_code == 304 and not conditional.content:
+                self.log_result('trips', 'ETag / If-None-Match', True)
+            else:
+                self.log_result('trips', 'ETag / If-None-Match', False,
+                                f"ETag: {etag}, conditional status: {conditional.status_code}")
+        except Exception as e:
+            self.log_result('trips', 'ETag / If-None-Match', False, f"Exception: {str(e)}")
+
+    def test_trip_search(self):
+        """Test server-side trip search and filtering"""
+        print("\n🔍 Testing Trip Search...")
+        
+        # A unique word per run so results only contain the trips created here
+        token = f"zq{int(time.time() * 1000):x}"
+        trip_ids = {}
+        try:
+            for key, difficulty, days, price in (('near', 'easy', 40, 30000), ('far', 'moderate', 200, 90000)):
+                response = self.session.post(f"{API_BASE}/admin/trips",
+                                           json={"title": f"Search {token} {key}",
+                                                 "subtitle": "Search test trip",
+                                                 "difficulty": difficulty,
+                                                 "featured": False,
+                                                 "active": True},
+                                           cookies=self.admin_cookies,
+                                           timeout=10)
+                trip_ids[key] = response.json()['trip']['id']
+                self.create_test_departure(4, True, days_ahead=days, trip_id=trip_ids[key], price_cents=price)
+        except Exception as e:
+            self.log_result('trips', 'Search fixtures', False, f"Exception: {str(e)}")
+            return
+        
+        def search(**params):
+            response = self.session.get(f"{API_BASE}/trips", params={'q': token, **params}, timeout=10)
+            if response.status_code != 200:
+                raise Exception(f"Status: {response.status_code}")
+            return response.json().get('trips', [])
+        
+        today = datetime.now()
+        cases = [
+            ('Search by text', {}, {'near', 'far'}),
+            ('Filter by difficulty', {'difficulty': 'easy'}, {'near'}),
+            ('Filter by date range', {'from': (today + timedelta(days=100)).isoformat(),
+                                      'to': (today + timedelta(days=300)).isoformat()}, {'far'}),
+            ('Filter by price range', {'min_price': 10000, 'max_price': 50000}, {'near'}),
+            ('Combined filters', {'difficulty': 'moderate', 'max_price': 50000}, set())
+        ]
+        for label, params, expected in cases:
+            try:
+                trips = search(**params)
+                found = {key for key, trip_id in trip_ids.items() if any(t.get('id') == trip_id for t in trips)}
+                outsiders = [t.get('slug') for t in trips if t.get('id') not in trip_ids.values()]
+                
+                # Date/price filters must also narrow the embedded departures
+                stray = [d for t in trips for d in t.get('departures', [])
+                         if ('min_price' in params and d.get('base_price_cents', 0) < params['min_price'])
+                         or ('max_price' in params and d.get('base_price_cents', 0) > params['max_price'])]
+                
+                if found == expected and not outsiders and not stray:
+                    self.log_result('trips', label, True)
+                else:
+                    self.log_result('trips', label, False,
+                                    f"Found {sorted(found)}, expected {sorted(expected)}, "
+                                    f"outsiders {outsiders}, stray departures {len(stray)}")
+            except Exception as e:
+                self.log_result('trips', label, False, f"Exception: {str(e)}")
+        
+        try:
+            response = self.session.get(f"{API_BASE}/trips", params={'from': 'not-a-date'}, timeout=10)
+            if response.status_code == 400:
+                self.log_result('trips', 'Invalid filter handling', True)
+            else:
+                self.log_result('trips', 'Invalid filter handling', False, f"Expected 400, got: {response.status_code}")
+        except Exception as e:
+            self.log_result('trips', 'Invalid filter handling', False, f"Exception: {str(e)}")
+
     def test_bookings_system(self):
         """Test Bookings System"""
         print("\n📅 Testing Bookings System...")
@@ -338,6 +630,72 @@ class TravelwithDENCHEAPITester:
             except Exception as e:
                 self.log_result('bookings', 'Spots left decrement', False, f"Exception: {str(e)}")
 
+    def create_test_departure(self, capacity, allow_free_rsvp, days_ahead=90, trip_id=None, price_cents=49900):
+        """Create a dedicated departure (on the seeded trip by default), returning its id"""
+        if not trip_id:
+            response = self.session.get(f"{API_BASE}/trips/alps-hiking-escape", timeout=10)
+            trip_id = response.json().get('trip', {}).get('id')
+        response = self.session.post(f"{API_BASE}/admin/departures",
+                                   json=departure_payload(trip_id, capacity=capacity,
+                                                          allow_free_rsvp=allow_free_rsvp,
+                                                          days_ahead=days_ahead, price_cents=price_cents),
+                                   cookies=self.admin_cookies,
+                                   timeout=10)
+        return response.json().get('departure', {}).get('id')
+
+    def test_booking_reservation_path(self, bookings_per_departure=3):
+        """Measure MongoDB commands and latency of the booking write path"""
+        print("\n🎟️ Testing Booking Reservation Path...")
+        
+        try:
+            for label, free in (('Free RSVP', True), ('Paid', False)):
+                departure_id = self.create_test_departure(bookings_per_departure, free)
+                if not departure_id:
+                    self.log_result('bookings', f"{label} reservation path", False, "Could not create departure")
+                    continue
+                
+                latencies = Histogram()
+                statuses = []
+                # Per response from Server-Timing, so other traffic on the database can't skew it
+                commands = []
+                for _ in range(bookings_per_departure):
+                    start = time.perf_counter()
+                    response = self.session.post(f"{API_BASE}/bookings",
+                                               json={"departure_id": departure_id, "seats": 1},
+                                               cookies=self.user_cookies,
+                                               timeout=10)
+                    latencies.record((time.perf_counter() - start) * 1000)
+                    statuses.append(response.status_code)
+                    commands.append(db_command_count(response.headers.get('Server-Timing')))
+                most_commands = max((count for count in commands if count is not None), default=None)
+                
+                # One more booking must be rejected without overselling
+                response = self.session.post(f"{API_BASE}/bookings",
+                                           json={"departure_id": departure_id, "seats": 1},
+                                           cookies=self.user_cookies,
+                                           timeout=10)
+                trip = self.session.get(f"{API_BASE}/trips/alps-hiking-escape", timeout=10).json().get('trip', {})
+                spots_left = next((d.get('spots_left') for d in trip.get('departures', [])
+                                   if d.get('id') == departure_id), None)
+                
+                summary = (f"p50 {latencies.percentile(50):.1f}ms, max {latencies.max:.1f}ms"
+                           + (f", at most {most_commands} MongoDB commands/booking" if most_commands is not None else ""))
+                print(f"   {label}: {summary}")
+                
+                if statuses != [200] * bookings_per_departure:
+                    self.log_result('bookings', f"{label} reservation path", False, f"Statuses: {statuses}")
+                elif response.status_code != 400 or spots_left != 0:
+                    self.log_result('bookings', f"{label} reservation path", False,
+                                    f"Sold-out booking status {response.status_code}, spots_left {spots_left}")
+                elif most_commands is not None and most_commands > 3:
+                    # Reserve, insert, counter update: no extra reads on the write path
+                    self.log_result('bookings', f"{label} reservation path", False,
+                                    f"{most_commands} MongoDB commands per booking (expected <= 3)")
+                else:
+                    self.log_result('bookings', f"{label} reservation path", True)
+        except Exception as e:
+            self.log_result('bookings', 'Reservation path', False, f"Exception: {str(e)}")
+
     def test_admin_dashboard(self):
         """Test Admin Dashboard"""
         print("\n👑 Testing Admin Dashboard...")
@@ -380,7 +738,28 @@ class TravelwithDENCHEAPITester:
         except Exception as e:
             self.log_result('admin', 'Admin trips list', False, f"Exception: {str(e)}")
 
-        # Test 3: Unauthorized admin access
+        # Test 3: Pre-aggregated counters track new bookings and upcoming departures are the earliest
+        try:
+            before = self.session.get(f"{API_BASE}/admin/dashboard", cookies=self.admin_cookies, timeout=10).json()
+            departure_id = self.create_test_departure(1, True)
+            self.session.post(f"{API_BASE}/bookings",
+                            json={"departure_id": departure_id, "seats": 1},
+                            cookies=self.user_cookies,
+                            timeout=10)
+            after = self.session.get(f"{API_BASE}/admin/dashboard", cookies=self.admin_cookies, timeout=10).json()
+            
+            starts = [d.get('start_date') for d in after.get('upcoming_departures', [])]
+            delta = after['stats']['total_bookings'] - before['stats']['total_bookings']
+            if delta != 1:
+                self.log_result('admin', 'Dashboard counters', False, f"total_bookings changed by {delta}")
+            elif starts != sorted(starts):
+                self.log_result('admin', 'Dashboard counters', False, f"Upcoming departures not ordered: {starts}")
+            else:
+                self.log_result('admin', 'Dashboard counters', True)
+        except Exception as e:
+            self.log_result('admin', 'Dashboard counters', False, f"Exception: {str(e)}")
+
+        # Test 4: Unauthorized admin access
         try:
             response = self.session.get(f"{API_BASE}/admin/dashboard", 
                                       cookies=self.user_cookies,
@@ -492,18 +871,110 @@ class TravelwithDENCHEAPITester:
         except Exception as e:
             self.log_result('database', 'RLS access control', False, f"Exception: {str(e)}")
 
+    def walk_pages(self, path, key, cookies=None, limit=1, fields=None):
+        """Follow next_cursor until exhausted, returning (rows, page_count)"""
+        rows = []
+        pages = 0
+        cursor = None
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            if fields:
+                params['fields'] = fields
+            response = self.session.get(f"{API_BASE}{path}", params=params, cookies=cookies, timeout=10)
+            if response.status_code != 200:
+                raise Exception(f"{path} page {pages + 1} status: {response.status_code}")
+            data = response.json()
+            rows.extend(data.get(key, []))
+            pages += 1
+            cursor = data.get('next_cursor')
+            if not cursor:
+                return rows, pages
+            if pages > 10000:
+                raise Exception(f"{path} did not terminate")
+
+    def test_pagination(self):
+        """Test cursor pagination and field projection"""
+        print("\n📄 Testing Pagination...")
+        
+        # Walking with tiny pages must return exactly the same rows as one large page
+        for label, path, key, cookies in (
+            ('Trips', '/trips', 'trips', None),
+            ('Admin trips', '/admin/trips', 'trips', self.admin_cookies),
+            ('Admin bookings', '/bookings', 'bookings', self.admin_cookies),
+            ('User bookings', '/bookings', 'bookings', self.user_cookies)
+        ):
+            try:
+                small, pages = self.walk_pages(path, key, cookies, limit=2, fields='id')
+                large, _ = self.walk_pages(path, key, cookies, limit=500, fields='id')
+                small_ids = [row.get('id') for row in small]
+                large_ids = [row.get('id') for row in large]
+                
+                if len(small_ids) != len(set(small_ids)):
+                    self.log_result('database', f"{label} pagination", False, "Duplicate rows across pages")
+                elif small_ids != large_ids:
+                    self.log_result('database', f"{label} pagination", False,
+                                    f"{len(small_ids)} rows over {pages} pages vs {len(large_ids)} in large pages")
+                else:
+                    self.log_result('database', f"{label} pagination", True)
+            except Exception as e:
+                self.log_result('database', f"{label} pagination", False, f"Exception: {str(e)}")
+        
+        # Projection returns only requested fields plus the sort keys
+        try:
+            response = self.session.get(f"{API_BASE}/trips", params={'fields': 'slug,title'}, timeout=10)
+            trips = response.json().get('trips', [])
+            allowed = {'slug', 'title', 'id', 'featured', 'created_at'}
+            extra = {field for trip in trips for field in trip} - allowed
+            if response.status_code == 200 and trips and not extra:
+                self.log_result('database', 'Field projection', True)
+            else:
+                self.log_result('database', 'Field projection', False,
+                                f"Status: {response.status_code}, unexpected fields: {sorted(extra)}")
+        except Exception as e:
+            self.log_result('database', 'Field projection', False, f"Exception: {str(e)}")
+        
+        # Garbage cursors are rejected rather than ignored
+        try:
+            response = self.session.get(f"{API_BASE}/trips", params={'cursor': 'not-a-cursor'}, timeout=10)
+            if response.status_code == 400:
+                self.log_result('database', 'Invalid cursor handling', True)
+            else:
+                self.log_result('database', 'Invalid cursor handling', False, f"Expected 400, got: {response.status_code}")
+        except Exception as e:
+            self.log_result('database', 'Invalid cursor handling', False, f"Exception: {str(e)}")
+
+    def test_query_budgets(self):
+        """Fail every endpoint that issued more MongoDB commands than its declared budget"""
+        print("\n🧮 Checking MongoDB query budgets...")
+        
+        observed = self.session.db_commands
+        if not observed:
+            self.log_result('budgets', 'Server-Timing command counts', False,
+                            "No response carried a Server-Timing db metric")
+            return
+        
+        for endpoint, commands in sorted(observed.items()):
+            budget = query_budget(endpoint)
+            if budget is None:
+                self.log_result('budgets', f"{endpoint} query budget", False,
+                                f"No budget declared (max {commands} commands)")
+            elif commands > budget:
+                self.log_result('budgets', f"{endpoint} query budget", False,
+                                f"{commands} commands in one request, budget is {budget}")
+            else:
+                self.log_result('budgets', f"{endpoint} query budget ({commands}/{budget})", True)
+
     def run_all_tests(self):
         """Run all backend tests"""
         print("🚀 Starting TravelwithDENCHE Backend API Tests...")
         print(f"🌐 Testing against: {API_BASE}")
         
         # Run all test suites
-        self.test_auth_system()
-        self.test_trips_api()
-        self.test_bookings_system()
-        self.test_admin_dashboard()
-        self.test_payment_mock_system()
-        self.test_database_validation()
+        for category, scenario in self.SUITES:
+            self.session.category = category
+            getattr(self, scenario)()
         
         # Print summary
         print("\n" + "="*60)
@@ -530,8 +1001,33 @@ class TravelwithDENCHEAPITester:
         else:
             print("⚠️  Some tests failed - check details above")
         
+        self.print_timing_summary()
+        json_path, csv_path = self.timings.write(TIMING_REPORT, metadata={
+            'api_base': API_BASE,
+            'passed': total_passed,
+            'failed': total_failed
+        })
+        print(f"🗂️  Timing report written to {json_path} and {csv_path}")
+        
         return total_failed == 0
 
+    def print_timing_summary(self):
+        """Print per-category request timing percentiles"""
+        print("\n" + "="*60)
+        print("⏱️  REQUEST TIMING (ms)")
+        print("="*60)
+        print(f"{'CATEGORY':<12}{'REQS':>6}{'P50':>9}{'P95':>9}{'P99':>9}{'TTFB P50':>10}{'KB P50':>9}")
+        for category, entry in sorted(self.timings.by_category().items()):
+            wall = entry['wall_ms']
+            print(f"{category:<12}{wall.count:>6}{wall.percentile(50):>9.1f}{wall.percentile(95):>9.1f}"
+                  f"{wall.percentile(99):>9.1f}{entry['ttfb_ms'].percentile(50):>10.1f}"
+                  f"{entry['bytes'].percentile(50) / 1024:>9.1f}")
+        
+        cache = self.session.cache_counts
+        lookups = cache['HIT'] + cache['MISS']
+        if lookups:
+            print(f"🧊 Catalog cache: {cache['HIT']}/{lookups} hits ({cache['HIT'] / lookups:.0%})")
+
 if __name__ == "__main__":
     tester = TravelwithDENCHEAPITester()
     success = tester.run_all_tests()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark Regression Gate for TravelwithDENCHE
+Runs the backend_test.py scenarios N times and compares per-endpoint
+median and p95 latency against a committed baseline file
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from backend_test import API_BASE, DB_NAME, MONGO_URL, TravelwithDENCHEAPITester
+from perf_metrics import Histogram
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'baseline.json')
+
+
+class BenchmarkRunner:
+    def __init__(self, iterations=5, categories=None, verbose=False):
+        self.iterations = iterations
+        self.categories = categories
+        self.verbose = verbose
+        self.tester = TravelwithDENCHEAPITester()
+
+    def run(self):
+        """Run every selected scenario `iterations` times, returning failure count"""
+        suites = [(category, scenario) for category, scenario in self.tester.SUITES
+                  if not self.categories or category in self.categories]
+        output = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+
+        with output:
+            # Later scenarios rely on the cookies acquired by the auth scenario
+            self.tester.session.category = 'setup'
+            self.tester.test_auth_system()
+            for iteration in range(self.iterations):
+                for category, scenario in suites:
+                    self.tester.session.category = category
+                    getattr(self.tester, scenario)()
+
+        return sum(results['failed'] for results in self.tester.test_results.values())
+
+    def measurements(self):
+        """Median and p95 wall time per `category endpoint` key"""
+        return {
+            f"{category} {endpoint}": {
+                'samples': entry['wall_ms'].count,
+                'p50_ms': round(entry['wall_ms'].percentile(50), 3),
+                'p95_ms': round(entry['wall_ms'].percentile(95), 3)
+            }
+            for (category, endpoint), entry in sorted(self.tester.timings.histograms.items())
+            if category != 'setup'
+        }
+
+
+def dashboard_scaling(sizes, reads=20, marker='benchmark-scaling'):
+    """Measure admin dashboard latency while synthetic history grows.
+
+    Bookings and payments tagged with `marker` are bulk-inserted straight into
+    MongoDB between measurements and removed afterwards. Returns a list of
+    (history_size, p50_ms, p95_ms).
+    """
+    from pymongo import MongoClient
+
+    db = MongoClient(MONGO_URL)[DB_NAME]
+    tester = TravelwithDENCHEAPITester()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tester.test_auth_system()
+
+    results = []
+    inserted = 0
+    try:
+        for size in sorted(sizes):
+            while inserted < size:
+                batch = min(10000, size - inserted)
+                now = datetime.utcnow()
+                db.bookings.insert_many([
+                    {'id': f"{marker}-b-{inserted + i}", 'user_id': marker, 'status': 'reserved_deposit_paid',
+                     'seats': 1, 'created_at': now, 'benchmark_marker': marker}
+                    for i in range(batch)
+                ], ordered=False)
+                db.payments.insert_many([
+                    {'id': f"{marker}-p-{inserted + i}", 'booking_id': f"{marker}-b-{inserted + i}",
+                     'type': 'deposit', 'amount_cents': 15000, 'status': 'succeeded',
+                     'created_at': now, 'benchmark_marker': marker}
+                    for i in range(batch)
+                ], ordered=False)
+                inserted += batch
+
+            latencies = Histogram()
+            for _ in range(reads):
+                response = tester.session.get(f"{API_BASE}/admin/dashboard",
+                                              cookies=tester.admin_cookies, timeout=60)
+                response.raise_for_status()
+                latencies.record(response.elapsed.total_seconds() * 1000)
+            results.append((size, latencies.percentile(50), latencies.percentile(95)))
+            print(f"   {size:>10} extra bookings/payments: p50 {latencies.percentile(50):.1f}ms, "
+                  f"p95 {latencies.percentile(95):.1f}ms")
+    finally:
+        db.bookings.delete_many({'benchmark_marker': marker})
+        db.payments.delete_many({'benchmark_marker': marker})
+    return results
+
+
+# Representative catalog searches; words come from generate_dataset.py vocabularies
+SEARCH_QUERIES = [
+    ('unfiltered page', {}),
+    ('text', {'q': 'Dolomites'}),
+    ('text + difficulty', {'q': 'Trek', 'difficulty': 'moderate'}),
+    ('difficulty', {'difficulty': 'hard'}),
+    ('date range', {'from_days': 30, 'to_days': 60}),
+    ('price range', {'min_price': 50000, 'max_price': 80000}),
+    ('text + date + price', {'q': 'Alpine', 'from_days': 0, 'to_days': 120, 'max_price': 150000}),
+]
+
+
+def search_benchmark(reads=20, fields='id,slug,title,departures'):
+    """Measure GET /api/trips latency for each search shape, bypassing the catalog cache
+    by varying an ignored parameter. Returns {label: (rows, p50_ms, p95_ms)}."""
+    tester = TravelwithDENCHEAPITester()
+    today = datetime.now()
+    results = {}
+    for label, spec in SEARCH_QUERIES:
+        params = {key: value for key, value in spec.items() if not key.endswith('_days')}
+        if 'from_days' in spec:
+            params['from'] = (today + timedelta(days=spec['from_days'])).isoformat()
+        if 'to_days' in spec:
+            params['to'] = (today + timedelta(days=spec['to_days'])).isoformat()
+        params['fields'] = fields
+
+        latencies = Histogram()
+        rows = 0
+        for i in range(reads):
+            response = tester.session.get(f"{API_BASE}/trips", params={**params, 'nocache': i}, timeout=60)
+            response.raise_for_status()
+            latencies.record(response.elapsed.total_seconds() * 1000)
+            rows = len(response.json().get('trips', []))
+        results[label] = (rows, latencies.percentile(50), latencies.percentile(95))
+        print(f"   {label:<24} {rows:>5} rows  p50 {latencies.percentile(50):>8.1f}ms  "
+              f"p95 {latencies.percentile(95):>8.1f}ms")
+    return results
+
+
+def compare(current, baseline, tolerance, slack_ms):
+    """Return (regressions, missing) between current and baseline measurements.
+
+    An endpoint regresses when its median or p95 exceeds the baseline by
+    more than `tolerance` (a fraction) plus `slack_ms` of absolute noise.
+    """
+    regressions = []
+    missing = []
+    for key, base in sorted(baseline.items()):
+        if key not in current:
+            missing.append(key)
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = base[metric] * (1 + tolerance) + slack_ms
+            if current[key][metric] > limit:
+                regressions.append({
+                    'endpoint': key,
+                    'metric': metric,
+                    'baseline': base[metric],
+                    'current': current[key][metric],
+                    'limit': round(limit, 3)
+                })
+    return regressions, missing
+
+
+def print_comparison(current, baseline):
+    print(f"{'ENDPOINT':<48}{'P50':>9}{'BASE':>9}{'P95':>9}{'BASE':>9}")
+    for key, row in current.items():
+        base = baseline.get(key, {})
+        print(f"{key:<48}{row['p50_ms']:>9.1f}{base.get('p50_ms', float('nan')):>9.1f}"
+              f"{row['p95_ms']:>9.1f}{base.get('p95_ms', float('nan')):>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark regression gate for the TravelwithDENCHE API")
+    parser.add_argument('--iterations', type=int, default=5, help="runs per scenario")
+    parser.add_argument('--category', action='append', help="limit to a category (repeatable)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown, e.g. 0.25 for +25%%")
+    parser.add_argument('--slack-ms', type=float, default=2.0,
+                        help="absolute slack added to every limit to absorb noise")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="write the current measurements as the new baseline")
+    parser.add_argument('--verbose', action='store_true', help="show individual test output")
+    parser.add_argument('--dashboard-scaling', metavar='SIZES',
+                        help="comma-separated history sizes, e.g. 0,100000,1000000: check that "
+                             "dashboard latency stays flat as bookings/payments grow (requires pymongo)")
+    parser.add_argument('--max-growth', type=float, default=2.0,
+                        help="dashboard-scaling: allowed p50 ratio between largest and smallest size")
+    parser.add_argument('--search', action='store_true',
+                        help="measure catalog search latency (run against generate_dataset.py data)")
+    parser.add_argument('--max-search-p95', type=float, default=250.0,
+                        help="search: fail when any search shape's p95 exceeds this many ms")
+    args = parser.parse_args()
+
+    if args.search:
+        print("🔍 Measuring catalog search latency...")
+        results = search_benchmark()
+        slow = [label for label, (_, _, p95) in results.items() if p95 > args.max_search_p95]
+        for label in slow:
+            print(f"❌ {label}: p95 {results[label][2]:.1f}ms > {args.max_search_p95:.1f}ms")
+        if not slow:
+            print("🎉 All search shapes within budget!")
+        return not slow
+
+    if args.dashboard_scaling:
+        sizes = [int(size) for size in args.dashboard_scaling.split(',')]
+        print("📊 Measuring admin dashboard latency against history size...")
+        results = dashboard_scaling(sizes)
+        smallest, largest = results[0][1], results[-1][1]
+        growth = largest / max(smallest, 1e-9)
+        if growth > args.max_growth:
+            print(f"❌ Dashboard p50 grew {growth:.1f}x (limit {args.max_growth:.1f}x)")
+            return False
+        print(f"🎉 Dashboard p50 grew {growth:.1f}x across {results[0][0]}..{results[-1][0]} rows")
+        return True
+
+    print("🏁 Starting TravelwithDENCHE benchmark...")
+    print(f"🌐 Target: {API_BASE} | iterations: {args.iterations}")
+
+    runner = BenchmarkRunner(iterations=args.iterations, categories=args.category, verbose=args.verbose)
+    failures = runner.run()
+    current = runner.measurements()
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        # First run on a fresh checkout: there is nothing to compare against yet,
+        # so record this run as the baseline instead of failing the gate
+        first_run = not args.update_baseline
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(),
+                'iterations': args.iterations,
+                'endpoints': current
+            }, f, indent=2)
+        print(f"💾 Baseline written to {args.baseline} ({len(current)} endpoints)")
+        if first_run:
+            print("ℹ️  No baseline existed - commit this file so later runs are compared against it")
+        return failures == 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['endpoints']
+    if args.category:
+        baseline = {key: value for key, value in baseline.items()
+                    if key.split(' ', 1)[0] in args.category}
+
+    print("\n" + "="*84)
+    print("📊 BENCHMARK RESULTS (ms)")
+    print("="*84)
+    print_comparison(current, baseline)
+
+    regressions, missing = compare(current, baseline, args.tolerance, args.slack_ms)
+    print("-" * 84)
+    for key in missing:
+        print(f"⚠️  {key}: in baseline but not measured")
+    for reg in regressions:
+        print(f"❌ {reg['endpoint']} {reg['metric']}: {reg['current']:.1f}ms > "
+              f"{reg['limit']:.1f}ms (baseline {reg['baseline']:.1f}ms)")
+    if failures:
+        print(f"❌ {failures} functional test(s) failed during the benchmark")
+
+    if not regressions and not failures:
+        print("🎉 No regressions beyond tolerance!")
+    return not regressions and not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Bulk Catalog Loader for TravelwithDENCHE
+Streams trips or departures from a CSV, JSON or NDJSON file through the admin
+bulk endpoints in chunks, several chunks in flight at once
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+import uuid
+
+import aiohttp
+
+from backend_test import API_BASE
+
+INT_FIELDS = {'capacity', 'base_price_cents', 'deposit_cents', 'group_size_min', 'group_size_max',
+              'balance_due_days_before_start'}
+BOOL_FIELDS = {'allow_free_rsvp', 'featured', 'active'}
+MAX_CHUNK = 1000
+
+
+def coerce_csv_row(row):
+    """CSV cells are strings: convert the typed fields and JSON lists/objects, drop empty cells.
+    Cells that don't convert are sent as-is, so the API reports them against their row.
+    """
+    item = {}
+    for field, value in row.items():
+        value = (value or '').strip()
+        if not field or value == '':
+            continue
+        try:
+            if field in INT_FIELDS:
+                value = int(value)
+            elif field in BOOL_FIELDS:
+                value = value.lower() in ('true', '1', 'yes')
+            elif value[0] in '[{':
+                value = json.loads(value)
+        except ValueError:
+            pass
+        item[field] = value
+    return item
+
+
+def read_items(path, fmt):
+    """Yield items one at a time; only a JSON array has to be read whole"""
+    with open(path, newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield coerce_csv_row(row)
+        elif fmt == 'ndjson':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkLoader:
+    """Sends chunks to POST /api/admin/<kind>/bulk from `concurrency` workers.
+
+    Items without an `id` get one here, so a chunk retried after a dropped
+    connection, or a file loaded twice, reports `id already exists` instead of
+    creating copies.
+    """
+
+    def __init__(self, kind, chunk_size=200, concurrency=4, ordered=True, retries=3, timeout=60.0):
+        self.kind = kind
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.retries = retries
+        self.timeout = timeout
+        self.cookies = {}
+        self.counts = {'created': 0, 'exists': 0, 'invalid': 0, 'failed': 0, 'skipped': 0}
+        self.problems = []
+        self.rows = 0
+        self.chunks_done = 0
+
+    async def login(self, http):
+        async with http.post(f"{API_BASE}/auth/login", json={'type': 'admin'}) as response:
+            response.raise_for_status()
+            self.cookies['demo-session'] = response.cookies['demo-session'].value
+
+    async def send(self, http, items):
+        url = f"{API_BASE}/admin/{self.kind}/bulk"
+        for attempt in range(1, self.retries + 1):
+            try:
+                async with http.post(url, json={'items': items, 'ordered': self.ordered},
+                                     cookies=self.cookies) as response:
+                    if response.status < 500:
+                        body = await response.json()
+                        if response.status != 200:
+                            raise RuntimeError(f"HTTP {response.status}: {body.get('error')}")
+                        return body
+                    if attempt == self.retries:
+                        raise RuntimeError(f"HTTP {response.status} after {self.retries} attempts")
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    def record(self, offset, items, results):
+        for result in results:
+            status = result['status']
+            if status == 'failed' and result.get('errors') == ['id already exists']:
+                status = 'exists'
+            self.counts[status] += 1
+            if status in ('invalid', 'failed', 'skipped'):
+                self.problems.append({'row': offset + result['index'] + 1, 'status': status,
+                                      'errors': result.get('errors', []), 'item': items[result['index']]})
+
+    async def worker(self, http, queue):
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            offset, items = job
+            try:
+                data = await self.send(http, items)
+                self.record(offset, items, data['results'])
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+                self.counts['failed'] += len(items)
+                self.problems.extend({'row': offset + i + 1, 'status': 'failed', 'errors': [str(e)], 'item': item}
+                                     for i, item in enumerate(items))
+            self.chunks_done += 1
+            if self.chunks_done % 10 == 0:
+                print(f"   {self.chunks_done} chunks sent, {self.counts['created']} created", file=sys.stderr)
+
+    async def run(self, items):
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout, cookie_jar=aiohttp.DummyCookieJar()) as http:
+            await self.login(http)
+            # Bounded so a large file is never read far ahead of what has been sent
+            queue = asyncio.Queue(maxsize=self.concurrency * 2)
+            workers = [asyncio.ensure_future(self.worker(http, queue)) for _ in range(self.concurrency)]
+            for chunk in chunked(items, self.chunk_size):
+                for item in chunk:
+                    if isinstance(item, dict):
+                        item.setdefault('id', str(uuid.uuid4()))
+                await queue.put((self.rows, chunk))
+                self.rows += len(chunk)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load trips or departures into the TravelwithDENCHE API")
+    parser.add_argument('kind', choices=['trips', 'departures'])
+    parser.add_argument('path', help="CSV (header row), JSON array or NDJSON file")
+    parser.add_argument('--format', choices=['csv', 'json', 'ndjson'],
+                        help="input format (default: from the file extension)")
+    parser.add_argument('--chunk-size', type=int, default=200, help=f"items per request (max {MAX_CHUNK})")
+    parser.add_argument('--concurrency', type=int, default=4, help="requests in flight")
+    parser.add_argument('--unordered', action='store_true',
+                        help="write every valid item of a chunk instead of stopping at the first failure")
+    parser.add_argument('--errors', metavar='PATH', help="write rejected rows as JSON lines")
+    args = parser.parse_args()
+
+    if not 1 <= args.chunk_size <= MAX_CHUNK:
+        parser.error(f"--chunk-size must be between 1 and {MAX_CHUNK}")
+    fmt = args.format or {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}.get(
+        os.path.splitext(args.path)[1].lower(), 'json')
+
+    print(f"📥 Loading {args.kind} from {args.path} ({fmt}) into {API_BASE}...", file=sys.stderr)
+    loader = BulkLoader(args.kind, chunk_size=args.chunk_size, concurrency=args.concurrency,
+                        ordered=not args.unordered)
+    started = time.monotonic()
+    try:
+        asyncio.run(loader.run(read_items(args.path, fmt)))
+    except (OSError, ValueError, aiohttp.ClientError) as e:
+        print(f"❌ Load failed after {loader.rows} rows: {e}", file=sys.stderr)
+        return False
+    elapsed = max(time.monotonic() - started, 1e-9)
+
+    if args.errors:
+        with open(args.errors, 'w') as f:
+            for problem in loader.problems:
+                f.write(json.dumps(problem) + '\n')
+    for problem in loader.problems[:10]:
+        print(f"   row {problem['row']}: {problem['status']} - {'; '.join(problem['errors'])}", file=sys.stderr)
+
+    counts = loader.counts
+    print(f"{'✅' if not loader.problems else '❌'} {loader.rows} rows in {elapsed:.1f}s "
+          f"({loader.rows / elapsed:.0f} rows/s): {counts['created']} created, {counts['exists']} already loaded, "
+          f"{counts['invalid']} invalid, {counts['failed']} failed, {counts['skipped']} skipped", file=sys.stderr)
+    return not loader.problems
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
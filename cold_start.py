@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Cold-Start Benchmark for TravelwithDENCHE
+Starts the API server from scratch, measures time-to-first-successful-response,
+then the latency of the first burst of concurrent requests against a
+steady-state burst fired right after it
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import signal
+import subprocess
+import time
+
+import aiohttp
+
+from backend_test import API_BASE
+from perf_metrics import Histogram
+
+
+class ColdStartBenchmark:
+    """One run = start the server, wait for readiness, fire a cold then a warm burst, stop it.
+
+    The server must not already be running: the point is to measure a process
+    that has never handled a request. Pool settings can be varied per
+    comparison through `env`, e.g. {'MONGO_MIN_POOL_SIZE': '0'}.
+    """
+
+    def __init__(self, start_cmd, path='/trips', requests=1000, ready_timeout=120.0,
+                 env=None, log_path=None):
+        self.start_cmd = start_cmd
+        self.url = f"{API_BASE}{path}"
+        self.requests = requests
+        self.ready_timeout = ready_timeout
+        self.env = {**os.environ, **(env or {})}
+        self.log_path = log_path
+
+    async def server_is_down(self, http):
+        try:
+            async with http.get(API_BASE):
+                return False
+        except aiohttp.ClientError:
+            return True
+
+    async def wait_until_ready(self, http, started):
+        """Poll until the first 2xx, returning (first_response_s, first_success_s)"""
+        first_response = None
+        deadline = started + self.ready_timeout
+        while time.monotonic() < deadline:
+            try:
+                async with http.get(self.url) as response:
+                    await response.read()
+                    now = time.monotonic() - started
+                    first_response = first_response or now
+                    if response.status < 300:
+                        return first_response, now
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(0.01)
+        raise RuntimeError(f"Server did not answer {self.url} within {self.ready_timeout}s")
+
+    async def burst(self, http):
+        """Fire `requests` requests at once, returning (histogram, errors, wall_s)"""
+        latencies = Histogram()
+        errors = 0
+        barrier = asyncio.Event()
+
+        async def one():
+            nonlocal errors
+            await barrier.wait()
+            start = time.perf_counter()
+            try:
+                async with http.get(self.url) as response:
+                    await response.read()
+                    ok = response.status < 300
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+            latencies.record((time.perf_counter() - start) * 1000)
+            errors += 0 if ok else 1
+
+        tasks = [asyncio.ensure_future(one()) for _ in range(self.requests)]
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        barrier.set()
+        await asyncio.gather(*tasks)
+        return latencies, errors, time.perf_counter() - started
+
+    def start_server(self):
+        log = open(self.log_path, 'ab') if self.log_path else subprocess.DEVNULL
+        # Own process group, so stopping it also stops the node children of npm/yarn
+        return subprocess.Popen(shlex.split(self.start_cmd), env=self.env, stdout=log,
+                                stderr=subprocess.STDOUT, start_new_session=True)
+
+    def stop_server(self, process):
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        except ProcessLookupError:
+            pass
+
+    async def run_once(self):
+        # Unlimited connections: the burst really is `requests` simultaneous requests
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=60)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            if not await self.server_is_down(http):
+                raise RuntimeError(f"A server is already answering at {API_BASE}; stop it first")
+
+            started = time.monotonic()
+            process = self.start_server()
+            try:
+                first_response_s, first_success_s = await self.wait_until_ready(http, started)
+                cold, cold_errors, cold_wall = await self.burst(http)
+                warm, warm_errors, warm_wall = await self.burst(http)
+            finally:
+                self.stop_server(process)
+
+        return {
+            'first_response_s': first_response_s,
+            'first_success_s': first_success_s,
+            'cold': dict(cold.to_dict(), errors=cold_errors, rps=self.requests / cold_wall),
+            'warm': dict(warm.to_dict(), errors=warm_errors, rps=self.requests / warm_wall)
+        }
+
+    def run(self, runs):
+        return [asyncio.run(self.run_once()) for _ in range(runs)]
+
+
+def print_report(results):
+    print("\n" + "="*88)
+    print("🥶 COLD START RESULTS")
+    print("="*88)
+    print(f"{'RUN':<5}{'FIRST RESP':>12}{'FIRST 2XX':>11}{'COLD P50':>10}{'COLD P95':>10}{'COLD MAX':>10}"
+          f"{'WARM P50':>10}{'WARM P95':>10}{'ERR':>6}")
+    for i, result in enumerate(results, 1):
+        cold, warm = result['cold'], result['warm']
+        print(f"{i:<5}{result['first_response_s']:>11.2f}s{result['first_success_s']:>10.2f}s"
+              f"{cold['p50']:>10.1f}{cold['p95']:>10.1f}{cold['max']:>10.1f}"
+              f"{warm['p50']:>10.1f}{warm['p95']:>10.1f}{cold['errors'] + warm['errors']:>6}")
+    print("-" * 88)
+    ratio = (sum(r['cold']['p95'] for r in results) /
+             max(sum(r['warm']['p95'] for r in results), 1e-9))
+    print(f"🎯 Mean time to first success {sum(r['first_success_s'] for r in results) / len(results):.2f}s | "
+          f"cold/warm p95 ratio {ratio:.2f}x")
+
+
+def parse_env(values):
+    env = {}
+    for value in values or []:
+        name, _, setting = value.partition('=')
+        env[name] = setting
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the TravelwithDENCHE API")
+    parser.add_argument('--start-cmd', default='npm run start',
+                        help="command that starts the (already built) server")
+    parser.add_argument('--path', default='/trips', help="API path to probe and burst")
+    parser.add_argument('--requests', type=int, default=1000, help="concurrent requests per burst")
+    parser.add_argument('--runs', type=int, default=3, help="server restarts to average over")
+    parser.add_argument('--ready-timeout', type=float, default=120.0,
+                        help="seconds to wait for the first successful response")
+    parser.add_argument('--env', action='append', metavar='NAME=VALUE',
+                        help="extra server environment, e.g. MONGO_MIN_POOL_SIZE=0 (repeatable)")
+    parser.add_argument('--server-log', metavar='PATH', help="append server output to this file")
+    parser.add_argument('--max-cold-p95', type=float,
+                        help="fail when the first burst's p95 exceeds this many ms")
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    benchmark = ColdStartBenchmark(args.start_cmd, path=args.path, requests=args.requests,
+                                   ready_timeout=args.ready_timeout, env=parse_env(args.env),
+                                   log_path=args.server_log)
+    print("🚀 Starting TravelwithDENCHE cold-start benchmark...")
+    print(f"🌐 Target: {benchmark.url} | start: {args.start_cmd} | burst: {args.requests} | runs: {args.runs}")
+    results = benchmark.run(args.runs)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'env': parse_env(args.env), 'runs': results}, f, indent=2)
+
+    success = all(r['cold']['errors'] == 0 and r['warm']['errors'] == 0 for r in results)
+    if args.max_cold_p95 is not None:
+        slow = [r['cold']['p95'] for r in results if r['cold']['p95'] > args.max_cold_p95]
+        for p95 in slow:
+            print(f"❌ Cold burst p95 {p95:.1f}ms > {args.max_cold_p95:.1f}ms")
+        success = success and not slow
+    return success
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
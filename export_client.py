@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Streaming Export Client for TravelwithDENCHE
+Downloads bookings or payments from the admin export endpoint row by row,
+so memory stays flat no matter how many rows the range covers
+"""
+
+import argparse
+import csv
+import json
+import resource
+import sys
+import time
+
+import requests
+
+from backend_test import API_BASE
+
+
+def admin_session():
+    session = requests.Session()
+    response = session.post(f"{API_BASE}/auth/login", json={"type": "admin"}, timeout=10)
+    response.raise_for_status()
+    return session
+
+
+def stream_export(session, kind, fmt='ndjson', date_from=None, date_to=None, chunk_size=64 * 1024):
+    """Yield export rows as dicts, parsed incrementally from the response body"""
+    params = {'format': fmt}
+    if date_from:
+        params['from'] = date_from
+    if date_to:
+        params['to'] = date_to
+
+    with session.get(f"{API_BASE}/admin/export/{kind}", params=params, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        lines = response.iter_lines(chunk_size=chunk_size, decode_unicode=True)
+        if fmt == 'csv':
+            # Quoted fields may contain newlines, so re-join them for the csv module
+            yield from csv.DictReader(line + '\n' for line in lines)
+        else:
+            for line in lines:
+                if line:
+                    yield json.loads(line)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream an admin export from the TravelwithDENCHE API")
+    parser.add_argument('kind', choices=['bookings', 'payments'])
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--from', dest='date_from', help="created_at lower bound (ISO date)")
+    parser.add_argument('--to', dest='date_to', help="created_at upper bound (ISO date)")
+    parser.add_argument('--output', metavar='PATH',
+                        help="write rows to this file in the export format (default: only count them)")
+    args = parser.parse_args()
+
+    print(f"📦 Exporting {args.kind} ({args.format}) from {API_BASE}...", file=sys.stderr)
+    session = admin_session()
+    out = open(args.output, 'w', newline='') if args.output else None
+    writer = None
+    rows = 0
+    started = time.monotonic()
+    try:
+        for row in stream_export(session, args.kind, args.format, args.date_from, args.date_to):
+            rows += 1
+            if out and args.format == 'csv':
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+            elif out:
+                out.write(json.dumps(row) + '\n')
+            if rows % 100000 == 0:
+                print(f"   {rows} rows, peak RSS {peak_rss_mb():.0f} MB", file=sys.stderr)
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Export failed after {rows} rows: {e}", file=sys.stderr)
+        return False
+    finally:
+        if out:
+            out.close()
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(f"✅ {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s), "
+          f"peak RSS {peak_rss_mb():.0f} MB", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
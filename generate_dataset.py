@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Synthetic Dataset Generator for TravelwithDENCHE
+Bulk-loads a local MongoDB with trips, departures, bookings, payments,
+trip_images and users shaped like the documents route.js expects.
+Output is reproducible from --seed and streamed in fixed-size batches,
+so memory stays flat no matter the scale.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'travelwithdenche')
+
+COLLECTIONS = ['users', 'trips', 'trip_images', 'departures', 'bookings', 'payments']
+
+ADJECTIVES = ['Alpine', 'Coastal', 'Desert', 'Hidden', 'Wild', 'Ancient', 'Northern', 'Volcanic',
+              'Island', 'Highland', 'Forest', 'Canyon']
+PLACES = ['Atlas', 'Dolomites', 'Pyrenees', 'Sahara', 'Lofoten', 'Azores', 'Cappadocia', 'Patagonia',
+          'Tatra', 'Crete', 'Madeira', 'Picos', 'Balkans', 'Iceland', 'Corsica', 'Tyrol']
+KINDS = ['Hiking Escape', 'Trek', 'Weekend Adventure', 'Discovery', 'Expedition', 'Retreat']
+MEETING_POINTS = ['Train Station', 'Town Center', 'Airport Arrivals Hall', 'Old Harbour', 'Main Square']
+DIFFICULTIES = ['easy', 'moderate', 'hard']
+PAID_STATUSES = ['pending_deposit', 'reserved_deposit_paid', 'paid_in_full', 'refunded']
+
+
+class DatasetGenerator:
+    def __init__(self, db, seed=42, trips=10000, departures=200000, bookings=5000000, users=50000,
+                 images_per_trip=4, batch_size=5000, anchor=None):
+        self.db = db
+        self.seed = seed
+        self.trips = trips
+        self.departures = max(departures, trips)
+        self.bookings = bookings
+        self.users = users
+        self.images_per_trip = images_per_trip
+        self.batch_size = batch_size
+        self.anchor = anchor or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.rng = random.Random(seed)
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_URL, f"travelwithdenche-synthetic-{seed}")
+        self.counts = {name: 0 for name in COLLECTIONS}
+        self.buffers = {name: [] for name in COLLECTIONS}
+
+    # Helpers -----------------------------------------------------------
+
+    def make_id(self, kind, index):
+        """Deterministic id so documents can reference each other without lookups"""
+        return str(uuid.uuid5(self.namespace, f"{kind}-{index}"))
+
+    def add(self, collection, doc):
+        buffer = self.buffers[collection]
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            self.flush(collection)
+
+    def flush(self, collection=None):
+        for name in [collection] if collection else COLLECTIONS:
+            buffer = self.buffers[name]
+            if buffer:
+                self.db[name].insert_many(buffer, ordered=False)
+                self.counts[name] += len(buffer)
+                self.buffers[name] = []
+
+    # Documents ---------------------------------------------------------
+
+    def user_doc(self, index):
+        return {
+            'id': self.make_id('user', index),
+            'auth_uid': f"synthetic-{index}",
+            'email': f"traveler{index}@synthetic.dev",
+            'role': 'user',
+            'name': f"Traveler {index}",
+            'avatar_url': None,
+            'phone': None,
+            'nationality': self.rng.choice(['FR', 'DE', 'ES', 'IT', 'GB', 'US', 'MA', 'DZ']),
+            'created_at': self.anchor - timedelta(days=self.rng.randint(0, 1000)),
+            'synthetic': True
+        }
+
+    def trip_doc(self, index):
+        rng = self.rng
+        place = rng.choice(PLACES)
+        title = f"{rng.choice(ADJECTIVES)} {place} {rng.choice(KINDS)}"
+        return {
+            'id': self.make_id('trip', index),
+            'slug': f"{title.lower().replace(' ', '-')}-{index}",
+            'title': title,
+            'subtitle': f"Small-group adventure through the {place}",
+            'hero_image_url': f"https://images.example.com/trips/{index}/hero.jpg",
+            'description_md': f"# {title}\n\nA synthetic trip generated for scale testing.",
+            'itinerary_md': "# Itinerary\n\n## Day 1\n- Arrival\n\n## Day 2\n- Summit day",
+            'highlights': rng.sample(['Panoramic views', 'Local cuisine', 'Glacier lakes', 'Small group',
+                                      'Expert guides', 'Hidden trails', 'Sunrise summit'], 3),
+            'difficulty': rng.choice(DIFFICULTIES),
+            'included': ['Professional guide', 'Accommodation', 'Breakfasts'],
+            'not_included': ['Flights', 'Travel insurance'],
+            'group_size_min': 4,
+            'group_size_max': rng.choice([12, 16, 20]),
+            'languages': rng.sample(['en', 'fr', 'ar'], rng.randint(1, 3)),
+            'accommodation': rng.choice(['Mountain huts', 'Guesthouses', 'Camping', 'Boutique hotels']),
+            'meeting_point': f"{place} {rng.choice(MEETING_POINTS)}",
+            'faq': [{'question': 'What fitness level is required?', 'answer': 'Moderate.'}],
+            'featured': rng.random() < 0.05,
+            'active': rng.random() < 0.95,
+            'created_at': self.anchor - timedelta(days=rng.randint(0, 1500), seconds=rng.randint(0, 86399)),
+            'synthetic': True
+        }
+
+    def image_doc(self, trip_id, trip_index, position):
+        return {
+            'id': self.make_id('image', f"{trip_index}-{position}"),
+            'trip_id': trip_id,
+            'url': f"https://images.example.com/trips/{trip_index}/{position}.jpg",
+            'alt': f"Trip {trip_index} photo {position + 1}",
+            'sort_order': position,
+            'synthetic': True
+        }
+
+    def departure_bookings(self, departure_index, trip_id, count):
+        """Build one departure and its `count` bookings (+ payments) so spots_left is consistent"""
+        rng = self.rng
+        departure_id = self.make_id('departure', departure_index)
+        start = self.anchor + timedelta(days=rng.randint(-365, 365))
+        free = rng.random() < 0.3
+        price = rng.randrange(19900, 249900, 1000)
+        deposit = price * 3 // 10
+
+        seats_taken = 0
+        for _ in range(count):
+            booking_index = self.counts['bookings'] + len(self.buffers['bookings'])
+            seats = rng.choice([1, 1, 1, 2, 2, 3])
+            seats_taken += seats
+            total = price * seats
+            # Departures run up to a year past the anchor, but nothing can be booked or paid
+            # after it; every timestamp below is clamped so the dataset has no future rows
+            created_at = min(start - timedelta(days=rng.randint(1, 180), seconds=rng.randint(0, 86399)),
+                             self.anchor)
+            status = 'reserved_unpaid' if free else rng.choice(PAID_STATUSES)
+            booking_id = self.make_id('booking', booking_index)
+            intent = f"pi_synth_{booking_id.replace('-', '')}"
+            paid = {'reserved_deposit_paid': deposit * seats, 'paid_in_full': total,
+                    'refunded': deposit * seats}.get(status, 0)
+
+            booking = {
+                'id': booking_id,
+                'user_id': self.make_id('user', rng.randrange(self.users)) if self.users else None,
+                'trip_id': trip_id,
+                'departure_id': departure_id,
+                'seats': seats,
+                'status': status,
+                'total_price_cents': total,
+                'deposit_paid_cents': min(paid, deposit * seats),
+                'balance_due_cents': total - paid,
+                'created_at': created_at,
+                'updated_at': created_at,
+                'synthetic': True
+            }
+            if not free:
+                booking['stripe_checkout_session_id'] = f"cs_synth_{booking_id.replace('-', '')}"
+            if paid:
+                booking['stripe_payment_intent_id'] = intent
+            self.add('bookings', booking)
+
+            if paid:
+                payment_at = min(created_at + timedelta(minutes=rng.randint(1, 120)), self.anchor)
+                self.add('payments', {
+                    'id': self.make_id('payment', booking_index),
+                    'booking_id': booking_id,
+                    'type': 'balance' if status == 'paid_in_full' else 'deposit',
+                    'amount_cents': paid,
+                    'currency': 'EUR',
+                    'stripe_payment_intent_id': intent,
+                    'status': 'succeeded',
+                    'created_at': payment_at,
+                    'synthetic': True
+                })
+                if status == 'refunded':
+                    self.add('payments', {
+                        'id': self.make_id('refund', booking_index),
+                        'booking_id': booking_id,
+                        'type': 'refund',
+                        'amount_cents': -paid,
+                        'currency': 'EUR',
+                        'stripe_payment_intent_id': intent,
+                        'status': 'succeeded',
+                        'created_at': min(payment_at + timedelta(days=rng.randint(1, 30)), self.anchor),
+                        'synthetic': True
+                    })
+
+        capacity = max(seats_taken + rng.randint(0, 10), 8)
+        self.add('departures', {
+            'id': departure_id,
+            'trip_id': trip_id,
+            'start_date': start,
+            'end_date': start + timedelta(days=rng.randint(2, 10)),
+            'capacity': capacity,
+            'spots_left': capacity - seats_taken,
+            'base_price_cents': price,
+            'currency': 'EUR',
+            'deposit_cents': deposit,
+            'allow_free_rsvp': free,
+            'booking_deadline': start - timedelta(days=5),
+            'refund_policy_id': None,
+            'balance_due_days_before_start': 14,
+            'synthetic': True
+        })
+
+    # Orchestration -----------------------------------------------------
+
+    def progress(self, label, done, total, started):
+        rate = done / max(time.monotonic() - started, 1e-9)
+        sys.stdout.write(f"\r  {label}: {done:,}/{total:,} ({rate:,.0f}/s)   ")
+        sys.stdout.flush()
+
+    def generate(self):
+        started = time.monotonic()
+        for index in range(self.users):
+            self.add('users', self.user_doc(index))
+            if index % self.batch_size == 0:
+                self.progress('users', index, self.users, started)
+        self.flush()
+        self.progress('users', self.users, self.users, started)
+        print()
+
+        # Departures are spread evenly over trips and bookings evenly over departures
+        departures_per_trip, extra_departures = divmod(self.departures, self.trips) if self.trips else (0, 0)
+        bookings_per_departure, extra_bookings = divmod(self.bookings, self.departures) if self.departures else (0, 0)
+
+        started = time.monotonic()
+        departure_index = 0
+        for trip_index in range(self.trips):
+            trip = self.trip_doc(trip_index)
+            self.add('trips', trip)
+            for position in range(self.images_per_trip):
+                self.add('trip_images', self.image_doc(trip['id'], trip_index, position))
+
+            for _ in range(departures_per_trip + (1 if trip_index < extra_departures else 0)):
+                count = bookings_per_departure + (1 if departure_index < extra_bookings else 0)
+                self.departure_bookings(departure_index, trip['id'], count)
+                departure_index += 1
+
+            if trip_index % 100 == 0:
+                self.progress('trips', trip_index, self.trips, started)
+        self.flush()
+        self.progress('trips', self.trips, self.trips, started)
+        print()
+
+        # Counters are stale now; the next dashboard read rebuilds them
+        self.db['dashboard_stats'].delete_many({})
+        return self.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic TravelwithDENCHE data into MongoDB")
+    parser.add_argument('--mongo-url', default=MONGO_URL)
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--seed', type=int, default=42, help="random seed; same seed, same dataset")
+    parser.add_argument('--trips', type=int, default=10000)
+    parser.add_argument('--departures', type=int, default=200000)
+    parser.add_argument('--bookings', type=int, default=5000000)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--images-per-trip', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=5000, help="documents per insert_many")
+    parser.add_argument('--anchor-date', help="YYYY-MM-DD all dates are relative to (default: today)")
+    parser.add_argument('--purge', action='store_true',
+                        help="delete previously generated (synthetic) documents before loading")
+    parser.add_argument('--purge-only', action='store_true', help="delete synthetic documents and exit")
+    args = parser.parse_args()
+
+    db = MongoClient(args.mongo_url)[args.db]
+    print("🏭 TravelwithDENCHE synthetic dataset generator")
+    print(f"🗄️  Database: {args.mongo_url}/{args.db} | seed: {args.seed}")
+
+    if args.purge or args.purge_only:
+        for name in COLLECTIONS:
+            deleted = db[name].delete_many({'synthetic': True}).deleted_count
+            print(f"  Purged {deleted:,} synthetic {name}")
+        db['dashboard_stats'].delete_many({})
+        if args.purge_only:
+            return True
+
+    anchor = datetime.strptime(args.anchor_date, '%Y-%m-%d') if args.anchor_date else None
+    generator = DatasetGenerator(db, seed=args.seed, trips=args.trips, departures=args.departures,
+                                 bookings=args.bookings, users=args.users,
+                                 images_per_trip=args.images_per_trip, batch_size=args.batch_size,
+                                 anchor=anchor)
+    started = time.monotonic()
+    counts = generator.generate()
+
+    print("🎉 Dataset loaded in {:.1f}s".format(time.monotonic() - started))
+    for name, count in counts.items():
+        print(f"  - {name}: {count:,}")
+    print("\n📝 Indexes are built on the next API start (lib/indexes.js); "
+          "run python3 index_check.py to verify query plans.")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
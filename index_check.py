@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Query Plan Verification for TravelwithDENCHE
+Runs explain() on every query shape the API issues against a local mongod
+and fails when any winning plan contains a COLLSCAN or sorts in memory
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'travelwithdenche')
+
+SAMPLE_ID = 'explain-sample-id'
+
+# (label, collection, kind, spec) mirroring the queries in app/api/[[...path]]/route.js,
+# lib/auth.js and lib/payments.js. `find` specs are (filter, sort, limit); `aggregate`
+# specs are pipelines. $lookup joins are listed as the finds they perform on `from`.
+QUERY_SHAPES = [
+    ('auth: current user by email', 'users', 'find', ({'email': 'demo@user.dev'}, None, 1)),
+    ('trips: catalog page', 'trips', 'aggregate', [
+        {'$match': {'active': True}},
+        {'$sort': {'featured': -1, 'created_at': -1, 'id': -1}},
+        {'$limit': 101}
+    ]),
+    ('trips: text search', 'trips', 'aggregate', [
+        {'$match': {'active': True, '$text': {'$search': 'alps'}}},
+        {'$sort': {'featured': -1, 'created_at': -1, 'id': -1}},
+        {'$limit': 101}
+    ]),
+    ('trips: by difficulty', 'trips', 'find',
+     ({'active': True, 'difficulty': 'moderate'}, [('featured', -1), ('created_at', -1), ('id', -1)], 101)),
+    ('departures: search by date/price', 'departures', 'find',
+     ({'start_date': {'$gte': datetime.utcnow()}, 'base_price_cents': {'$lte': 50000}}, None, 0)),
+    ('trips: detail by slug', 'trips', 'find', ({'slug': 'alps-hiking-escape', 'active': True}, None, 1)),
+    ('trips: lookup by id', 'trips', 'find', ({'id': SAMPLE_ID}, None, 1)),
+    ('trips: admin catalog page', 'trips', 'find', ({}, [('created_at', -1), ('id', -1)], 101)),
+    ('departures: by trip', 'departures', 'find', ({'trip_id': SAMPLE_ID}, None, 0)),
+    ('departures: lookup by id', 'departures', 'find', ({'id': SAMPLE_ID}, None, 1)),
+    ('departures: availability batch', 'departures', 'find', ({'id': {'$in': [SAMPLE_ID]}}, None, 0)),
+    ('departures: reserve seats', 'departures', 'find',
+     ({'id': SAMPLE_ID, 'spots_left': {'$gte': 1}, 'start_date': {'$gte': datetime.utcnow()},
+       '$or': [{'booking_deadline': None}, {'booking_deadline': {'$gte': datetime.utcnow()}}]}, None, 1)),
+    ('departures: upcoming', 'departures', 'find',
+     ({'start_date': {'$gte': datetime.utcnow()}}, [('start_date', 1)], 5)),
+    ('trip_images: by trip', 'trip_images', 'find', ({'trip_id': SAMPLE_ID}, [('sort_order', 1)], 0)),
+    ('bookings: user page', 'bookings', 'find',
+     ({'user_id': SAMPLE_ID}, [('created_at', -1), ('id', -1)], 101)),
+    ('bookings: admin page', 'bookings', 'find', ({}, [('created_at', -1), ('id', -1)], 101)),
+    ('bookings: departure page', 'bookings', 'find',
+     ({'departure_id': SAMPLE_ID}, [('created_at', -1), ('id', -1)], 101)),
+    ('bookings: by id', 'bookings', 'find', ({'id': SAMPLE_ID}, None, 1)),
+    ('payments: by payment intent', 'payments', 'find', ({'stripe_payment_intent_id': 'pi_sample'}, None, 1)),
+    ('payments: export by date range', 'payments', 'find',
+     ({'created_at': {'$gte': datetime.utcnow() - timedelta(days=30)}}, [('created_at', 1), ('id', 1)], 0)),
+    ('bookings: export by date range', 'bookings', 'find',
+     ({'created_at': {'$gte': datetime.utcnow() - timedelta(days=30)}}, [('created_at', 1), ('id', 1)], 0)),
+    ('payments: by idempotency key', 'payments', 'find', ({'idempotency_key': 'deposit:pi_sample'}, None, 1)),
+    ('session_revocations: session check', 'session_revocations', 'find',
+     ({'$or': [{'sid': SAMPLE_ID},
+               {'email': 'demo@user.dev', 'revoked_at': {'$gte': datetime.utcnow() - timedelta(days=1)}}]},
+      None, 0)),
+    ('webhook_events: claim batch', 'webhook_events', 'find',
+     ({'$or': [{'status': 'pending', 'next_attempt_at': {'$lte': datetime.utcnow()}},
+               {'status': 'processing', 'claimed_at': {'$lt': datetime.utcnow()}}]},
+      [('received_at', 1)], 500)),
+]
+
+# Shapes whose sort can't come from an index: text search orders the matched trips
+# itself, and the webhook claim's $or branches use different indexes
+IN_MEMORY_SORT_OK = {'trips: text search', 'webhook_events: claim batch'}
+
+
+def winning_plans(node):
+    """Yield every winningPlan subtree found anywhere in an explain document"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'winningPlan':
+                yield value
+            else:
+                yield from winning_plans(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from winning_plans(item)
+
+
+def plan_stages(node):
+    if isinstance(node, dict):
+        if 'stage' in node:
+            yield node['stage']
+        for value in node.values():
+            yield from plan_stages(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from plan_stages(item)
+
+
+def in_memory_sort(explained, stages):
+    """A SORT in the query plan, or a $sort the pipeline kept for itself"""
+    pipeline = explained.get('stages', [])
+    return 'SORT' in stages or any('$sort' in stage for stage in pipeline)
+
+
+def explain(db, collection, kind, spec):
+    if kind == 'aggregate':
+        return db.command('aggregate', collection, pipeline=spec, explain=True)
+    query, sort, limit = spec
+    cursor = db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor.explain()
+
+
+def check_query_plans(db):
+    """Return a list of (label, stages) for shapes whose winning plan scans a collection
+    or sorts in memory where an index should provide the order"""
+    failures = []
+    for label, collection, kind, spec in QUERY_SHAPES:
+        explained = explain(db, collection, kind, spec)
+        stages = [stage for plan in winning_plans(explained) for stage in plan_stages(plan)]
+        if 'COLLSCAN' in stages:
+            failures.append((label, stages))
+            print(f"❌ {label}: {' <- '.join(stages)}")
+        elif label not in IN_MEMORY_SORT_OK and in_memory_sort(explained, stages):
+            failures.append((label, stages))
+            print(f"❌ {label}: sorts in memory ({' <- '.join(stages)})")
+        else:
+            print(f"✅ {label}: {' <- '.join(stages) or 'EOF'}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail on any COLLSCAN or in-memory sort in the API's query plans")
+    parser.add_argument('--mongo-url', default=MONGO_URL)
+    parser.add_argument('--db', default=DB_NAME)
+    args = parser.parse_args()
+
+    print("🔎 Verifying TravelwithDENCHE query plans...")
+    print(f"🗄️  Database: {args.mongo_url}/{args.db}")
+    db = MongoClient(args.mongo_url, serverSelectionTimeoutMS=5000)[args.db]
+    failures = check_query_plans(db)
+
+    print("-" * 60)
+    if failures:
+        print(f"⚠️  {len(failures)} query shape(s) fall back to a collection scan or an in-memory sort")
+    else:
+        print("🎉 Every query shape is index-backed!")
+    return not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
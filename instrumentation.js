@@ -0,0 +1,22 @@
+// Runs once when the server boots, before it handles requests
+export async function register() {
+  if (process.env.NEXT_RUNTIME !== 'nodejs') {
+    return;
+  }
+
+  // Refuse to start rather than fail on the first authenticated request
+  const { requireSessionSecret } = await import('./lib/auth');
+  requireSessionSecret();
+
+  if (process.env.MONGO_WARM_UP === 'false') {
+    return;
+  }
+
+  const { warmUpDatabase } = await import('./lib/db');
+  try {
+    await warmUpDatabase();
+  } catch (error) {
+    // Still boot: the first request retries the connection
+    console.error('MongoDB warm-up failed', error);
+  }
+}
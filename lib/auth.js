@@ -1,65 +1,219 @@
 import { cookies } from 'next/headers';
+import { createHmac, timingSafeEqual } from 'crypto';
 import { getDatabase } from './db';
+import { TTLCache } from './cache';
+import { timePhase, untracked } from './timing';
 import { v4 as uuidv4 } from 'uuid';
 
-export class DemoAuth {
-  static async loginAsAdmin() {
-    const user = {
-      id: uuidv4(),
-      email: process.env.ADMIN_EMAIL || 'aimen.denche18@gmail.com',
-      name: 'Aimen Denche',
-      role: 'admin',
-      avatar_url: null,
-      auth_uid: 'admin-demo',
-      created_at: new Date()
-    };
+export const SESSION_COOKIE = 'demo-session';
+export const SESSION_MAX_AGE = 30 * 24 * 60 * 60; // 30 days
+// Test identities must live on their own domain so they can never take over a real account
+export const TEST_IDENTITY_EMAIL = /^[\w.+-]+@test\.dev$/;
 
-    const db = await getDatabase();
-    await db.collection('users').updateOne(
-      { email: user.email },
-      { $set: user },
-      { upsert: true }
-    );
+// Throws in production without SESSION_SECRET: a well-known signing key would let
+// anyone mint an admin session. `next build` also runs with NODE_ENV=production and
+// loads this module, but never signs a cookie, so it is let through.
+export function requireSessionSecret() {
+  if (process.env.SESSION_SECRET) {
+    return process.env.SESSION_SECRET;
+  }
+  if (process.env.NODE_ENV === 'production' && process.env.NEXT_PHASE !== 'phase-production-build') {
+    throw new Error('SESSION_SECRET must be set in production');
+  }
+  return 'travelwithdenche-dev-session-secret';
+}
 
-    return user;
+const SESSION_SECRET = requireSessionSecret();
+
+// Resolved users for sessions issued before a role change, whose claims can't be
+// trusted. Short TTL so external edits show up quickly.
+const sessionCache = new TTLCache({ max: 1000, ttl: 30 * 1000 });
+
+// Revocations live in the `session_revocations` collection so they hold across
+// restarts and instances: one document per logged-out session ({ sid }) or role
+// change ({ email }), removed by a TTL index once no token it affects can still be
+// presented. A session's check is remembered for REVOCATION_CHECK_MS in a bounded
+// LRU keyed by sid, so memory stays flat however many sessions get revoked and a
+// logout or role change on another instance takes effect within that interval.
+const REVOCATION_CHECK_MS = 5000;
+
+// One cache per process (see db.js for why this lives on globalThis).
+// sid -> 'active' | 'revoked' | 'stale' (the user's role changed after it was issued)
+const sessionStatusCache = globalThis.__travelwithdencheSessionStatus ??= new TTLCache({
+  max: 10000,
+  ttl: REVOCATION_CHECK_MS
+});
+
+async function sessionStatus(claims) {
+  const cached = sessionStatusCache.get(claims.sid);
+  if (cached !== undefined) {
+    return cached;
   }
 
-  static async loginAsDemoUser() {
-    const user = {
-      id: uuidv4(),
-      email: 'demo@user.dev',
-      name: 'Demo User',
-      role: 'user',
-      avatar_url: null,
-      auth_uid: 'demo-user',
-      created_at: new Date()
-    };
+  const generation = sessionStatusCache.generation;
+  const db = await getDatabase();
+  // Made once per session per interval rather than per request, so it isn't charged
+  // to the request that happened to miss the cache
+  const docs = await untracked(() => db.collection('session_revocations')
+    .find(
+      { $or: [{ sid: claims.sid }, { email: claims.email, revoked_at: { $gte: new Date(claims.iat) } }] },
+      { projection: { _id: 0, sid: 1 } }
+    )
+    .toArray());
+  const status = docs.some((doc) => doc.sid) ? 'revoked' : docs.length > 0 ? 'stale' : 'active';
+  sessionStatusCache.set(claims.sid, status, generation);
+  return status;
+}
+
+function sign(payload) {
+  return createHmac('sha256', SESSION_SECRET).update(payload).digest('base64url');
+}
+
+// Cookie format: v1.<base64url JSON claims>.<HMAC-SHA256 signature>
+export function createSessionToken(user) {
+  const claims = {
+    sid: uuidv4(),
+    id: user.id,
+    email: user.email,
+    role: user.role,
+    name: user.name,
+    avatar_url: user.avatar_url ?? null,
+    iat: Date.now()
+  };
+  const payload = Buffer.from(JSON.stringify(claims)).toString('base64url');
+  // Nothing can have revoked a session that didn't exist until now
+  sessionStatusCache.set(claims.sid, 'active');
+  return `v1.${payload}.${sign(payload)}`;
+}
+
+export function verifySessionToken(token) {
+  const [version, payload, signature] = token.split('.');
+  if (version !== 'v1' || !payload || !signature) {
+    return null;
+  }
+
+  const expected = Buffer.from(sign(payload));
+  const actual = Buffer.from(signature);
+  if (expected.length !== actual.length || !timingSafeEqual(expected, actual)) {
+    return null;
+  }
+
+  const claims = JSON.parse(Buffer.from(payload, 'base64url').toString('utf8'));
+  if (Date.now() - claims.iat > SESSION_MAX_AGE * 1000) {
+    return null;
+  }
+  return claims;
+}
+
+async function findUserCached(key, email) {
+  const cached = sessionCache.get(key);
+  if (cached !== undefined) {
+    return cached;
+  }
+
+  const generation = sessionCache.generation;
+  const db = await getDatabase();
+  const user = await db.collection('users').findOne({ email });
+  sessionCache.set(key, user, generation);
+  return user;
+}
 
+export async function revokeSession(token) {
+  const claims = token && verifySessionToken(token);
+  if (claims) {
+    sessionStatusCache.set(claims.sid, 'revoked');
     const db = await getDatabase();
-    await db.collection('users').updateOne(
-      { email: user.email },
-      { $set: user },
-      { upsert: true }
+    await db.collection('session_revocations').insertOne({
+      sid: claims.sid,
+      revoked_at: new Date(),
+      // The cookie is rejected as expired after this anyway
+      expires_at: new Date(claims.iat + SESSION_MAX_AGE * 1000)
+    });
+  }
+}
+
+// Call whenever a user's role changes so existing sessions stop trusting their claims
+export async function invalidateUserSessions(email) {
+  const now = Date.now();
+  const db = await getDatabase();
+  await db.collection('session_revocations').insertOne({
+    email,
+    revoked_at: new Date(now),
+    expires_at: new Date(now + SESSION_MAX_AGE * 1000)
+  });
+  // Sessions aren't indexed by email here, so every cached check is redone
+  sessionStatusCache.clear();
+  sessionCache.clear();
+}
+
+export class DemoAuth {
+  static async upsertDemoUser(profile) {
+    const db = await getDatabase();
+    const previous = await db.collection('users').findOneAndUpdate(
+      { email: profile.email },
+      {
+        $set: profile,
+        // Keep the id stable across logins so bookings and sessions stay linked
+        $setOnInsert: { id: uuidv4(), created_at: new Date() }
+      },
+      { upsert: true, returnDocument: 'before' }
     );
 
-    return user;
+    if (previous && previous.role !== profile.role) {
+      await invalidateUserSessions(profile.email);
+    }
+
+    return db.collection('users').findOne({ email: profile.email });
+  }
+
+  // `identity` ({ email, name }) logs in as a separate test account instead of the
+  // shared demo one, so concurrent test runs don't see each other's bookings
+  static async loginAsAdmin(identity = {}) {
+    return this.upsertDemoUser({
+      email: identity.email || process.env.ADMIN_EMAIL || 'aimen.denche18@gmail.com',
+      name: identity.name || 'Aimen Denche',
+      role: 'admin',
+      avatar_url: null,
+      auth_uid: identity.email ? `test-${identity.email}` : 'admin-demo'
+    });
+  }
+
+  static async loginAsDemoUser(identity = {}) {
+    return this.upsertDemoUser({
+      email: identity.email || 'demo@user.dev',
+      name: identity.name || 'Demo User',
+      role: 'user',
+      avatar_url: null,
+      auth_uid: identity.email ? `test-${identity.email}` : 'demo-user'
+    });
   }
 
   static async getCurrentUser() {
     try {
       const cookieStore = cookies();
-      const sessionCookie = cookieStore.get('demo-session');
-      
+      const sessionCookie = cookieStore.get(SESSION_COOKIE);
+
       if (!sessionCookie) {
         return null;
       }
 
-      const session = JSON.parse(sessionCookie.value);
-      const db = await getDatabase();
-      const user = await db.collection('users').findOne({ 
-        email: session.email 
-      });
+      // Anything unsigned, including the old `{ email, role }` JSON cookie, is rejected:
+      // whoever can write a cookie could otherwise log in as any email
+      const claims = verifySessionToken(sessionCookie.value);
+      if (!claims) {
+        return null;
+      }
+
+      const status = await sessionStatus(claims);
+      if (status === 'revoked') {
+        return null;
+      }
+      if (status === 'stale') {
+        return await findUserCached(claims.sid, claims.email);
+      }
 
+      // Hot path: the signed claims are trusted without touching Mongo
+      const { sid, iat, ...user } = claims;
       return user;
     } catch (error) {
       console.error('Error getting current user:', error);
@@ -67,7 +221,7 @@ export class DemoAuth {
     }
   }
 
-  static async isAdmin(user) {
+  static isAdmin(user) {
     if (!user) return false;
     return user.role === 'admin' || user.email === process.env.ADMIN_EMAIL;
   }
@@ -75,11 +229,11 @@ export class DemoAuth {
 
 export async function getCurrentUser() {
   const useDemoMode = process.env.USE_DEMO_MODE === 'true';
-  
+
   if (useDemoMode) {
-    return await DemoAuth.getCurrentUser();
+    return await timePhase('auth', () => DemoAuth.getCurrentUser());
   }
-  
+
   // TODO: Implement Supabase auth when keys are available
   return null;
 }
@@ -98,4 +252,4 @@ export async function requireAdmin() {
     throw new Error('Admin access required');
   }
   return user;
-}
\ No newline at end of file
+}
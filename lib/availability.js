@@ -0,0 +1,167 @@
+import { EventEmitter } from 'events';
+
+// Lightweight departure availability for pages that only need current seat counts:
+//
+//   GET /api/departures/availability?ids=a,b,c          one batch of { id, spots_left, status }
+//   GET /api/departures/availability/stream?ids=a,b,c   Server-Sent Events
+//
+// The stream opens with a `snapshot` event holding the batch above, then sends one
+// `availability` event per change as bookings land. Changes are published in-process,
+// so with several instances a client only hears about bookings made on the instance
+// it is connected to; the snapshot on (re)connect catches it up.
+//
+// A client that stops reading is never buffered without bound: once MAX_QUEUED_EVENTS
+// are waiting, further changes are coalesced to the latest one per departure and sent
+// when it catches up. Counts are absolute, so the skipped ones are safe to drop.
+
+export const MAX_AVAILABILITY_IDS = 100;
+const RETRY_MS = 3000;
+const HEARTBEAT_MS = 15000;
+const MAX_QUEUED_EVENTS = 16;
+
+// One emitter per process (see db.js for why this lives on globalThis)
+const shared = globalThis.__travelwithdencheAvailability ??= { changes: new EventEmitter() };
+shared.changes.setMaxListeners(0);
+
+export function parseDepartureIds(request) {
+  const ids = [...new Set(
+    (new URL(request.url).searchParams.get('ids') || '').split(',').map((id) => id.trim()).filter(Boolean)
+  )];
+  if (ids.length === 0 || ids.length > MAX_AVAILABILITY_IDS) {
+    throw new Error('Invalid filters');
+  }
+  return ids;
+}
+
+export function availabilityOf(departure, now = new Date()) {
+  let status = 'available';
+  if (departure.spots_left <= 0) {
+    status = 'full';
+  } else if ((departure.booking_deadline && departure.booking_deadline < now) || departure.start_date < now) {
+    status = 'closed';
+  }
+  return { id: departure.id, spots_left: departure.spots_left, status };
+}
+
+// Unknown ids are left out rather than reported as errors
+export async function getAvailability(db, ids) {
+  const departures = await db.collection('departures')
+    .find(
+      { id: { $in: ids } },
+      { projection: { _id: 0, id: 1, spots_left: 1, start_date: 1, booking_deadline: 1 } }
+    )
+    .toArray();
+  const now = new Date();
+  return departures.map((departure) => availabilityOf(departure, now));
+}
+
+// Called with the departure document as it is after a write to spots_left
+export function publishAvailability(departure) {
+  shared.changes.emit('change', availabilityOf(departure));
+}
+
+// Open streams in this process; a count that only grows means streams aren't being closed
+export function availabilitySubscribers() {
+  return shared.changes.listenerCount('change');
+}
+
+function sseEvent(event, data) {
+  return `event: ${event}\ndata: ${JSON.stringify(data)}\n\n`;
+}
+
+export async function availabilityStream(db, ids, request) {
+  const wanted = new Set(ids);
+  const encoder = new TextEncoder();
+  // Subscribe before reading the snapshot so no change can fall in between; changes
+  // seen meanwhile are sent right after it, in order, and carry absolute counts
+  const early = [];
+  let deliver = (change) => early.push(change);
+  const listener = (change) => {
+    if (wanted.has(change.id)) {
+      deliver(change);
+    }
+  };
+  shared.changes.on('change', listener);
+
+  let snapshot;
+  try {
+    snapshot = await getAvailability(db, ids);
+  } catch (error) {
+    shared.changes.off('change', listener);
+    throw error;
+  }
+
+  let heartbeat = null;
+  const close = () => {
+    shared.changes.off('change', listener);
+    clearInterval(heartbeat);
+  };
+
+  // Latest unsent change per departure; re-inserting moves a departure to the back,
+  // so changes still go out in the order they last happened
+  const pending = new Map();
+  let flush = () => {};
+
+  const stream = new ReadableStream({
+    start(controller) {
+      const write = (text) => {
+        try {
+          controller.enqueue(encoder.encode(text));
+        } catch {
+          // The client went away between events
+          close();
+        }
+      };
+      flush = () => {
+        for (const [id, change] of pending) {
+          if (!(controller.desiredSize > 0)) {
+            return;
+          }
+          pending.delete(id);
+          write(sseEvent('availability', change));
+        }
+      };
+      const send = (change) => {
+        pending.delete(change.id);
+        pending.set(change.id, change);
+        flush();
+      };
+
+      write(`retry: ${RETRY_MS}\n\n` + sseEvent('snapshot', { departures: snapshot }));
+      early.forEach(send);
+      deliver = send;
+      // Comment lines keep proxies from timing out idle connections; a client with
+      // events still queued isn't idle
+      heartbeat = setInterval(() => {
+        if (controller.desiredSize > 0) {
+          write(': keep-alive\n\n');
+        }
+      }, HEARTBEAT_MS);
+      heartbeat.unref?.();
+      request.signal?.addEventListener('abort', () => {
+        close();
+        try {
+          controller.close();
+        } catch {
+          // Already closed
+        }
+      });
+    },
+    // The client read something: send what was held back while it was behind
+    pull() {
+      flush();
+    },
+    cancel() {
+      close();
+    }
+  }, new CountQueuingStrategy({ highWaterMark: MAX_QUEUED_EVENTS }));
+
+  return new Response(stream, {
+    headers: {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-store',
+      // Tell nginx-style proxies not to buffer the stream
+      'X-Accel-Buffering': 'no'
+    }
+  });
+}
@@ -0,0 +1,204 @@
+import { v4 as uuidv4 } from 'uuid';
+
+// Bulk catalog import for the admin API:
+//
+//   POST /api/admin/trips/bulk        { items: [trip, ...], ordered: true }
+//   POST /api/admin/departures/bulk   { items: [departure, ...], ordered: false }
+//
+// Items are validated up front and valid ones written with a single bulkWrite.
+// `ordered` follows MongoDB's semantics: an ordered batch stops at the first item
+// that is invalid or fails to insert (everything after it is `skipped`), an
+// unordered one writes every valid item and reports failures per item. Each
+// result is { index, status: created|invalid|failed|skipped, id?, errors? }.
+//
+// Items may carry their own `id`, as with the single-item endpoints; re-sending
+// an already imported item then fails with a duplicate id instead of copying it.
+
+export const MAX_BULK_ITEMS = 1000;
+const DIFFICULTIES = ['easy', 'moderate', 'hard'];
+
+export function buildTrip(data) {
+  return {
+    id: uuidv4(),
+    slug: data.title.toLowerCase().replace(/[^a-z0-9]+/g, '-'),
+    ...data,
+    // Stored as a real boolean so the catalog can sort on it straight from the index
+    featured: data.featured === true,
+    created_at: new Date()
+  };
+}
+
+export function buildDeparture(data) {
+  return {
+    id: uuidv4(),
+    ...data,
+    start_date: new Date(data.start_date),
+    end_date: new Date(data.end_date),
+    booking_deadline: data.booking_deadline ? new Date(data.booking_deadline) : null,
+    spots_left: data.capacity
+  };
+}
+
+function isObject(value) {
+  return value !== null && typeof value === 'object' && !Array.isArray(value);
+}
+
+function isDate(value) {
+  return typeof value === 'string' && !Number.isNaN(Date.parse(value));
+}
+
+function isCount(value) {
+  return Number.isInteger(value) && value >= 0;
+}
+
+export function validateTrip(data) {
+  if (!isObject(data)) {
+    return ['must be an object'];
+  }
+  const errors = [];
+  if (typeof data.title !== 'string' || !data.title.trim()) {
+    errors.push('title is required');
+  }
+  if (data.id !== undefined && (typeof data.id !== 'string' || !data.id)) {
+    errors.push('id must be a non-empty string');
+  }
+  if (data.difficulty !== undefined && !DIFFICULTIES.includes(data.difficulty)) {
+    errors.push(`difficulty must be one of ${DIFFICULTIES.join(', ')}`);
+  }
+  for (const field of ['featured', 'active']) {
+    if (data[field] !== undefined && typeof data[field] !== 'boolean') {
+      errors.push(`${field} must be a boolean`);
+    }
+  }
+  return errors;
+}
+
+export function validateDeparture(data) {
+  if (!isObject(data)) {
+    return ['must be an object'];
+  }
+  const errors = [];
+  if (typeof data.trip_id !== 'string' || !data.trip_id) {
+    errors.push('trip_id is required');
+  }
+  if (data.id !== undefined && (typeof data.id !== 'string' || !data.id)) {
+    errors.push('id must be a non-empty string');
+  }
+  for (const field of ['start_date', 'end_date']) {
+    if (!isDate(data[field])) {
+      errors.push(`${field} must be an ISO date`);
+    }
+  }
+  if (isDate(data.start_date) && isDate(data.end_date) && Date.parse(data.end_date) < Date.parse(data.start_date)) {
+    errors.push('end_date must not be before start_date');
+  }
+  if (data.booking_deadline != null && !isDate(data.booking_deadline)) {
+    errors.push('booking_deadline must be an ISO date');
+  }
+  for (const field of ['capacity', 'base_price_cents']) {
+    if (!isCount(data[field])) {
+      errors.push(`${field} must be a non-negative integer`);
+    }
+  }
+  if (data.deposit_cents !== undefined && !isCount(data.deposit_cents)) {
+    errors.push('deposit_cents must be a non-negative integer');
+  }
+  if (typeof data.currency !== 'string' || !/^[A-Z]{3}$/.test(data.currency)) {
+    errors.push('currency must be a 3-letter ISO code');
+  }
+  if (data.allow_free_rsvp !== undefined && typeof data.allow_free_rsvp !== 'boolean') {
+    errors.push('allow_free_rsvp must be a boolean');
+  }
+  return errors;
+}
+
+// Departures must point at an existing trip: one distinct over the whole batch
+async function checkTripsExist(db, items, results) {
+  const tripIds = [...new Set(
+    results.filter((result) => result.errors.length === 0).map((result) => items[result.index].trip_id)
+  )];
+  if (tripIds.length === 0) {
+    return;
+  }
+  const known = new Set(await db.collection('trips').distinct('id', { id: { $in: tripIds } }));
+  for (const result of results) {
+    if (result.errors.length === 0 && !known.has(items[result.index].trip_id)) {
+      result.errors.push('trip_id does not match a trip');
+    }
+  }
+}
+
+export const BULK_KINDS = {
+  trips: { collection: 'trips', validate: validateTrip, build: buildTrip },
+  departures: {
+    collection: 'departures',
+    validate: validateDeparture,
+    build: buildDeparture,
+    checkReferences: checkTripsExist
+  }
+};
+
+export function parseBulkRequest(body) {
+  const { items, ordered = true } = isObject(body) ? body : {};
+  if (!Array.isArray(items) || items.length === 0 || items.length > MAX_BULK_ITEMS ||
+      typeof ordered !== 'boolean') {
+    throw new Error('Invalid bulk request');
+  }
+  return { items, ordered };
+}
+
+export async function bulkInsert(db, kind, { items, ordered }) {
+  const spec = BULK_KINDS[kind];
+  const results = items.map((item, index) => ({ index, errors: spec.validate(item) }));
+  await spec.checkReferences?.(db, items, results);
+
+  const firstInvalid = ordered ? results.findIndex((result) => result.errors.length > 0) : -1;
+  const writable = results.filter((result) =>
+    result.errors.length === 0 && (firstInvalid === -1 || result.index < firstInvalid));
+  const docs = writable.map((result) => spec.build(items[result.index]));
+
+  // Driver write errors are indexed by operation, i.e. by position in `writable`
+  const writeErrors = new Map();
+  if (docs.length > 0) {
+    try {
+      await db.collection(spec.collection).bulkWrite(
+        docs.map((document) => ({ insertOne: { document } })),
+        { ordered }
+      );
+    } catch (error) {
+      if (!error.writeErrors) {
+        throw error;
+      }
+      for (const writeError of [].concat(error.writeErrors)) {
+        writeErrors.set(writeError.index, writeError);
+      }
+    }
+  }
+  const firstFailedWrite = ordered && writeErrors.size > 0 ? Math.min(...writeErrors.keys()) : Infinity;
+
+  const written = new Map(writable.map((result, op) => [result.index, op]));
+  const itemResults = results.map(({ index, errors }) => {
+    if (errors.length > 0) {
+      return { index, status: 'invalid', errors };
+    }
+    const op = written.get(index);
+    if (op === undefined || op > firstFailedWrite) {
+      return { index, status: 'skipped' };
+    }
+    if (writeErrors.has(op)) {
+      const { code, errmsg } = writeErrors.get(op);
+      return { index, status: 'failed', errors: [code === 11000 ? 'id already exists' : errmsg] };
+    }
+    return { index, status: 'created', id: docs[op].id };
+  });
+
+  const count = (status) => itemResults.filter((result) => result.status === status).length;
+  return {
+    ordered,
+    created: count('created'),
+    invalid: count('invalid'),
+    failed: count('failed'),
+    skipped: count('skipped'),
+    results: itemResults
+  };
+}
@@ -0,0 +1,110 @@
+import { createHash } from 'crypto';
+import { NextResponse } from 'next/server';
+import { timePhaseSync } from './timing';
+
+// Small in-process TTL + LRU cache. A Map keeps insertion order, so re-inserting
+// on every hit keeps the least recently used entry first in line for eviction.
+export class TTLCache {
+  constructor({ max = 500, ttl = 60 * 1000 } = {}) {
+    this.max = max;
+    this.ttl = ttl;
+    this.entries = new Map();
+    this.generation = 0;
+    this.hits = 0;
+    this.misses = 0;
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      this.misses++;
+      return undefined;
+    }
+    if (entry.expires <= Date.now()) {
+      this.entries.delete(key);
+      this.misses++;
+      return undefined;
+    }
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.hits++;
+    return entry.value;
+  }
+
+  // `generation` is the value read before computing `value`; if the cache was
+  // cleared in the meantime the result may be stale and is not stored
+  set(key, value, generation = this.generation) {
+    if (generation !== this.generation) {
+      return;
+    }
+    this.entries.delete(key);
+    this.entries.set(key, { value, expires: Date.now() + this.ttl });
+    while (this.entries.size > this.max) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  clear() {
+    this.generation++;
+    this.entries.clear();
+  }
+
+  stats() {
+    return { size: this.entries.size, hits: this.hits, misses: this.misses };
+  }
+}
+
+// Public trip catalog responses. Entries are per process, so with several
+// instances a write is only visible everywhere once the TTL has elapsed.
+export const catalogCache = new TTLCache({
+  max: parseInt(process.env.CATALOG_CACHE_MAX || '500', 10),
+  ttl: parseInt(process.env.CATALOG_CACHE_TTL_MS || '60000', 10)
+});
+
+export function invalidateCatalog() {
+  catalogCache.clear();
+}
+
+function etagFor(body) {
+  return `W/"${createHash('sha1').update(body).digest('base64url')}"`;
+}
+
+function matchesEtag(request, etag) {
+  const header = request.headers.get('if-none-match');
+  return Boolean(header) && header.split(',').some((tag) => tag.trim() === etag || tag.trim() === '*');
+}
+
+// Serves a JSON GET from `cache`, keyed by path and query string. `compute` returns
+// the payload to cache, or a Response (e.g. a 404) which is passed through uncached.
+export async function cachedJson(request, cache, compute) {
+  const url = new URL(request.url);
+  const key = url.pathname + url.search;
+
+  let entry = cache.get(key);
+  const status = entry ? 'HIT' : 'MISS';
+  if (!entry) {
+    const generation = cache.generation;
+    const data = await compute();
+    if (data instanceof Response) {
+      return data;
+    }
+    const body = timePhaseSync('serialize', () => JSON.stringify(data));
+    entry = { body, etag: etagFor(body) };
+    cache.set(key, entry, generation);
+  }
+
+  const headers = {
+    ETag: entry.etag,
+    'Cache-Control': 'public, max-age=0, must-revalidate',
+    'X-Cache': status
+  };
+
+  if (matchesEtag(request, entry.etag)) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+
+  return new NextResponse(entry.body, {
+    status: 200,
+    headers: { ...headers, 'Content-Type': 'application/json' }
+  });
+}
@@ -0,0 +1,86 @@
+import { createHash } from 'crypto';
+import { createWriteStream } from 'fs';
+import { performance } from 'perf_hooks';
+import { SESSION_COOKIE, verifySessionToken } from './auth';
+
+// Opt-in traffic capture for replay.py. With REQUEST_CAPTURE_PATH set, every API request
+// appends one JSON line:
+//
+//   {"ts":1760000000000,"method":"POST","path":"/api/bookings","body":{...},
+//    "session":"3f2a9c1e","role":"user","status":200,"duration_ms":12.4}
+//
+// `session` is a hash of the session id, never the cookie itself, so a capture can be
+// shared without handing out live sessions. Request bodies are captured as sent.
+
+const CAPTURE_PATH = process.env.REQUEST_CAPTURE_PATH;
+
+// One append stream per process (see db.js for why this lives on globalThis)
+const shared = globalThis.__travelwithdencheCapture ??= { stream: null };
+
+function captureStream() {
+  if (!shared.stream) {
+    shared.stream = createWriteStream(CAPTURE_PATH, { flags: 'a' });
+    shared.stream.on('error', (error) => console.error('Request capture error:', error));
+  }
+  return shared.stream;
+}
+
+function sessionOf(request) {
+  const value = request.cookies.get(SESSION_COOKIE)?.value;
+  if (!value) {
+    return { session: null, role: 'anonymous' };
+  }
+
+  let key = value;
+  let role = 'unknown';
+  try {
+    // Same rule as getCurrentUser: only a signed session's claims are believed
+    const claims = verifySessionToken(value);
+    if (claims) {
+      key = claims.sid;
+      role = claims.role;
+    }
+  } catch {
+    // Unparseable cookies are still grouped by their hash
+  }
+  return { session: createHash('sha256').update(key).digest('hex').slice(0, 16), role };
+}
+
+async function bodyOf(copy) {
+  const text = copy ? await copy.text() : '';
+  if (!text) {
+    return undefined;
+  }
+  try {
+    return JSON.parse(text);
+  } catch {
+    return text;
+  }
+}
+
+export async function withCapture(request, handler) {
+  if (!CAPTURE_PATH) {
+    return handler();
+  }
+
+  const ts = Date.now();
+  const start = performance.now();
+  // Cloned up front: the handler consumes the original body
+  const copy = ['GET', 'HEAD'].includes(request.method) ? null : request.clone();
+  const response = await handler();
+  const duration = performance.now() - start;
+  const body = await bodyOf(copy).catch(() => undefined);
+  const url = new URL(request.url);
+
+  captureStream().write(JSON.stringify({
+    ts,
+    method: request.method,
+    path: url.pathname + url.search,
+    body,
+    ...sessionOf(request),
+    status: response.status,
+    duration_ms: Math.round(duration * 10) / 10
+  }) + '\n');
+
+  return response;
+}
@@ -1,32 +1,82 @@
 import { MongoClient } from 'mongodb';
+import { ensureIndexes } from './indexes';
+import { monitorCommands, untracked } from './timing';
+import { monitorPool } from './metrics';
 
 const uri = process.env.MONGO_URL || 'mongodb://localhost:27017';
 const dbName = process.env.DB_NAME || 'travelwithdenche';
 
-let client;
-let db;
+function intEnv(name, fallback) {
+  const value = parseInt(process.env[name] || '', 10);
+  return Number.isNaN(value) ? fallback : value;
+}
+
+export const POOL_OPTIONS = {
+  maxPoolSize: intEnv('MONGO_MAX_POOL_SIZE', 100),
+  // Kept open (and opened by warmUpDatabase) so the first burst doesn't pay for handshakes
+  minPoolSize: intEnv('MONGO_MIN_POOL_SIZE', 10),
+  maxIdleTimeMS: intEnv('MONGO_MAX_IDLE_TIME_MS', 60000),
+  // Fail a request instead of queueing it forever when the pool is exhausted
+  waitQueueTimeoutMS: intEnv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 10000)
+};
+
+// One client per process. Kept on globalThis because instrumentation.js and the route
+// handlers are bundled separately (and dev reloads re-evaluate this module).
+const state = globalThis.__travelwithdencheMongo ??= { promise: null, client: null, db: null };
+
+async function connect() {
+  // Command monitoring feeds the per-request Server-Timing header
+  const client = new MongoClient(uri, { ...POOL_OPTIONS, monitorCommands: true });
+  monitorCommands(client);
+  monitorPool(client);
+  await client.connect();
+  const db = client.db(dbName);
+
+  console.log('Connected to MongoDB');
 
-export async function connectToDatabase() {
-  if (db) {
-    return { client, db };
+  if (process.env.MONGO_ENSURE_INDEXES !== 'false') {
+    try {
+      // Not charged to whichever request happened to open the connection
+      await untracked(() => ensureIndexes(db));
+    } catch (error) {
+      // Serving without an index is slow but still correct, so don't fail the request
+      console.error('Failed to ensure MongoDB indexes', error);
+    }
   }
 
-  try {
-    client = new MongoClient(uri);
-    await client.connect();
-    db = client.db(dbName);
-    
-    console.log('Connected to MongoDB');
-    return { client, db };
-  } catch (error) {
-    console.error('Failed to connect to MongoDB', error);
-    throw error;
+  state.client = client;
+  state.db = db;
+  return { client, db };
+}
+
+// Single flight: concurrent first callers all await the same connect()
+export function connectToDatabase() {
+  if (!state.promise) {
+    state.promise = connect().catch((error) => {
+      console.error('Failed to connect to MongoDB', error);
+      // Don't cache the failure; the next caller retries
+      state.promise = null;
+      throw error;
+    });
   }
+  return state.promise;
 }
 
 export async function getDatabase() {
-  if (!db) {
-    await connectToDatabase();
+  if (state.db) {
+    return state.db;
   }
+  const { db } = await connectToDatabase();
   return db;
-}
\ No newline at end of file
+}
+
+// Connects, ensures indexes and opens `minPoolSize` connections before traffic arrives
+export async function warmUpDatabase() {
+  const start = Date.now();
+  const { db } = await connectToDatabase();
+  // Concurrent pings force the pool to open that many connections
+  await untracked(() => Promise.all(
+    Array.from({ length: POOL_OPTIONS.minPoolSize }, () => db.command({ ping: 1 }))
+  ));
+  console.log(`MongoDB pool warmed: ${POOL_OPTIONS.minPoolSize} connections in ${Date.now() - start}ms`);
+}
@@ -0,0 +1,164 @@
+import { recordError } from './metrics';
+import { parseDate } from './search';
+
+// Streaming admin exports. Rows are read from a MongoDB cursor and written to the
+// response as they arrive, one chunk per pull, so memory stays flat however many
+// rows match. A client that stops reading pauses the cursor; one that disconnects
+// closes it.
+//
+//   format     `ndjson` (default) or `csv`
+//   from, to   created_at range (ISO dates, inclusive)
+
+const CHUNK_ROWS = 1000;
+
+export const EXPORTS = {
+  bookings: {
+    collection: 'bookings',
+    columns: [
+      'id', 'user_id', 'trip_id', 'trip_title', 'departure_id', 'departure_start_date', 'seats',
+      'status', 'total_price_cents', 'deposit_paid_cents', 'balance_due_cents', 'created_at', 'updated_at'
+    ],
+    // Only the joined fields the export needs, not the whole trip/departure documents
+    lookups: [
+      {
+        $lookup: {
+          from: 'trips',
+          localField: 'trip_id',
+          foreignField: 'id',
+          pipeline: [{ $project: { _id: 0, title: 1 } }],
+          as: 'trip'
+        }
+      },
+      {
+        $lookup: {
+          from: 'departures',
+          localField: 'departure_id',
+          foreignField: 'id',
+          pipeline: [{ $project: { _id: 0, start_date: 1 } }],
+          as: 'departure'
+        }
+      }
+    ],
+    computed: {
+      trip_title: { $first: '$trip.title' },
+      departure_start_date: { $first: '$departure.start_date' }
+    }
+  },
+  payments: {
+    collection: 'payments',
+    columns: [
+      'id', 'booking_id', 'type', 'amount_cents', 'currency', 'stripe_payment_intent_id', 'status', 'created_at'
+    ],
+    lookups: [],
+    computed: {}
+  }
+};
+
+const FORMATS = {
+  ndjson: { contentType: 'application/x-ndjson', extension: 'ndjson' },
+  csv: { contentType: 'text/csv; charset=utf-8', extension: 'csv' }
+};
+
+export function parseExportParams(request) {
+  const params = new URL(request.url).searchParams;
+  const format = params.get('format') || 'ndjson';
+  if (!FORMATS[format]) {
+    throw new Error('Invalid filters');
+  }
+
+  const match = {};
+  if (params.get('from') || params.get('to')) {
+    match.created_at = {};
+    if (params.get('from')) {
+      match.created_at.$gte = parseDate(params.get('from'));
+    }
+    if (params.get('to')) {
+      match.created_at.$lte = parseDate(params.get('to'));
+    }
+  }
+
+  return { format, match };
+}
+
+export function exportPipeline(spec, match) {
+  const projection = { _id: 0 };
+  for (const column of spec.columns) {
+    projection[column] = spec.computed[column] ?? 1;
+  }
+  return [
+    { $match: match },
+    // Served by the { created_at: -1, id: -1 } index, walked backwards
+    { $sort: { created_at: 1, id: 1 } },
+    ...spec.lookups,
+    { $project: projection }
+  ];
+}
+
+function csvValue(value) {
+  if (value === null || value === undefined) {
+    return '';
+  }
+  const text = value instanceof Date ? value.toISOString() : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+function csvLine(values) {
+  return values.map(csvValue).join(',') + '\r\n';
+}
+
+export function streamCursor(cursor, format, columns) {
+  const encoder = new TextEncoder();
+  let header = format === 'csv' ? csvLine(columns) : '';
+
+  return new ReadableStream({
+    async pull(controller) {
+      try {
+        let chunk = header;
+        header = '';
+        let done = false;
+        for (let i = 0; i < CHUNK_ROWS; i++) {
+          const row = await cursor.next();
+          if (!row) {
+            done = true;
+            break;
+          }
+          chunk += format === 'csv'
+            ? csvLine(columns.map((column) => row[column]))
+            : JSON.stringify(row) + '\n';
+        }
+        if (chunk) {
+          controller.enqueue(encoder.encode(chunk));
+        }
+        if (done) {
+          controller.close();
+          await cursor.close();
+        }
+      } catch (error) {
+        recordError();
+        console.error('Export stream error:', error);
+        controller.error(error);
+        await cursor.close();
+      }
+    },
+    async cancel() {
+      await cursor.close();
+    }
+  });
+}
+
+export function exportResponse(db, kind, request) {
+  const spec = EXPORTS[kind];
+  const { format, match } = parseExportParams(request);
+  const cursor = db.collection(spec.collection)
+    .aggregate(exportPipeline(spec, match), { batchSize: CHUNK_ROWS });
+
+  const { contentType, extension } = FORMATS[format];
+  const filename = `${kind}-${new Date().toISOString().slice(0, 10)}.${extension}`;
+  return new Response(streamCursor(cursor, format, spec.columns), {
+    headers: {
+      'Content-Type': contentType,
+      'Content-Disposition': `attachment; filename="${filename}"`,
+      'Cache-Control': 'no-store'
+    }
+  });
+}
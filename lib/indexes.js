@@ -0,0 +1,112 @@
+// Index definitions for every query shape the API runs.
+// createIndexes is a no-op for indexes that already exist, so this is safe to run on every boot.
+
+export const INDEXES = {
+  users: [
+    { key: { email: 1 }, unique: true },
+    { key: { id: 1 } }
+  ],
+  trips: [
+    { key: { id: 1 }, unique: true },
+    { key: { slug: 1, active: 1 } },
+    // Public catalog: active trips, featured first, newest first
+    { key: { active: 1, featured: -1, created_at: -1, id: -1 } },
+    { key: { active: 1, difficulty: 1, featured: -1, created_at: -1, id: -1 } },
+    // Catalog search (`q`)
+    {
+      key: { title: 'text', subtitle: 'text', meeting_point: 'text' },
+      weights: { title: 10, subtitle: 5, meeting_point: 2 },
+      name: 'trips_text_search'
+    },
+    // Admin catalog pagination
+    { key: { created_at: -1, id: -1 } }
+  ],
+  departures: [
+    { key: { id: 1 }, unique: true },
+    { key: { trip_id: 1, start_date: 1 } },
+    // Upcoming departures and catalog date/price filters (covers distinct('trip_id'))
+    { key: { start_date: 1, base_price_cents: 1, trip_id: 1 } }
+  ],
+  trip_images: [
+    { key: { trip_id: 1, sort_order: 1 } }
+  ],
+  bookings: [
+    { key: { id: 1 }, unique: true },
+    { key: { user_id: 1, created_at: -1, id: -1 } },
+    { key: { created_at: -1, id: -1 } },
+    // Bookings of one departure, newest first (GET /api/bookings?departure_id=)
+    { key: { departure_id: 1, created_at: -1, id: -1 } }
+  ],
+  payments: [
+    { key: { id: 1 }, unique: true },
+    { key: { stripe_payment_intent_id: 1 } },
+    { key: { booking_id: 1 } },
+    // Admin export by created_at range
+    { key: { created_at: -1, id: -1 } },
+    // Webhook idempotency: one ledger row per `<type>:<payment_intent>`
+    {
+      key: { idempotency_key: 1 },
+      unique: true,
+      partialFilterExpression: { idempotency_key: { $exists: true } }
+    }
+  ],
+  // Logged-out sessions and role changes (see lib/auth.js)
+  session_revocations: [
+    { key: { sid: 1 }, partialFilterExpression: { sid: { $exists: true } } },
+    { key: { email: 1, revoked_at: 1 }, partialFilterExpression: { email: { $exists: true } } },
+    { key: { expires_at: 1 }, expireAfterSeconds: 0 }
+  ],
+  webhook_events: [
+    { key: { status: 1, received_at: 1 } },
+    { key: { status: 1, claimed_at: 1 } }
+  ]
+};
+
+// Trips written before buildTrip stored `featured` as a boolean may lack it or hold
+// something else. The catalog sorts on the stored value, so give those `false`; once
+// every trip has been normalized this matches nothing.
+export async function normalizeTrips(db) {
+  await db.collection('trips').updateMany(
+    { featured: { $nin: [true, false] } },
+    { $set: { featured: false } }
+  );
+}
+
+// Data fixes a collection needs before its indexes are built
+const BEFORE_INDEXES = {
+  trips: normalizeTrips
+};
+
+function indexError(collection, error) {
+  if (error.code === 11000) {
+    // Existing documents break a unique index; which ones to keep is a data decision,
+    // so nothing is deleted here (see "Index Verification" in README.md)
+    return new Error(
+      `${collection}: existing documents have duplicate values for a unique index; ` +
+      `resolve them and restart (${error.message})`,
+      { cause: error }
+    );
+  }
+  return new Error(`${collection}: ${error.message}`, { cause: error });
+}
+
+// Collections are handled independently, so one failing index (e.g. a unique index
+// over existing duplicates) doesn't keep the others from being built. Every failure
+// is reported together in one AggregateError.
+export async function ensureIndexes(db) {
+  const collections = Object.keys(INDEXES);
+  const results = await Promise.allSettled(collections.map(async (collection) => {
+    await BEFORE_INDEXES[collection]?.(db);
+    await db.collection(collection).createIndexes(INDEXES[collection]);
+  }));
+
+  const errors = results
+    .map((result, i) => result.status === 'rejected' && indexError(collections[i], result.reason))
+    .filter(Boolean);
+  if (errors.length > 0) {
+    throw new AggregateError(
+      errors,
+      `Failed to ensure indexes on ${errors.length} of ${collections.length} collections`
+    );
+  }
+}
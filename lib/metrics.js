@@ -0,0 +1,89 @@
+import { readdirSync } from 'fs';
+import { monitorEventLoopDelay } from 'perf_hooks';
+
+// Process health for long-running soak tests, served at GET /api/admin/metrics.
+// Everything here is read from process state and counters, so sampling the endpoint
+// issues no MongoDB commands of its own. `server_errors` counts failures reported with
+// recordError() from the API's own error paths (500 responses, the webhook worker and
+// export streams); runaway errors show up as a climbing count between samples.
+//
+// Event-loop lag is the histogram since the previous read: each read resets it, so a
+// sampler polling at a fixed interval gets one independent window per sample.
+
+const LOOP_RESOLUTION_MS = 10;
+
+// One set of counters per process (see db.js for why this lives on globalThis)
+const shared = globalThis.__travelwithdencheMetrics ??= {
+  loopDelay: null,
+  pool: { open: 0, created: 0, closed: 0, checked_out: 0 },
+  serverErrors: 0
+};
+
+if (!shared.loopDelay) {
+  shared.loopDelay = monitorEventLoopDelay({ resolution: LOOP_RESOLUTION_MS });
+  shared.loopDelay.enable();
+}
+
+export function recordError() {
+  shared.serverErrors++;
+}
+
+// Connection pool events are emitted by every MongoClient; no extra option needed
+export function monitorPool(client) {
+  const { pool } = shared;
+  client.on('connectionCreated', () => {
+    pool.open++;
+    pool.created++;
+  });
+  client.on('connectionClosed', () => {
+    pool.open--;
+    pool.closed++;
+  });
+  client.on('connectionCheckedOut', () => {
+    pool.checked_out++;
+  });
+  client.on('connectionCheckedIn', () => {
+    pool.checked_out--;
+  });
+}
+
+function openFileDescriptors() {
+  try {
+    // Minus the descriptor readdir itself holds open on the directory
+    return readdirSync('/proc/self/fd').length - 1;
+  } catch {
+    // Not Linux
+    return null;
+  }
+}
+
+const mb = (bytes) => Math.round(bytes / 1024 / 1024 * 10) / 10;
+// The sampling timer's own interval is included in every delay, so report only the excess
+const lag = (ns) => Math.max(0, Math.round((ns / 1e6 - LOOP_RESOLUTION_MS) * 100) / 100);
+
+export function processMetrics() {
+  const memory = process.memoryUsage();
+  const delay = shared.loopDelay;
+  const eventLoop = {
+    mean_ms: lag(delay.mean || 0),
+    p50_ms: lag(delay.percentile(50)),
+    p99_ms: lag(delay.percentile(99)),
+    max_ms: lag(delay.max)
+  };
+  delay.reset();
+
+  return {
+    pid: process.pid,
+    uptime_s: Math.round(process.uptime()),
+    memory: {
+      rss_mb: mb(memory.rss),
+      heap_used_mb: mb(memory.heapUsed),
+      heap_total_mb: mb(memory.heapTotal),
+      external_mb: mb(memory.external)
+    },
+    open_fds: openFileDescriptors(),
+    event_loop: eventLoop,
+    mongo_pool: { ...shared.pool },
+    server_errors: shared.serverErrors
+  };
+}
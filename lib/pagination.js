@@ -0,0 +1,105 @@
+// Keyset (cursor) pagination and field projection helpers for list endpoints
+
+export const DEFAULT_PAGE_SIZE = 100;
+export const MAX_PAGE_SIZE = 500;
+
+const FIELD_NAME = /^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$/;
+
+function encodeValue(value) {
+  return value instanceof Date ? { d: value.toISOString() } : { v: value };
+}
+
+function decodeValue(value) {
+  return 'd' in value ? new Date(value.d) : value.v;
+}
+
+export function encodeCursor(doc, sort) {
+  const values = Object.keys(sort).map((key) => encodeValue(doc[key] ?? null));
+  return Buffer.from(JSON.stringify(values)).toString('base64url');
+}
+
+export function decodeCursor(token, sort) {
+  try {
+    const values = JSON.parse(Buffer.from(token, 'base64url').toString('utf8'));
+    if (!Array.isArray(values) || values.length !== Object.keys(sort).length) {
+      throw new Error('Invalid cursor');
+    }
+    return values.map(decodeValue);
+  } catch (error) {
+    throw new Error('Invalid cursor');
+  }
+}
+
+// Builds the $match that resumes strictly after `values` in `sort` order:
+// (k1 < v1) OR (k1 = v1 AND k2 < v2) OR ... with the operator following each direction
+function keysetFilter(sort, values) {
+  const keys = Object.keys(sort);
+  const branches = keys.map((key, i) => {
+    const clause = {};
+    for (let j = 0; j < i; j++) {
+      clause[keys[j]] = values[j];
+    }
+    clause[key] = { [sort[key] < 0 ? '$lt' : '$gt']: values[i] };
+    return clause;
+  });
+  return { $or: branches };
+}
+
+// Reads `limit`, `cursor` and `fields` from the request URL.
+// `sort` must end in a unique key (e.g. `id`) so the order is total.
+export function parsePagination(request, sort) {
+  const params = new URL(request.url).searchParams;
+
+  const requested = parseInt(params.get('limit'), 10);
+  const limit = Number.isNaN(requested) ? DEFAULT_PAGE_SIZE : Math.min(Math.max(requested, 1), MAX_PAGE_SIZE);
+
+  const cursor = params.get('cursor');
+  const match = cursor ? keysetFilter(sort, decodeCursor(cursor, sort)) : null;
+
+  let fields = null;
+  if (params.get('fields')) {
+    fields = params.get('fields').split(',').map((field) => field.trim()).filter(Boolean);
+    if (fields.some((field) => !FIELD_NAME.test(field))) {
+      throw new Error('Invalid fields');
+    }
+  }
+
+  return { limit, match, fields, sort };
+}
+
+// Whether a joined/computed field should be built for this request
+export function wantsField(page, field) {
+  return !page.fields || page.fields.includes(field);
+}
+
+// Pipeline stages for one page: keyset match, sort, limit (+1 to detect a next page),
+// any joins from `lookups` (run on the page only), then the optional projection
+export function pageStages(page, lookups = []) {
+  const stages = [];
+  if (page.match) {
+    stages.push({ $match: page.match });
+  }
+  stages.push({ $sort: page.sort }, { $limit: page.limit + 1 }, ...lookups);
+
+  if (page.fields) {
+    const projection = { _id: 0 };
+    for (const key of Object.keys(page.sort)) {
+      projection[key] = 1;
+    }
+    for (const field of page.fields) {
+      projection[field] = 1;
+    }
+    stages.push({ $project: projection });
+  }
+  return stages;
+}
+
+// Trims the extra look-ahead row and returns `{ items, next_cursor }`
+export function pageResult(page, docs) {
+  const hasMore = docs.length > page.limit;
+  const items = hasMore ? docs.slice(0, page.limit) : docs;
+  return {
+    items,
+    next_cursor: hasMore ? encodeCursor(items[items.length - 1], page.sort) : null
+  };
+}
@@ -1,5 +1,5 @@
 import { v4 as uuidv4 } from 'uuid';
-import { getDatabase } from './db';
+import { enqueueWebhookEvent, parseWebhookEvent } from './webhooks';
 
 export class MockPaymentProvider {
   static async createCheckoutSession({ amount, currency = 'EUR', metadata = {} }) {
@@ -46,86 +46,11 @@ export class MockPaymentProvider {
   }
 
   static async processWebhook(payload, signature) {
-    // Mock webhook processing
-    const event = JSON.parse(payload);
-    
-    if (event.type === 'checkout.session.completed') {
-      const session = event.data.object;
-      await this.handleCheckoutCompleted(session);
-    } else if (event.type === 'charge.refunded') {
-      const charge = event.data.object;
-      await this.handleRefund(charge);
-    }
-
-    return { received: true };
-  }
-
-  static async handleCheckoutCompleted(session) {
-    const db = await getDatabase();
-    
-    // Update booking status
-    if (session.metadata.booking_id) {
-      const bookingId = session.metadata.booking_id;
-      const paymentType = session.metadata.type || 'deposit';
-      
-      await db.collection('bookings').updateOne(
-        { id: bookingId },
-        {
-          $set: {
-            stripe_checkout_session_id: session.id,
-            stripe_payment_intent_id: session.payment_intent,
-            status: paymentType === 'deposit' ? 'reserved_deposit_paid' : 'paid_in_full',
-            updated_at: new Date()
-          }
-        }
-      );
-
-      // Create payment record
-      await db.collection('payments').insertOne({
-        id: uuidv4(),
-        booking_id: bookingId,
-        type: paymentType,
-        amount_cents: session.amount_total,
-        currency: session.currency.toUpperCase(),
-        stripe_payment_intent_id: session.payment_intent,
-        status: 'succeeded',
-        created_at: new Date()
-      });
-    }
-  }
-
-  static async handleRefund(charge) {
-    const db = await getDatabase();
-    
-    // Find the original payment
-    const payment = await db.collection('payments').findOne({
-      stripe_payment_intent_id: charge.payment_intent
-    });
-
-    if (payment) {
-      // Create refund record
-      await db.collection('payments').insertOne({
-        id: uuidv4(),
-        booking_id: payment.booking_id,
-        type: 'refund',
-        amount_cents: -charge.amount_refunded,
-        currency: charge.currency.toUpperCase(),
-        stripe_payment_intent_id: charge.payment_intent,
-        status: 'succeeded',
-        created_at: new Date()
-      });
+    // Mock webhook processing: events are queued and applied by the webhook worker
+    const event = parseWebhookEvent(payload);
+    const queued = await enqueueWebhookEvent(event, payload);
 
-      // Update booking status
-      await db.collection('bookings').updateOne(
-        { id: payment.booking_id },
-        {
-          $set: {
-            status: 'refunded',
-            updated_at: new Date()
-          }
-        }
-      );
-    }
+    return { received: true, duplicate: !queued };
   }
 }
 
@@ -0,0 +1,72 @@
+// Parses trip catalog search parameters into MongoDB filters.
+//
+//   q            full-text search over title, subtitle and meeting point (text index)
+//   difficulty   exact difficulty, e.g. `moderate`
+//   featured     `true` to only return featured trips
+//   from, to     departure start date range (ISO dates, inclusive)
+//   min_price,
+//   max_price    departure base price range in cents (inclusive)
+//
+// Date and price filters apply to departures: a trip matches when at least one of
+// its departures does, and only the matching departures are returned with it.
+
+export function parseDate(value) {
+  const date = new Date(value);
+  if (Number.isNaN(date.getTime())) {
+    throw new Error('Invalid filters');
+  }
+  return date;
+}
+
+function parseCents(value) {
+  const cents = Number(value);
+  if (!Number.isInteger(cents) || cents < 0) {
+    throw new Error('Invalid filters');
+  }
+  return cents;
+}
+
+export function parseTripFilters(request) {
+  const params = new URL(request.url).searchParams;
+  const tripMatch = { active: true };
+  const departureMatch = {};
+
+  const q = params.get('q')?.trim();
+  if (q) {
+    tripMatch.$text = { $search: q };
+  }
+
+  const difficulty = params.get('difficulty');
+  if (difficulty && difficulty !== 'all') {
+    tripMatch.difficulty = difficulty;
+  }
+
+  if (params.get('featured') === 'true') {
+    tripMatch.featured = true;
+  }
+
+  if (params.get('from') || params.get('to')) {
+    departureMatch.start_date = {};
+    if (params.get('from')) {
+      departureMatch.start_date.$gte = parseDate(params.get('from'));
+    }
+    if (params.get('to')) {
+      departureMatch.start_date.$lte = parseDate(params.get('to'));
+    }
+  }
+
+  if (params.get('min_price') || params.get('max_price')) {
+    departureMatch.base_price_cents = {};
+    if (params.get('min_price')) {
+      departureMatch.base_price_cents.$gte = parseCents(params.get('min_price'));
+    }
+    if (params.get('max_price')) {
+      departureMatch.base_price_cents.$lte = parseCents(params.get('max_price'));
+    }
+  }
+
+  return {
+    tripMatch,
+    departureMatch: Object.keys(departureMatch).length ? departureMatch : null
+  };
+}
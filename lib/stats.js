@@ -0,0 +1,54 @@
+// Pre-aggregated dashboard counters, kept in a single document and updated
+// incrementally by the bookings handler and the payments webhook.
+
+const STATS_COLLECTION = 'dashboard_stats';
+const STATS_ID = 'global';
+
+// Full scan of bookings/payments. Used to build the counters document on first read and
+// by the webhook worker to reconcile revenue after taking over a crashed worker's batch.
+export async function rebuildDashboardStats(db) {
+  const [totalBookings, revenue] = await Promise.all([
+    db.collection('bookings').countDocuments(),
+    db.collection('payments').aggregate([
+      { $match: { status: 'succeeded', type: { $ne: 'refund' } } },
+      { $group: { _id: null, total: { $sum: '$amount_cents' } } }
+    ]).toArray()
+  ]);
+
+  const stats = {
+    total_bookings: totalBookings,
+    total_revenue_cents: revenue[0]?.total || 0,
+    rebuilt_at: new Date(),
+    updated_at: new Date()
+  };
+
+  await db.collection(STATS_COLLECTION).updateOne(
+    { _id: STATS_ID },
+    { $set: stats },
+    { upsert: true }
+  );
+
+  return stats;
+}
+
+export async function getDashboardStats(db) {
+  const stats = await db.collection(STATS_COLLECTION).findOne({ _id: STATS_ID });
+  return stats || rebuildDashboardStats(db);
+}
+
+// Increments are skipped (not upserted) while the document does not exist yet:
+// the next read rebuilds it from scratch, which already includes this change.
+async function incrementStats(db, inc) {
+  await db.collection(STATS_COLLECTION).updateOne(
+    { _id: STATS_ID },
+    { $inc: inc, $set: { updated_at: new Date() } }
+  );
+}
+
+export async function recordBookingCreated(db, count = 1) {
+  await incrementStats(db, { total_bookings: count });
+}
+
+export async function recordRevenue(db, amountCents) {
+  await incrementStats(db, { total_revenue_cents: amountCents });
+}
@@ -0,0 +1,130 @@
+import { AsyncLocalStorage } from 'async_hooks';
+import { performance } from 'perf_hooks';
+import { NextResponse } from 'next/server';
+
+// Per-request instrumentation reported in the `Server-Timing` response header:
+//
+//   auth;dur=0.3, db;dur=4.1;desc="3 commands", serialize;dur=0.2, total;dur=6.0
+//
+// `db` is the summed duration of the MongoDB commands the request issued, counted
+// through the driver's command monitoring events. Commands are attributed to a request
+// by the async context that started them, so work done outside a request (index
+// builds, the webhook worker) must run inside `untracked`.
+//
+// Set SLOW_REQUEST_MS to log one JSON line for every request slower than that.
+
+const SLOW_REQUEST_MS = parseFloat(process.env.SLOW_REQUEST_MS || '0');
+const IGNORED_COMMANDS = new Set(['hello', 'isMaster', 'ismaster', 'ping', 'endSessions']);
+
+// Shared through globalThis like the Mongo client in db.js: the client may be created by
+// the instrumentation bundle while requests run in the route bundle
+const shared = globalThis.__travelwithdencheTiming ??= {
+  requestContext: new AsyncLocalStorage(),
+  // Driver requestId -> timing of the request that started the command
+  inflightCommands: new Map()
+};
+const { requestContext, inflightCommands } = shared;
+
+export function monitorCommands(client) {
+  client.on('commandStarted', (event) => {
+    const timing = requestContext.getStore();
+    if (!timing || IGNORED_COMMANDS.has(event.commandName)) {
+      return;
+    }
+    timing.commands[event.commandName] = (timing.commands[event.commandName] || 0) + 1;
+    inflightCommands.set(event.requestId, timing);
+  });
+
+  const finished = (event) => {
+    const timing = inflightCommands.get(event.requestId);
+    if (timing) {
+      inflightCommands.delete(event.requestId);
+      timing.dbMs += event.duration;
+    }
+  };
+  client.on('commandSucceeded', finished);
+  client.on('commandFailed', finished);
+}
+
+export function untracked(fn) {
+  return requestContext.exit(fn);
+}
+
+function addPhase(timing, name, ms) {
+  timing.phases[name] = (timing.phases[name] || 0) + ms;
+}
+
+export async function timePhase(name, fn) {
+  const timing = requestContext.getStore();
+  if (!timing) {
+    return fn();
+  }
+  const start = performance.now();
+  try {
+    return await fn();
+  } finally {
+    addPhase(timing, name, performance.now() - start);
+  }
+}
+
+export function timePhaseSync(name, fn) {
+  const timing = requestContext.getStore();
+  if (!timing) {
+    return fn();
+  }
+  const start = performance.now();
+  try {
+    return fn();
+  } finally {
+    addPhase(timing, name, performance.now() - start);
+  }
+}
+
+// NextResponse.json with the JSON.stringify time recorded as the `serialize` phase
+export function jsonResponse(data, init = {}) {
+  const body = timePhaseSync('serialize', () => JSON.stringify(data));
+  const headers = new Headers(init.headers);
+  if (!headers.has('Content-Type')) {
+    headers.set('Content-Type', 'application/json');
+  }
+  return new NextResponse(body, { ...init, headers });
+}
+
+function commandCount(timing) {
+  return Object.values(timing.commands).reduce((sum, n) => sum + n, 0);
+}
+
+function serverTimingHeader(timing, totalMs) {
+  const metrics = Object.entries(timing.phases).map(([name, ms]) => `${name};dur=${ms.toFixed(1)}`);
+  metrics.push(`db;dur=${timing.dbMs.toFixed(1)};desc="${commandCount(timing)} commands"`);
+  metrics.push(`total;dur=${totalMs.toFixed(1)}`);
+  return metrics.join(', ');
+}
+
+export async function withServerTiming(request, handler) {
+  const timing = { start: performance.now(), phases: {}, commands: {}, dbMs: 0 };
+
+  return requestContext.run(timing, async () => {
+    const response = await handler();
+    const totalMs = performance.now() - timing.start;
+    response.headers.set('Server-Timing', serverTimingHeader(timing, totalMs));
+
+    if (SLOW_REQUEST_MS > 0 && totalMs >= SLOW_REQUEST_MS) {
+      console.warn(JSON.stringify({
+        slow_request: {
+          method: request.method,
+          path: new URL(request.url).pathname,
+          status: response.status,
+          total_ms: Math.round(totalMs * 10) / 10,
+          db_ms: Math.round(timing.dbMs * 10) / 10,
+          phases: Object.fromEntries(
+            Object.entries(timing.phases).map(([name, ms]) => [name, Math.round(ms * 10) / 10])
+          ),
+          commands: timing.commands
+        }
+      }));
+    }
+
+    return response;
+  });
+}
@@ -0,0 +1,351 @@
+import { createHash } from 'crypto';
+import { v4 as uuidv4 } from 'uuid';
+import { getDatabase } from './db';
+import { recordError } from './metrics';
+import { rebuildDashboardStats, recordRevenue } from './stats';
+import { untracked } from './timing';
+
+// Payment webhook ingestion. The HTTP handler only validates the event and writes it to
+// the `webhook_events` queue; an in-process worker applies queued events to bookings and
+// payments in bulkWrite batches. Payments are keyed by `<type>:<payment_intent>` (refunds
+// additionally by refund), so provider retries and replays never create a second ledger row.
+
+const QUEUE = 'webhook_events';
+const HANDLED_TYPES = ['checkout.session.completed', 'charge.refunded'];
+
+const BATCH_SIZE = parseInt(process.env.WEBHOOK_BATCH_SIZE || '500', 10);
+const POLL_INTERVAL_MS = parseInt(process.env.WEBHOOK_POLL_INTERVAL_MS || '1000', 10);
+const MAX_ATTEMPTS = 10;
+const STALE_CLAIM_MS = 5 * 60 * 1000;
+
+// A charge.refunded event carries the whole charge; its newest refund is listed first.
+// Events without the refund list fall back to the cumulative amount refunded, which
+// still tells successive partial refunds of one charge apart.
+function latestRefund(charge) {
+  return charge.refunds?.data?.[0] || null;
+}
+
+export function ledgerKey(event) {
+  const object = event.data.object;
+  if (event.type === 'charge.refunded') {
+    const refund = latestRefund(object);
+    return `refund:${object.payment_intent}:${refund ? refund.id : object.amount_refunded}`;
+  }
+  return `${object.metadata?.type || 'deposit'}:${object.payment_intent}`;
+}
+
+// Queue id: the provider's event id when present, otherwise a hash of the event body
+function queueId(event, payload) {
+  return event.id || `sha1:${createHash('sha1').update(payload).digest('hex')}`;
+}
+
+export function parseWebhookEvent(payload) {
+  const event = JSON.parse(payload);
+  const object = event?.data?.object;
+  if (typeof event?.type !== 'string' || !object || typeof object !== 'object') {
+    throw new Error('Invalid webhook payload');
+  }
+  if (HANDLED_TYPES.includes(event.type) && !object.payment_intent) {
+    throw new Error('Invalid webhook payload');
+  }
+  return event;
+}
+
+// Durably records the event and returns immediately. Returns false for duplicates.
+export async function enqueueWebhookEvent(event, payload) {
+  if (!HANDLED_TYPES.includes(event.type)) {
+    return false;
+  }
+
+  const db = await getDatabase();
+  try {
+    await db.collection(QUEUE).insertOne({
+      _id: queueId(event, payload),
+      type: event.type,
+      ledger_key: ledgerKey(event),
+      object: event.data.object,
+      status: 'pending',
+      attempts: 0,
+      next_attempt_at: new Date(),
+      received_at: new Date()
+    });
+  } catch (error) {
+    if (error.code === 11000) {
+      return false;
+    }
+    throw error;
+  }
+
+  startWebhookWorker();
+  kickWebhookWorker();
+  return true;
+}
+
+function claimableFilter(now) {
+  return {
+    $or: [
+      { status: 'pending', next_attempt_at: { $lte: now } },
+      { status: 'processing', claimed_at: { $lt: new Date(now.getTime() - STALE_CLAIM_MS) } }
+    ]
+  };
+}
+
+async function claimBatch(db) {
+  const now = new Date();
+  const candidates = await db.collection(QUEUE)
+    .find(claimableFilter(now), { projection: { _id: 1, status: 1 } })
+    .sort({ received_at: 1 })
+    .limit(BATCH_SIZE)
+    .toArray();
+
+  if (candidates.length === 0) {
+    return { events: [], reclaimed: new Set() };
+  }
+  // Still `processing` means a worker claimed these and died part way through
+  const reclaimed = new Set(candidates.filter((c) => c.status === 'processing').map((c) => c._id));
+
+  // Another process may claim some of the same events; only keep what this claim won
+  const claim = uuidv4();
+  await db.collection(QUEUE).updateMany(
+    { _id: { $in: candidates.map((c) => c._id) }, ...claimableFilter(now) },
+    { $set: { status: 'processing', claim, claimed_at: now } }
+  );
+  const events = await db.collection(QUEUE).find({ claim, status: 'processing' }).sort({ received_at: 1 }).toArray();
+  return { events, reclaimed };
+}
+
+function checkoutOps(event) {
+  const session = event.object;
+  const paymentType = session.metadata?.type || 'deposit';
+  const bookingId = session.metadata?.booking_id;
+
+  // Sessions without a booking are acknowledged but have no ledger effect
+  if (!bookingId) {
+    return {};
+  }
+
+  const bookingOp = {
+    updateOne: {
+      // A checkout arriving after the refund must not revive the booking
+      filter: { id: bookingId, status: { $ne: 'refunded' } },
+      update: {
+        $set: {
+          stripe_checkout_session_id: session.id,
+          stripe_payment_intent_id: session.payment_intent,
+          status: paymentType === 'deposit' ? 'reserved_deposit_paid' : 'paid_in_full',
+          updated_at: new Date()
+        }
+      }
+    }
+  };
+
+  const payment = {
+    id: uuidv4(),
+    booking_id: bookingId,
+    type: paymentType,
+    amount_cents: session.amount_total,
+    currency: (session.currency || 'eur').toUpperCase(),
+    stripe_payment_intent_id: session.payment_intent,
+    status: 'succeeded',
+    created_at: new Date()
+  };
+
+  return { bookingOp, payment };
+}
+
+function refundOps(event, original) {
+  const charge = event.object;
+  const bookingOp = {
+    updateOne: {
+      filter: { id: original.booking_id },
+      update: { $set: { status: 'refunded', updated_at: new Date() } }
+    }
+  };
+
+  const payment = {
+    id: uuidv4(),
+    booking_id: original.booking_id,
+    type: 'refund',
+    amount_cents: -(latestRefund(charge)?.amount ?? charge.amount_refunded),
+    currency: (charge.currency || original.currency || 'eur').toUpperCase(),
+    stripe_payment_intent_id: charge.payment_intent,
+    status: 'succeeded',
+    created_at: new Date()
+  };
+
+  return { bookingOp, payment };
+}
+
+// Applies one claimed batch. Returns the number of events taken off the queue.
+//
+// Booking updates and revenue follow only from payment rows this batch actually
+// inserted, so a checkout resent under a new event id changes nothing. A worker that
+// dies after inserting payments but before marking its events done leaves them to be
+// reclaimed; the rows then already exist, so for reclaimed events the booking updates
+// are re-applied (they are idempotent) and revenue is rebuilt from the payments ledger
+// instead of incremented, which keeps the counter exact either way.
+export async function processWebhookBatch(db) {
+  const { events, reclaimed } = await claimBatch(db);
+  if (events.length === 0) {
+    return 0;
+  }
+
+  // Checkouts first, so refunds in the same batch can find their original payment
+  const checkouts = events.filter((e) => e.type === 'checkout.session.completed');
+  const refunds = events.filter((e) => e.type === 'charge.refunded');
+
+  // One entry per ledger row: { key, payment, bookingOp, eventId }
+  const entries = [];
+  const done = [];
+  const retry = [];
+  const batchOriginals = new Map();
+
+  for (const event of checkouts) {
+    const { bookingOp, payment } = checkoutOps(event);
+    if (payment) {
+      entries.push({ key: event.ledger_key, payment, bookingOp, eventId: event._id });
+      batchOriginals.set(payment.stripe_payment_intent_id, payment);
+    }
+    done.push(event._id);
+  }
+
+  if (refunds.length > 0) {
+    const intents = refunds.map((e) => e.object.payment_intent);
+    const originals = await db.collection('payments')
+      .find({ stripe_payment_intent_id: { $in: intents }, type: { $ne: 'refund' } })
+      .toArray();
+    const byIntent = new Map([...batchOriginals, ...originals.map((p) => [p.stripe_payment_intent_id, p])]);
+
+    for (const event of refunds) {
+      const original = byIntent.get(event.object.payment_intent);
+      if (!original) {
+        // The checkout may simply not have been applied yet
+        retry.push(event);
+        continue;
+      }
+      const { bookingOp, payment } = refundOps(event, original);
+      entries.push({ key: event.ledger_key, payment, bookingOp, eventId: event._id });
+      done.push(event._id);
+    }
+  }
+
+  if (entries.length > 0) {
+    // Upsert on the idempotency key: rows that already exist are left untouched
+    let result;
+    try {
+      result = await db.collection('payments').bulkWrite(
+        entries.map(({ key, payment }) => ({
+          updateOne: {
+            filter: { idempotency_key: key },
+            update: { $setOnInsert: { ...payment, idempotency_key: key } },
+            upsert: true
+          }
+        })),
+        { ordered: false }
+      );
+    } catch (error) {
+      // Concurrent upserts of the same key: the other writer's row wins, which is the point
+      if (!error.writeErrors || [].concat(error.writeErrors).some((e) => e.code !== 11000)) {
+        throw error;
+      }
+      result = error.result;
+    }
+
+    const inserted = new Set(Object.keys(result.upsertedIds || {}).map(Number));
+    const applied = entries.filter((entry, index) => inserted.has(index) || reclaimed.has(entry.eventId));
+
+    if (applied.length > 0) {
+      await db.collection('bookings').bulkWrite(applied.map((entry) => entry.bookingOp), { ordered: true });
+    }
+
+    if (reclaimed.size > 0) {
+      // Whether the dead worker got to its revenue increment is unknown: recount
+      await rebuildDashboardStats(db);
+    } else {
+      const revenue = entries
+        .filter((entry, index) => inserted.has(index) && entry.payment.type !== 'refund')
+        .reduce((sum, entry) => sum + entry.payment.amount_cents, 0);
+      if (revenue) {
+        await recordRevenue(db, revenue);
+      }
+    }
+  }
+
+  const queue = db.collection(QUEUE);
+  const now = new Date();
+  const writes = [];
+  if (done.length > 0) {
+    writes.push({
+      updateMany: {
+        filter: { _id: { $in: done } },
+        update: { $set: { status: 'done', processed_at: now }, $unset: { claim: '' } }
+      }
+    });
+  }
+  for (const event of retry) {
+    const attempts = event.attempts + 1;
+    writes.push({
+      updateOne: {
+        filter: { _id: event._id },
+        update: attempts >= MAX_ATTEMPTS
+          ? { $set: { status: 'skipped', attempts, processed_at: now }, $unset: { claim: '' } }
+          : {
+            $set: { status: 'pending', attempts, next_attempt_at: new Date(now.getTime() + attempts * 1000) },
+            $unset: { claim: '' }
+          }
+      }
+    });
+  }
+  await queue.bulkWrite(writes, { ordered: false });
+
+  return done.length;
+}
+
+let draining = null;
+let kickRequested = false;
+let timer = null;
+
+// Processes batches until the queue has nothing ready. Concurrent kicks coalesce.
+export function kickWebhookWorker() {
+  kickRequested = true;
+  if (!draining) {
+    // Runs outside the enqueuing request, so its commands are not charged to that request
+    draining = untracked(async () => {
+      const db = await getDatabase();
+      while (kickRequested) {
+        kickRequested = false;
+        while (await processWebhookBatch(db) > 0) {
+          // keep draining
+        }
+      }
+    })
+      .catch((error) => {
+        recordError();
+        console.error('Webhook worker error:', error);
+      })
+      .finally(() => {
+        draining = null;
+      });
+  }
+  return draining;
+}
+
+// Polls for events left over from a restart or waiting for a retry
+export function startWebhookWorker() {
+  if (!timer) {
+    timer = setInterval(kickWebhookWorker, POLL_INTERVAL_MS);
+    timer.unref?.();
+  }
+}
+
+export async function getWebhookQueueStats() {
+  const db = await getDatabase();
+  const counts = await db.collection(QUEUE).aggregate([
+    { $group: { _id: '$status', count: { $sum: 1 } } }
+  ]).toArray();
+  const stats = { pending: 0, processing: 0, done: 0, skipped: 0 };
+  for (const { _id, count } of counts) {
+    stats[_id] = count;
+  }
+  return stats;
+}
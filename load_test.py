@@ -0,0 +1,1049 @@
+#!/usr/bin/env python3
+"""
+Async Load Generator for TravelwithDENCHE
+Replays the backend_test.py scenarios as weighted virtual-user flows
+and reports throughput plus p50/p95/p99 latency per endpoint
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import random
+import time
+import uuid
+
+import aiohttp
+
+from backend_test import API_BASE, MONGO_URL, DB_NAME
+from perf_metrics import Histogram, growth_trend
+from tests.helpers import departure_payload
+
+try:
+    from pymongo import MongoClient
+except ImportError:  # Database-level checks and cleanup are skipped without pymongo
+    MongoClient = None
+
+# Relative weight of each virtual-user flow. Names mirror the
+# TravelwithDENCHEAPITester scenario methods they are derived from.
+DEFAULT_WEIGHTS = {
+    'test_auth_system': 10,
+    'test_trips_api': 45,
+    'test_bookings_system': 15,
+    'test_admin_dashboard': 10,
+    'test_payment_mock_system': 5,
+    'test_database_validation': 15
+}
+
+# Seconds at full concurrency; a soak needs hours to tell a leak from a warm-up
+DEFAULT_DURATION = 60.0
+SOAK_DURATION = 4 * 3600.0
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.bytes = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def record(self, endpoint, elapsed_ms, ok, size=0):
+        if endpoint not in self.latencies:
+            self.latencies[endpoint] = Histogram()
+        self.latencies[endpoint].record(elapsed_ms)
+        self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self):
+        duration = max((self.finished_at or time.monotonic()) - (self.started_at or 0), 1e-9)
+        endpoints = {}
+        for endpoint, hist in sorted(self.latencies.items()):
+            endpoints[endpoint] = {
+                'requests': hist.count,
+                'errors': self.errors.get(endpoint, 0),
+                'rps': hist.count / duration,
+                'bytes_per_request': self.bytes.get(endpoint, 0) / hist.count,
+                'p50_ms': hist.percentile(50),
+                'p95_ms': hist.percentile(95),
+                'p99_ms': hist.percentile(99),
+                'max_ms': hist.max
+            }
+        total = sum(e['requests'] for e in endpoints.values())
+        return {
+            'duration_s': duration,
+            'total_requests': total,
+            'total_errors': sum(e['errors'] for e in endpoints.values()),
+            'rps': total / duration,
+            'endpoints': endpoints
+        }
+
+
+class VirtualUser:
+    """A single simulated visitor with its own demo-session cookie"""
+
+    def __init__(self, http, stats, context):
+        self.http = http
+        self.stats = stats
+        self.context = context
+        self.cookies = {}
+
+    async def request(self, method, path, endpoint=None, expected=(200,), **kwargs):
+        endpoint = endpoint or f"{method} /api{path}"
+        start = time.perf_counter()
+        try:
+            async with self.http.request(method, f"{API_BASE}{path}",
+                                         cookies=self.cookies, **kwargs) as response:
+                body = await response.read()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                ok = response.status in expected
+                self.stats.record(endpoint, elapsed_ms, ok, len(body))
+                if 'demo-session' in response.cookies:
+                    morsel = response.cookies['demo-session']
+                    if morsel.value:
+                        self.cookies['demo-session'] = morsel.value
+                    else:
+                        self.cookies.pop('demo-session', None)
+                if ok and body and response.content_type == 'application/json':
+                    return json.loads(body)
+                return None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.stats.record(endpoint, (time.perf_counter() - start) * 1000, False)
+            return None
+
+    async def login(self, user_type):
+        return await self.request('POST', '/auth/login', json={'type': user_type})
+
+    # Flows -------------------------------------------------------------
+
+    async def test_auth_system(self):
+        await self.login('user')
+        await self.request('GET', '/auth/me')
+        await self.request('POST', '/auth/logout')
+        self.cookies.clear()
+
+    async def test_trips_api(self):
+        await self.request('GET', '/trips')
+        await self.request('GET', f"/trips/{self.context['slug']}", endpoint='GET /api/trips/{slug}')
+
+    async def test_bookings_system(self):
+        if 'demo-session' not in self.cookies:
+            await self.login('user')
+        await self.request('GET', f"/trips/{self.context['slug']}", endpoint='GET /api/trips/{slug}')
+        departure_id = self.context.get('free_departure_id')
+        if departure_id:
+            # 400 means the departure sold out, which is expected under load
+            await self.request('POST', '/bookings', expected=(200, 400),
+                               json={'departure_id': departure_id, 'seats': 1})
+        await self.request('GET', '/bookings')
+
+    async def test_admin_dashboard(self):
+        await self.login('admin')
+        await self.request('GET', '/admin/dashboard')
+        await self.request('GET', '/admin/trips')
+        self.cookies.clear()
+
+    async def test_payment_mock_system(self):
+        # Tagged with the run id so LoadTester.cleanup can take the payments back out
+        run_id = self.context['run_id']
+        payload = {
+            "type": "checkout.session.completed",
+            "data": {
+                "object": {
+                    "id": f"cs_load_{run_id}_{random.getrandbits(48):x}",
+                    "payment_intent": f"pi_load_{run_id}_{random.getrandbits(48):x}",
+                    "amount_total": 15000,
+                    "currency": "eur",
+                    "metadata": {"booking_id": f"load-test-{run_id}", "type": "deposit"}
+                }
+            }
+        }
+        await self.request('POST', '/payments/webhook', json=payload,
+                           headers={'stripe-signature': 'load-test-signature'})
+
+    async def test_database_validation(self):
+        await self.request('GET', '/trips')
+        if 'demo-session' not in self.cookies:
+            await self.login('user')
+        await self.request('GET', '/bookings')
+
+
+async def drain_webhooks(admin, timeout):
+    """Wait for the webhook worker to apply everything queued; the final queue counts,
+    or None if it is still busy after `timeout` seconds"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = (await admin.request('GET', '/admin/webhooks', endpoint='verify')) or {}
+        queue = data.get('queue')
+        if queue and queue['pending'] + queue['processing'] == 0:
+            return queue
+        await asyncio.sleep(0.5)
+    return None
+
+
+def remove_payments(intent_prefix):
+    """Delete the synthetic payments and queued webhook events whose payment intent
+    starts with `intent_prefix`, then drop the dashboard counters so the next read
+    rebuilds them from the remaining ledger (lib/stats.js). Returns the rows removed."""
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        db = client[DB_NAME]
+        intents = {'$regex': f"^{intent_prefix}"}
+        removed = db.payments.delete_many({'stripe_payment_intent_id': intents}).deleted_count
+        db.webhook_events.delete_many({'object.payment_intent': intents})
+        db.dashboard_stats.delete_one({'_id': 'global'})
+        return removed
+    finally:
+        client.close()
+
+
+class LoadTester:
+    PAYMENT_FLOW = 'test_payment_mock_system'
+
+    def __init__(self, concurrency=100, ramp_up=10.0, duration=60.0, connections=100,
+                 think_time=0.0, weights=None, slug='alps-hiking-escape', timeout=30.0):
+        self.concurrency = concurrency
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.connections = connections
+        self.think_time = think_time
+        self.weights = weights or DEFAULT_WEIGHTS
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+        self.context = {'slug': slug, 'run_id': self.run_id}
+        self.stats = LoadStats()
+        if MongoClient is None and self.weights.get(self.PAYMENT_FLOW):
+            # Its webhooks write real payments and revenue that only the database can take back
+            print(f"⚠️  pymongo unavailable: {self.PAYMENT_FLOW} left out of the mix")
+            self.weights = {name: weight for name, weight in self.weights.items() if name != self.PAYMENT_FLOW}
+
+    async def prepare(self, http):
+        """Resolve the departure ids the booking flow needs"""
+        async with http.get(f"{API_BASE}/trips/{self.context['slug']}") as response:
+            if response.status != 200:
+                raise RuntimeError(f"Cannot load trip '{self.context['slug']}': {response.status}")
+            trip = (await response.json()).get('trip', {})
+        for departure in trip.get('departures', []):
+            if departure.get('allow_free_rsvp'):
+                self.context['free_departure_id'] = departure.get('id')
+
+    async def run_user(self, http, delay, deadline):
+        await asyncio.sleep(delay)
+        user = VirtualUser(http, self.stats, self.context)
+        flows = list(self.weights)
+        weights = [self.weights[name] for name in flows]
+        while time.monotonic() < deadline:
+            flow = random.choices(flows, weights=weights)[0]
+            await getattr(user, flow)()
+            if self.think_time:
+                await asyncio.sleep(random.uniform(0, 2 * self.think_time))
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         cookie_jar=aiohttp.DummyCookieJar()) as http:
+            await self.prepare(http)
+            self.stats.started_at = time.monotonic()
+            await self.drive(http, self.stats.started_at + self.ramp_up + self.duration)
+            self.stats.finished_at = time.monotonic()
+            await self.cleanup(http)
+        return self.stats.summary()
+
+    async def cleanup(self, http, drain_timeout=120.0):
+        """Undo the payment flow's writes once the webhook worker has applied them all.
+        Runs after the measured window, from its own session."""
+        if not self.weights.get(self.PAYMENT_FLOW):
+            return
+        admin = VirtualUser(http, LoadStats(), {})
+        await admin.login('admin')
+        if await drain_webhooks(admin, drain_timeout) is None:
+            print(f"⚠️  Webhook queue still busy; payments with intents pi_load_{self.run_id}_* were left in place")
+            return
+        try:
+            removed = await asyncio.get_running_loop().run_in_executor(
+                None, remove_payments, f"pi_load_{self.run_id}_")
+            print(f"🧹 Removed {removed} synthetic payments from run {self.run_id}")
+        except Exception as e:
+            print(f"⚠️  Cleanup of run {self.run_id} failed: {e}")
+
+    async def drive(self, http, deadline):
+        step = self.ramp_up / self.concurrency if self.concurrency else 0
+        await asyncio.gather(*(self.run_user(http, i * step, deadline)
+                               for i in range(self.concurrency)))
+
+
+
+class WindowedStats(LoadStats):
+    """LoadStats that also keeps one all-endpoint histogram per sampling window"""
+
+    def __init__(self):
+        super().__init__()
+        self.window = Histogram()
+        self.window_errors = 0
+
+    def record(self, endpoint, elapsed_ms, ok, size=0):
+        super().record(endpoint, elapsed_ms, ok, size)
+        self.window.record(elapsed_ms)
+        if not ok:
+            self.window_errors += 1
+
+    def rotate(self):
+        window, errors = self.window, self.window_errors
+        self.window, self.window_errors = Histogram(), 0
+        return window, errors
+
+
+class SoakTest(LoadTester):
+    """Runs the weighted scenario mix for hours while sampling server health.
+
+    Every `sample_interval` seconds the test reads GET /api/admin/metrics (RSS,
+    heap, open file descriptors, Mongo pool connections, event-loop lag, open
+    availability streams) next to the latency of the requests finished in that
+    window. Samples from the first `warmup` seconds are kept but not analysed,
+    since caches and the connection pool fill up at first. A resource is
+    flagged when it grew through every quarter of the run by more than
+    `max_growth` and its floor below; a latency when its last quarter is more
+    than `max_latency_drift` times its first and above its floor.
+    """
+
+    # Sample key -> smallest absolute growth worth flagging
+    RESOURCES = {
+        'rss_mb': 25,
+        'heap_used_mb': 25,
+        'open_fds': 10,
+        'mongo_connections': 5,
+        'availability_streams': 10
+    }
+    LATENCIES = {
+        'p95_ms': 10,
+        'event_loop_p99_ms': 5
+    }
+    # One per quarter the trends are cut into; fewer and nothing can be analysed
+    MIN_STEADY_SAMPLES = 4
+
+    def __init__(self, sample_interval=30.0, warmup=300.0, max_growth=0.2, max_latency_drift=1.5,
+                 samples_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = WindowedStats()
+        self.sample_interval = sample_interval
+        self.warmup = warmup
+        self.max_growth = max_growth
+        self.max_latency_drift = max_latency_drift
+        self.samples_path = samples_path
+        self.samples = []
+
+    def planned_steady_samples(self):
+        """Samples the schedule will take after the warm-up, if every one is on time"""
+        end = self.ramp_up + self.duration
+        first = max(1, math.ceil(self.warmup / self.sample_interval))
+        return max(0, int(end // self.sample_interval) - first + 1)
+
+    async def take_sample(self, admin):
+        metrics = await admin.request('GET', '/admin/metrics', endpoint='metrics') or {}
+        window, errors = self.stats.rotate()
+        sample = {
+            't_s': round(time.monotonic() - self.stats.started_at, 1),
+            'requests': window.count,
+            'errors': errors,
+            'p50_ms': window.percentile(50) if window.count else None,
+            'p95_ms': window.percentile(95) if window.count else None,
+            'rss_mb': metrics.get('memory', {}).get('rss_mb'),
+            'heap_used_mb': metrics.get('memory', {}).get('heap_used_mb'),
+            'open_fds': metrics.get('open_fds'),
+            'mongo_connections': metrics.get('mongo_pool', {}).get('open'),
+            'event_loop_p99_ms': metrics.get('event_loop', {}).get('p99_ms'),
+            'availability_streams': metrics.get('availability_streams'),
+            'server_errors': metrics.get('server_errors')
+        }
+        self.samples.append(sample)
+        if self.samples_path:
+            first = len(self.samples) == 1
+            with open(self.samples_path, 'w' if first else 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(sample))
+                if first:
+                    writer.writeheader()
+                writer.writerow(sample)
+
+        def show(value, fmt):
+            return '-' if value is None else format(value, fmt)
+        print(f"   t={sample['t_s'] / 60:6.1f}m  {sample['requests'] / self.sample_interval:7.1f} req/s  "
+              f"p95 {show(sample['p95_ms'], '.1f')}ms  rss {show(sample['rss_mb'], '.0f')}MB  "
+              f"fds {show(sample['open_fds'], 'd')}  mongo {show(sample['mongo_connections'], 'd')}  "
+              f"loop p99 {show(sample['event_loop_p99_ms'], '.1f')}ms")
+
+    async def sample(self, admin, deadline):
+        next_at = self.stats.started_at + self.sample_interval
+        while next_at <= deadline:
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            await self.take_sample(admin)
+            next_at += self.sample_interval
+
+    def analyze(self):
+        steady = [sample for sample in self.samples if sample['t_s'] >= self.warmup]
+        trends = {}
+        for key, floor in self.RESOURCES.items():
+            trend = growth_trend([(sample['t_s'], sample[key]) for sample in steady])
+            if trend:
+                trend['flagged'] = (trend['monotonic'] and (trend['change'] or 0) > self.max_growth and
+                                    trend['end'] - trend['start'] >= floor)
+            trends[key] = trend
+        for key, floor in self.LATENCIES.items():
+            trend = growth_trend([(sample['t_s'], sample[key]) for sample in steady])
+            if trend:
+                trend['drift'] = trend['end'] / trend['start'] if trend['start'] else None
+                trend['flagged'] = (trend['end'] - trend['start'] >= floor and
+                                    (trend['drift'] is None or trend['drift'] > self.max_latency_drift))
+            trends[key] = trend
+
+        server_errors = [sample['server_errors'] for sample in self.samples if sample['server_errors'] is not None]
+        return {
+            'sample_interval_s': self.sample_interval,
+            'warmup_s': self.warmup,
+            'steady_samples': len(steady),
+            'server_errors': server_errors[-1] - server_errors[0] if len(server_errors) > 1 else None,
+            'trends': trends,
+            'flagged': [key for key, trend in trends.items() if trend and trend['flagged']],
+            'samples': self.samples
+        }
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         cookie_jar=aiohttp.DummyCookieJar()) as http:
+            await self.prepare(http)
+            # Sampled from its own session so metrics reads don't count as load
+            admin = VirtualUser(http, LoadStats(), {})
+            await admin.login('admin')
+            self.stats.started_at = time.monotonic()
+            deadline = self.stats.started_at + self.ramp_up + self.duration
+            await asyncio.gather(self.drive(http, deadline), self.sample(admin, deadline))
+            self.stats.finished_at = time.monotonic()
+            await self.cleanup(http)
+
+        summary = self.stats.summary()
+        summary['soak'] = self.analyze()
+        return summary
+
+
+class AvailabilityTest:
+    """Compares polling seat counts through the full trip document with the batch
+    availability endpoint, then measures Server-Sent Events push latency.
+
+    Each polling phase runs `concurrency` closed-loop clients for `duration`
+    seconds and reports bytes per response and requests per second. The push
+    phase opens `subscribers` availability streams on a fresh departure, books it
+    `pushes` times and times how long each change takes to reach every stream.
+    """
+
+    FULL = 'GET /api/trips/:slug (full)'
+    BATCH = 'GET /api/departures/availability'
+
+    def __init__(self, concurrency=100, duration=30.0, subscribers=100, pushes=20, connections=100,
+                 slug='alps-hiking-escape', timeout=30.0):
+        self.concurrency = concurrency
+        self.duration = duration
+        self.subscribers = subscribers
+        self.pushes = pushes
+        self.connections = connections
+        self.slug = slug
+        self.timeout = timeout
+        self.stats = LoadStats()
+        self.push_latency = Histogram()
+        self.push_sent = {}
+        self.deliveries = 0
+
+    async def poll(self, client, path, endpoint, params, deadline):
+        while time.monotonic() < deadline:
+            await client.request('GET', path, endpoint=endpoint, params=params)
+
+    async def phase(self, http, path, endpoint, params=None):
+        clients = [VirtualUser(http, self.stats, {}) for _ in range(self.concurrency)]
+        deadline = time.monotonic() + self.duration
+        await asyncio.gather(*(self.poll(client, path, endpoint, params, deadline) for client in clients))
+
+    async def subscribe(self, http, departure_id, ready):
+        url = f"{API_BASE}/departures/availability/stream"
+        # No total timeout: the stream stays open until the push phase is over
+        stream_timeout = aiohttp.ClientTimeout(total=None, sock_read=self.timeout)
+        async with http.get(url, params={'ids': departure_id}, timeout=stream_timeout) as response:
+            event = None
+            async for raw in response.content:
+                line = raw.decode().rstrip('\r\n')
+                if line.startswith('event:'):
+                    event = line[6:].strip()
+                elif line.startswith('data:') and event == 'snapshot':
+                    ready.set()
+                elif line.startswith('data:') and event == 'availability':
+                    sent_at = self.push_sent.get(json.loads(line[5:])['spots_left'])
+                    if sent_at is not None:
+                        self.push_latency.record((time.monotonic() - sent_at) * 1000)
+                        self.deliveries += 1
+
+    async def push_phase(self, http):
+        admin = VirtualUser(http, LoadStats(), {})
+        await admin.login('admin')
+        trip = (await admin.request('GET', f"/trips/{self.slug}", endpoint='setup')) or {}
+        trip_id = trip.get('trip', {}).get('id')
+        if not trip_id:
+            raise RuntimeError(f"Cannot load trip '{self.slug}'")
+        data = await admin.request('POST', '/admin/departures', endpoint='setup',
+                                   json=departure_payload(trip_id, capacity=self.pushes))
+        if not data:
+            raise RuntimeError("Cannot create availability departure")
+        departure_id = data['departure']['id']
+
+        readiness = [asyncio.Event() for _ in range(self.subscribers)]
+        streams = [asyncio.ensure_future(self.subscribe(http, departure_id, ready)) for ready in readiness]
+        await asyncio.wait_for(asyncio.gather(*(ready.wait() for ready in readiness)), self.timeout)
+
+        user = VirtualUser(http, self.stats, {})
+        await user.login('user')
+        for booked in range(1, self.pushes + 1):
+            # Only this test books the fresh departure, so each booking leaves a known count
+            self.push_sent[self.pushes - booked] = time.monotonic()
+            await user.request('POST', '/bookings', json={'departure_id': departure_id, 'seats': 1})
+
+        expected = self.subscribers * self.pushes
+        deadline = time.monotonic() + 5
+        while self.deliveries < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for stream in streams:
+            stream.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+        return expected
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=max(self.connections, self.subscribers + 10))
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         cookie_jar=aiohttp.DummyCookieJar()) as http:
+            async with http.get(f"{API_BASE}/trips/{self.slug}") as response:
+                if response.status != 200:
+                    raise RuntimeError(f"Cannot load trip '{self.slug}': {response.status}")
+                departures = (await response.json()).get('trip', {}).get('departures', [])
+            ids = ','.join(departure['id'] for departure in departures)
+
+            self.stats.started_at = time.monotonic()
+            await self.phase(http, f"/trips/{self.slug}", self.FULL)
+            await self.phase(http, '/departures/availability', self.BATCH, {'ids': ids})
+            expected_deliveries = await self.push_phase(http)
+            self.stats.finished_at = time.monotonic()
+
+        summary = self.stats.summary()
+        # Each polling phase ran for `duration`, not the whole test
+        for endpoint in (self.FULL, self.BATCH):
+            summary['endpoints'][endpoint]['rps'] = summary['endpoints'][endpoint]['requests'] / self.duration
+        full, batch = summary['endpoints'][self.FULL], summary['endpoints'][self.BATCH]
+        summary['availability'] = {
+            'departures': len(departures),
+            'full_bytes': full['bytes_per_request'],
+            'batch_bytes': batch['bytes_per_request'],
+            'bytes_ratio': full['bytes_per_request'] / max(batch['bytes_per_request'], 1),
+            'full_rps': full['rps'],
+            'batch_rps': batch['rps'],
+            'subscribers': self.subscribers,
+            'pushes': self.pushes,
+            'expected_deliveries': expected_deliveries,
+            'deliveries': self.deliveries,
+            'push_p50_ms': self.push_latency.percentile(50) if self.push_latency.count else None,
+            'push_p95_ms': self.push_latency.percentile(95) if self.push_latency.count else None
+        }
+        return summary
+
+
+class BookingContentionTest:
+    """Fires simultaneous bookings at one fresh free-RSVP departure.
+
+    Every virtual user logs in with its own demo session, then all booking
+    requests are released at once. The run fails if the API confirms more
+    seats than the departure's capacity or drives spots_left below zero.
+    """
+
+    def __init__(self, bookings=300, sessions=50, capacity=20, seats=1, connections=100,
+                 slug='alps-hiking-escape', timeout=30.0):
+        self.bookings = bookings
+        self.sessions = sessions
+        self.capacity = capacity
+        self.seats = seats
+        self.connections = connections
+        self.slug = slug
+        self.timeout = timeout
+        self.stats = LoadStats()
+
+    async def create_departure(self, admin):
+        trip = (await admin.request('GET', f"/trips/{self.slug}", endpoint='setup')) or {}
+        trip_id = trip.get('trip', {}).get('id')
+        if not trip_id:
+            raise RuntimeError(f"Cannot load trip '{self.slug}'")
+        data = await admin.request('POST', '/admin/departures', endpoint='setup',
+                                   json=departure_payload(trip_id, capacity=self.capacity))
+        if not data:
+            raise RuntimeError("Cannot create contention departure")
+        return data['departure']['id']
+
+    async def book(self, user, departure_id, barrier, outcomes):
+        await barrier.wait()
+        data = await user.request('POST', '/bookings', expected=(200, 400),
+                                  json={'departure_id': departure_id, 'seats': self.seats})
+        outcomes.append(data)
+
+    def verify_in_db(self, departure_id):
+        """(spots_left, booked seats) read straight from MongoDB, or None without pymongo"""
+        if MongoClient is None:
+            return None
+        client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+        try:
+            db = client[DB_NAME]
+            departure = db.departures.find_one({'id': departure_id}, {'spots_left': 1}) or {}
+            booked = next(db.bookings.aggregate([
+                {'$match': {'departure_id': departure_id}},
+                {'$group': {'_id': None, 'seats': {'$sum': '$seats'}}}
+            ]), {}).get('seats', 0)
+            return departure.get('spots_left'), booked
+        finally:
+            client.close()
+
+    async def verify(self, admin, departure_id):
+        """Count what was actually stored. `admin` records into its own LoadStats, so
+        these reads never show up in the contention run's latencies or throughput."""
+        counts = await asyncio.get_running_loop().run_in_executor(None, self.verify_in_db, departure_id)
+        if counts is not None:
+            return counts
+
+        trip = (await admin.request('GET', f"/trips/{self.slug}", endpoint='verify')) or {}
+        departure = next((d for d in trip.get('trip', {}).get('departures', [])
+                          if d.get('id') == departure_id), {})
+        booked = 0
+        cursor = None
+        while True:
+            # Only this departure's bookings, not every booking in the database
+            params = {'departure_id': departure_id, 'limit': 500, 'fields': 'seats'}
+            if cursor:
+                params['cursor'] = cursor
+            page = (await admin.request('GET', '/bookings', endpoint='verify', params=params)) or {}
+            booked += sum(b.get('seats', 0) for b in page.get('bookings', []))
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+        return departure.get('spots_left'), booked
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         cookie_jar=aiohttp.DummyCookieJar()) as http:
+            admin = VirtualUser(http, LoadStats(), {})
+            await admin.login('admin')
+            departure_id = await self.create_departure(admin)
+
+            users = [VirtualUser(http, self.stats, {}) for _ in range(self.sessions)]
+            await asyncio.gather(*(user.login('user') for user in users))
+
+            barrier = asyncio.Event()
+            outcomes = []
+            tasks = [asyncio.ensure_future(self.book(users[i % self.sessions], departure_id, barrier, outcomes))
+                     for i in range(self.bookings)]
+            await asyncio.sleep(0)
+            self.stats.started_at = time.monotonic()
+            barrier.set()
+            await asyncio.gather(*tasks)
+            self.stats.finished_at = time.monotonic()
+
+            spots_left, booked = await self.verify(admin, departure_id)
+
+        confirmed = sum(self.seats for data in outcomes if data and data.get('booking'))
+        summary = self.stats.summary()
+        summary['contention'] = {
+            'departure_id': departure_id,
+            'capacity': self.capacity,
+            'attempted_seats': self.bookings * self.seats,
+            'confirmed_seats': confirmed,
+            'booked_seats_in_db': booked,
+            'spots_left': spots_left,
+            'bookings_per_second': self.bookings / summary['duration_s'],
+            'oversold': (confirmed > self.capacity or booked > self.capacity or
+                         spots_left is None or spots_left < 0)
+        }
+        return summary
+
+
+class WebhookReplayTest:
+    """Replays a burst of payment webhooks, duplicates included, and audits the ledger.
+
+    Phase one sends `checkout.session.completed` events, phase two
+    `charge.refunded` events for a share of the same payment intents. A
+    fraction of events is re-sent, half with the original event id (provider
+    retries) and half under a new id, so deduplication has to happen on the
+    payment intent. After the queue drains, the dashboard revenue delta and
+    (with pymongo) the payments rows must match the unique events exactly.
+    The run's payments are removed afterwards and the dashboard counters rebuilt.
+    """
+
+    ENDPOINT = 'POST /api/payments/webhook'
+
+    def __init__(self, events=20000, duplicate_ratio=0.2, refund_ratio=0.2, concurrency=100,
+                 connections=100, drain_timeout=300.0, timeout=30.0, seed=None):
+        self.events = events
+        self.duplicate_ratio = duplicate_ratio
+        self.refund_ratio = refund_ratio
+        self.concurrency = concurrency
+        self.connections = connections
+        self.drain_timeout = drain_timeout
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.stats = LoadStats()
+
+    def build_events(self):
+        unique = max(1, int(self.events * (1 - self.duplicate_ratio)))
+        refunds = int(unique * self.refund_ratio)
+        checkouts = unique - refunds
+
+        phases = [[], []]
+        expected = {'checkout_rows': checkouts, 'checkout_cents': 0,
+                    'refund_rows': refunds, 'refund_cents': 0}
+        for i in range(checkouts):
+            amount = self.rng.randint(1000, 100000)
+            expected['checkout_cents'] += amount
+            intent = f"pi_replay_{self.run_id}_{i}"
+            phases[0].append({
+                'id': f"evt_replay_{self.run_id}_c{i}",
+                'type': 'checkout.session.completed',
+                'data': {'object': {
+                    'id': f"cs_replay_{self.run_id}_{i}",
+                    'payment_intent': intent,
+                    'amount_total': amount,
+                    'currency': 'eur',
+                    'metadata': {'booking_id': f"replay-{self.run_id}-{i}", 'type': 'deposit'}
+                }}
+            })
+            if i < refunds:
+                expected['refund_cents'] -= amount
+                phases[1].append({
+                    'id': f"evt_replay_{self.run_id}_r{i}",
+                    'type': 'charge.refunded',
+                    'data': {'object': {
+                        'id': f"ch_replay_{self.run_id}_{i}",
+                        'payment_intent': intent,
+                        'amount_refunded': amount,
+                        'currency': 'eur',
+                        'refunds': {'data': [{'id': f"re_replay_{self.run_id}_{i}", 'amount': amount}]}
+                    }}
+                })
+
+        originals = phases[0] + phases[1]
+        for n in range(self.events - unique):
+            event = dict(self.rng.choice(originals))
+            if n % 2:
+                event['id'] = f"evt_replay_{self.run_id}_d{n}"
+            phases[0 if event['type'] == 'checkout.session.completed' else 1].append(event)
+
+        for phase in phases:
+            self.rng.shuffle(phase)
+        return phases, expected
+
+    async def send(self, client, queue, acks):
+        while queue:
+            event = queue.pop()
+            data = await client.request('POST', '/payments/webhook', endpoint=self.ENDPOINT,
+                                        json=event, headers={'stripe-signature': 'replay'})
+            if data and data.get('received'):
+                acks['duplicate' if data.get('duplicate') else 'queued'] += 1
+
+    async def revenue(self, admin):
+        data = (await admin.request('GET', '/admin/dashboard', endpoint='verify')) or {}
+        return data.get('stats', {}).get('total_revenue')
+
+    def ledger(self):
+        """Payments rows written for this run, or None without database access"""
+        if MongoClient is None:
+            return None
+        client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+        try:
+            rows = client[DB_NAME].payments.aggregate([
+                {'$match': {'stripe_payment_intent_id': {'$regex': f"^pi_replay_{self.run_id}_"}}},
+                {'$group': {'_id': {'$eq': ['$type', 'refund']},
+                            'rows': {'$sum': 1}, 'cents': {'$sum': '$amount_cents'}}}
+            ])
+            ledger = {'checkout_rows': 0, 'checkout_cents': 0, 'refund_rows': 0, 'refund_cents': 0}
+            for row in rows:
+                kind = 'refund' if row['_id'] else 'checkout'
+                ledger[f"{kind}_rows"] = row['rows']
+                ledger[f"{kind}_cents"] = row['cents']
+            return ledger
+        except Exception as e:
+            print(f"⚠️  Ledger check skipped: {e}")
+            return None
+        finally:
+            client.close()
+
+    async def cleanup(self, admin):
+        """Remove this run's payments and rebuild the dashboard counters they moved"""
+        prefix = f"pi_replay_{self.run_id}_"
+        if MongoClient is None:
+            print(f"⚠️  pymongo unavailable: payments with intents {prefix}* were left in place")
+            return
+        if await drain_webhooks(admin, self.drain_timeout) is None:
+            print(f"⚠️  Webhook queue still busy; payments with intents {prefix}* were left in place")
+            return
+        try:
+            removed = await asyncio.get_running_loop().run_in_executor(None, remove_payments, prefix)
+            print(f"🧹 Removed {removed} replayed payments from run {self.run_id}")
+        except Exception as e:
+            print(f"⚠️  Cleanup of run {self.run_id} failed: {e}")
+
+    async def run(self):
+        phases, expected = self.build_events()
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         cookie_jar=aiohttp.DummyCookieJar()) as http:
+            admin = VirtualUser(http, LoadStats(), {})
+            await admin.login('admin')
+            try:
+                revenue_before = await self.revenue(admin)
+
+                client = VirtualUser(http, self.stats, {})
+                acks = {'queued': 0, 'duplicate': 0}
+                self.stats.started_at = time.monotonic()
+                for phase in phases:
+                    await asyncio.gather(*(self.send(client, phase, acks) for _ in range(self.concurrency)))
+                self.stats.finished_at = time.monotonic()
+
+                queue = await drain_webhooks(admin, self.drain_timeout)
+                applied_at = time.monotonic()
+                revenue_after = await self.revenue(admin)
+                ledger = self.ledger()
+            finally:
+                await self.cleanup(admin)
+
+        summary = self.stats.summary()
+        revenue_delta = (revenue_after - revenue_before
+                         if revenue_before is not None and revenue_after is not None else None)
+        summary['webhooks'] = {
+            'run_id': self.run_id,
+            'events_sent': self.events,
+            'unique_events': expected['checkout_rows'] + expected['refund_rows'],
+            'acked_queued': acks['queued'],
+            'acked_duplicate': acks['duplicate'],
+            'ingest_per_second': self.events / summary['duration_s'],
+            'drained': queue is not None,
+            'skipped': queue.get('skipped') if queue else None,
+            'apply_seconds': applied_at - self.stats.started_at,
+            'expected': expected,
+            'revenue_delta': revenue_delta,
+            'ledger': ledger,
+            'exact': (queue is not None and revenue_delta == expected['checkout_cents'] and
+                      (ledger is None or ledger == expected))
+        }
+        return summary
+
+
+def print_report(summary, title="📈 LOAD TEST RESULTS"):
+    print("\n" + "="*96)
+    print(title)
+    print("="*96)
+    print(f"{'ENDPOINT':<34}{'REQS':>8}{'ERR':>7}{'RPS':>9}{'P50':>9}{'P95':>9}{'P99':>9}{'MAX':>9}")
+    for endpoint, row in summary['endpoints'].items():
+        print(f"{endpoint:<34}{row['requests']:>8}{row['errors']:>7}{row['rps']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}")
+    print("-" * 96)
+    print(f"🎯 OVERALL: {summary['total_requests']} requests, {summary['total_errors']} errors, "
+          f"{summary['rps']:.1f} req/s over {summary['duration_s']:.1f}s")
+
+    contention = summary.get('contention')
+    if contention:
+        print(f"🎟️  Capacity {contention['capacity']} | attempted {contention['attempted_seats']} | "
+              f"confirmed {contention['confirmed_seats']} | in DB {contention['booked_seats_in_db']} | "
+              f"spots_left {contention['spots_left']} | {contention['bookings_per_second']:.1f} bookings/s")
+        if contention['oversold']:
+            print("❌ OVERBOOKED: confirmed seats exceed departure capacity")
+        else:
+            print("✅ No overbooking detected")
+
+    webhooks = summary.get('webhooks')
+    if webhooks:
+        print(f"📨 Sent {webhooks['events_sent']} events ({webhooks['unique_events']} unique) | "
+              f"queued {webhooks['acked_queued']} | duplicates acked {webhooks['acked_duplicate']} | "
+              f"{webhooks['ingest_per_second']:.1f} events/s ingested | "
+              f"applied after {webhooks['apply_seconds']:.1f}s")
+        expected = webhooks['expected']
+        print(f"💰 Revenue delta {webhooks['revenue_delta']} (expected {expected['checkout_cents']})")
+        if webhooks['ledger'] is not None:
+            print(f"📒 Ledger {webhooks['ledger']} (expected {expected})")
+        else:
+            print("⚠️  pymongo unavailable: payments rows not audited")
+        if not webhooks['drained']:
+            print("❌ Webhook queue did not drain in time")
+        elif webhooks['exact']:
+            print("✅ Ledger is exact: no duplicate or missing payments")
+        else:
+            print("❌ LEDGER MISMATCH")
+
+
+    availability = summary.get('availability')
+    if availability:
+        print(f"📦 {availability['departures']} departures | full document {availability['full_bytes']:.0f} B "
+              f"at {availability['full_rps']:.1f} req/s | batch {availability['batch_bytes']:.0f} B "
+              f"at {availability['batch_rps']:.1f} req/s | {availability['bytes_ratio']:.1f}x fewer bytes")
+        if availability['push_p95_ms'] is not None:
+            print(f"📡 {availability['deliveries']}/{availability['expected_deliveries']} pushes delivered to "
+                  f"{availability['subscribers']} streams | p50 {availability['push_p50_ms']:.1f}ms | "
+                  f"p95 {availability['push_p95_ms']:.1f}ms")
+        if availability['deliveries'] < availability['expected_deliveries']:
+            print("❌ Some availability changes never reached their stream")
+        else:
+            print("✅ Every availability change was pushed to every stream")
+
+
+    soak = summary.get('soak')
+    if soak:
+        print(f"🩺 {len(soak['samples'])} samples every {soak['sample_interval_s']:.0f}s, "
+              f"{soak['steady_samples']} after {soak['warmup_s']:.0f}s warm-up | "
+              f"server errors: {soak['server_errors']}")
+        print(f"{'SERIES':<24}{'START':>10}{'END':>10}{'CHANGE':>9}{'PER HOUR':>11}  TREND")
+        for key, trend in soak['trends'].items():
+            if not trend:
+                print(f"{key:<24}{'not enough samples':>40}")
+                continue
+            change = f"{trend['change']:+.0%}" if trend['change'] is not None else '-'
+            verdict = 'rising in every quarter' if trend['monotonic'] else 'stable'
+            if 'drift' in trend:
+                verdict = f"{trend['drift']:.2f}x first quarter" if trend['drift'] is not None else 'from zero'
+            print(f"{key:<24}{trend['start']:>10.1f}{trend['end']:>10.1f}{change:>9}"
+                  f"{trend['slope_per_hour']:>+11.1f}  {'❌ ' if trend['flagged'] else ''}{verdict}")
+        if soak['flagged']:
+            print(f"❌ Growth or drift detected: {', '.join(soak['flagged'])}")
+        elif soak['steady_samples'] < SoakTest.MIN_STEADY_SAMPLES:
+            print(f"❌ Only {soak['steady_samples']} samples after the warm-up; "
+                  f"need {SoakTest.MIN_STEADY_SAMPLES} to analyse trends")
+        else:
+            print("✅ No monotonic resource growth or latency drift")
+
+
+def parse_weights(values):
+    weights = dict(DEFAULT_WEIGHTS)
+    for value in values or []:
+        name, _, weight = value.partition('=')
+        if name not in DEFAULT_WEIGHTS:
+            raise argparse.ArgumentTypeError(f"Unknown flow '{name}'")
+        weights[name] = float(weight)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async load generator for the TravelwithDENCHE API")
+    parser.add_argument('--mode', choices=['mix', 'booking-contention', 'webhook-replay', 'availability', 'soak'],
+                        default='mix',
+                        help="weighted scenario mix, a booking overselling stress test, "
+                             "a payment webhook replay, seat availability polling vs push, "
+                             "or the scenario mix for hours with server resource tracking")
+    parser.add_argument('--concurrency', type=int, default=100, help="number of virtual users")
+    parser.add_argument('--ramp-up', type=float, default=10.0, help="seconds to start all users")
+    parser.add_argument('--duration', type=float,
+                        help=f"seconds at full concurrency (default: {DEFAULT_DURATION:.0f}, "
+                             f"soak: {SOAK_DURATION:.0f})")
+    parser.add_argument('--connections', type=int, default=100, help="size of the shared connection pool")
+    parser.add_argument('--think-time', type=float, default=0.0, help="mean pause between flows in seconds")
+    parser.add_argument('--weight', action='append', metavar='FLOW=WEIGHT',
+                        help="override a flow weight, e.g. test_trips_api=80")
+    parser.add_argument('--bookings', type=int, default=300, help="booking-contention: simultaneous bookings")
+    parser.add_argument('--sessions', type=int, default=50, help="booking-contention: distinct user sessions")
+    parser.add_argument('--capacity', type=int, default=20, help="booking-contention: departure capacity")
+    parser.add_argument('--events', type=int, default=20000, help="webhook-replay: events to send")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.2,
+                        help="webhook-replay: share of events that are re-sent duplicates")
+    parser.add_argument('--refund-ratio', type=float, default=0.2,
+                        help="webhook-replay: share of unique payments that are later refunded")
+    parser.add_argument('--subscribers', type=int, default=100, help="availability: open SSE streams")
+    parser.add_argument('--pushes', type=int, default=20, help="availability: bookings pushed to the streams")
+    parser.add_argument('--sample-interval', type=float, default=30.0,
+                        help="soak: seconds between server metrics samples")
+    parser.add_argument('--warmup', type=float, default=300.0,
+                        help="soak: seconds of samples left out of the trend analysis")
+    parser.add_argument('--max-growth', type=float, default=0.2,
+                        help="soak: flag resources that rose steadily by more than this fraction")
+    parser.add_argument('--max-latency-drift', type=float, default=1.5,
+                        help="soak: flag latencies whose last quarter exceeds the first by this ratio")
+    parser.add_argument('--max-error-rate', type=float, default=0.001,
+                        help="soak: fail when more than this fraction of requests errored")
+    parser.add_argument('--samples', metavar='PATH', help="soak: append each sample to this CSV as it is taken")
+    parser.add_argument('--json', metavar='PATH', help="also write the summary as JSON")
+    args = parser.parse_args()
+    if args.duration is None:
+        args.duration = SOAK_DURATION if args.mode == 'soak' else DEFAULT_DURATION
+
+    if args.mode == 'booking-contention':
+        tester = BookingContentionTest(bookings=args.bookings, sessions=args.sessions,
+                                       capacity=args.capacity, connections=args.connections)
+        print("🚀 Starting TravelwithDENCHE booking contention test...")
+        print(f"🌐 Target: {API_BASE} | bookings: {args.bookings} | sessions: {args.sessions} | "
+              f"capacity: {args.capacity}")
+        summary = asyncio.run(tester.run())
+        print_report(summary, "🎟️  BOOKING CONTENTION RESULTS")
+        success = not summary['contention']['oversold']
+    elif args.mode == 'webhook-replay':
+        tester = WebhookReplayTest(events=args.events, duplicate_ratio=args.duplicate_ratio,
+                                   refund_ratio=args.refund_ratio, concurrency=args.concurrency,
+                                   connections=args.connections)
+        print("🚀 Starting TravelwithDENCHE webhook replay...")
+        print(f"🌐 Target: {API_BASE} | events: {args.events} | duplicates: {args.duplicate_ratio:.0%} | "
+              f"refunds: {args.refund_ratio:.0%} | concurrency: {args.concurrency}")
+        summary = asyncio.run(tester.run())
+        print_report(summary, "📨 WEBHOOK REPLAY RESULTS")
+        success = summary['webhooks']['exact'] and summary['total_errors'] == 0
+    elif args.mode == 'availability':
+        tester = AvailabilityTest(concurrency=args.concurrency, duration=args.duration,
+                                  subscribers=args.subscribers, pushes=args.pushes,
+                                  connections=args.connections)
+        print("🚀 Starting TravelwithDENCHE availability test...")
+        print(f"🌐 Target: {API_BASE} | pollers: {args.concurrency} | {args.duration}s per phase | "
+              f"streams: {args.subscribers} | pushes: {args.pushes}")
+        summary = asyncio.run(tester.run())
+        print_report(summary, "📦 AVAILABILITY RESULTS")
+        availability = summary['availability']
+        success = (summary['total_errors'] == 0 and
+                   availability['deliveries'] >= availability['expected_deliveries'])
+    elif args.mode == 'soak':
+        tester = SoakTest(sample_interval=args.sample_interval, warmup=args.warmup,
+                          max_growth=args.max_growth, max_latency_drift=args.max_latency_drift,
+                          samples_path=args.samples, concurrency=args.concurrency, ramp_up=args.ramp_up,
+                          duration=args.duration, connections=args.connections,
+                          think_time=args.think_time, weights=parse_weights(args.weight))
+        # A soak that can't outlast its warm-up would report success having analysed nothing
+        planned = tester.planned_steady_samples()
+        if planned < SoakTest.MIN_STEADY_SAMPLES:
+            parser.error(f"--ramp-up + --duration ({args.ramp_up + args.duration:.0f}s) leaves {planned} samples "
+                         f"after the {args.warmup:.0f}s warm-up at one every {args.sample_interval:.0f}s; "
+                         f"at least {SoakTest.MIN_STEADY_SAMPLES} are needed")
+        print("🚀 Starting TravelwithDENCHE soak test...")
+        print(f"🌐 Target: {API_BASE} | users: {args.concurrency} | duration: {args.duration / 3600:.1f}h | "
+              f"sample every {args.sample_interval:.0f}s | warm-up: {args.warmup:.0f}s")
+        summary = asyncio.run(tester.run())
+        print_report(summary, "🩺 SOAK TEST RESULTS")
+        error_rate = summary['total_errors'] / max(summary['total_requests'], 1)
+        success = (not summary['soak']['flagged'] and error_rate <= args.max_error_rate and
+                   summary['soak']['steady_samples'] >= SoakTest.MIN_STEADY_SAMPLES)
+    else:
+        tester = LoadTester(concurrency=args.concurrency, ramp_up=args.ramp_up, duration=args.duration,
+                            connections=args.connections, think_time=args.think_time,
+                            weights=parse_weights(args.weight))
+        print("🚀 Starting TravelwithDENCHE load test...")
+        print(f"🌐 Target: {API_BASE} | users: {args.concurrency} | pool: {args.connections} | "
+              f"ramp-up: {args.ramp_up}s | duration: {args.duration}s")
+        summary = asyncio.run(tester.run())
+        print_report(summary)
+        success = summary['total_errors'] == 0
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return success
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
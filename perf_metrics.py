@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Latency/size histograms and timing reports for the TravelwithDENCHE test tooling
+"""
+
+import csv
+import json
+import math
+import re
+from datetime import datetime
+
+# Sub-buckets per power of two: 2**7 gives ~0.8% relative precision
+SUB_BITS = 7
+SUB_BUCKETS = 1 << SUB_BITS
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_server_timing(header):
+    """Parse a Server-Timing header into {metric: {'dur': float|None, 'desc': str|None}}"""
+    metrics = {}
+    for part in (header or '').split(','):
+        name, *params = [p.strip() for p in part.split(';')]
+        if not name:
+            continue
+        metric = {'dur': None, 'desc': None}
+        for param in params:
+            key, _, value = param.partition('=')
+            value = value.strip('"')
+            if key == 'dur':
+                metric['dur'] = float(value)
+            elif key == 'desc':
+                metric['desc'] = value
+        metrics[name] = metric
+    return metrics
+
+
+def db_command_count(header):
+    """Number of MongoDB commands from the API's `db;desc="N commands"` metric, or None"""
+    desc = parse_server_timing(header).get('db', {}).get('desc') or ''
+    match = re.match(r'(\d+) commands', desc)
+    return int(match.group(1)) if match else None
+
+
+def linear_slope(points):
+    """Least-squares slope of [(x, y), ...], or 0.0 when x doesn't vary"""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def growth_trend(points, segments=4):
+    """Summarize a time series [(seconds, value), ...] for leak detection.
+
+    The series is cut into `segments` equal slices and each slice reduced to
+    its median, which shrugs off GC sawtooth and single spikes. `monotonic`
+    means every slice sat at or above the one before and the last is higher
+    than the first, i.e. the value never settled.
+    """
+    points = [(x, y) for x, y in points if y is not None]
+    if len(points) < segments:
+        return None
+    size = len(points) / segments
+    medians = []
+    for i in range(segments):
+        values = sorted(y for _, y in points[int(i * size):int((i + 1) * size)])
+        medians.append(values[len(values) // 2])
+    start, end = medians[0], medians[-1]
+    return {
+        'start': start,
+        'end': end,
+        'change': (end - start) / start if start else None,
+        'slope_per_hour': linear_slope(points) * 3600,
+        'monotonic': all(b >= a for a, b in zip(medians, medians[1:])) and end > start,
+        'medians': medians
+    }
+
+
+class Histogram:
+    """HDR-style log-linear histogram with bounded memory.
+
+    Values are bucketed by power of two and then linearly inside each
+    power, so relative error is constant (1/SUB_BUCKETS) across the whole
+    range. `scale` converts recorded floats to the integer resolution the
+    buckets work in (1000 means milliseconds are stored as microseconds).
+    """
+
+    def __init__(self, scale=1000):
+        self.scale = scale
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        units = int(value * self.scale)
+        if units < SUB_BUCKETS:
+            return units
+        exponent = units.bit_length() - 1
+        sub = (units >> (exponent - SUB_BITS)) - SUB_BUCKETS
+        return (exponent - SUB_BITS + 1) * SUB_BUCKETS + sub
+
+    def _value(self, index):
+        if index < SUB_BUCKETS:
+            return index / self.scale
+        exponent = index // SUB_BUCKETS + SUB_BITS - 1
+        sub = index % SUB_BUCKETS
+        # Upper edge of the bucket, so percentiles never under-report
+        return ((SUB_BUCKETS + sub + 1) << (exponent - SUB_BITS)) / self.scale
+
+    def record(self, value):
+        value = max(value, 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        summary = {
+            'count': self.count,
+            'min': self.min or 0.0,
+            'mean': self.mean,
+            'max': self.max or 0.0
+        }
+        for pct in PERCENTILES:
+            summary[f'p{pct}'] = self.percentile(pct)
+        return summary
+
+
+class TimingRecorder:
+    """Per category/endpoint histograms of wall time, TTFB and response size"""
+
+    METRICS = ('wall_ms', 'ttfb_ms', 'bytes')
+
+    def __init__(self):
+        self.histograms = {}
+
+    @staticmethod
+    def _new_entry():
+        return {
+            'wall_ms': Histogram(),
+            'ttfb_ms': Histogram(),
+            'bytes': Histogram(scale=1)
+        }
+
+    def record(self, category, endpoint, wall_ms, ttfb_ms, size):
+        key = (category, endpoint)
+        if key not in self.histograms:
+            self.histograms[key] = self._new_entry()
+        entry = self.histograms[key]
+        entry['wall_ms'].record(wall_ms)
+        entry['ttfb_ms'].record(ttfb_ms)
+        entry['bytes'].record(size)
+
+    def by_category(self):
+        """Collapse endpoint histograms into one set per category"""
+        merged = {}
+        for (category, _), entry in self.histograms.items():
+            target = merged.setdefault(category, self._new_entry())
+            for metric in self.METRICS:
+                target[metric].merge(entry[metric])
+        return merged
+
+    def report(self, metadata=None):
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'metadata': metadata or {},
+            'categories': {
+                category: {metric: hist.to_dict() for metric, hist in entry.items()}
+                for category, entry in sorted(self.by_category().items())
+            },
+            'endpoints': [
+                {
+                    'category': category,
+                    'endpoint': endpoint,
+                    **{metric: hist.to_dict() for metric, hist in entry.items()}
+                }
+                for (category, endpoint), entry in sorted(self.histograms.items())
+            ]
+        }
+
+    def write(self, path_prefix, metadata=None):
+        """Write <prefix>.json and <prefix>.csv, returning both paths"""
+        report = self.report(metadata)
+        json_path = f"{path_prefix}.json"
+        csv_path = f"{path_prefix}.csv"
+
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        columns = ['count', 'min', 'mean'] + [f'p{pct}' for pct in PERCENTILES] + ['max']
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['category', 'endpoint', 'metric'] + columns)
+            for row in report['endpoints']:
+                for metric in self.METRICS:
+                    writer.writerow([row['category'], row['endpoint'], metric] +
+                                    [round(row[metric][col], 3) for col in columns])
+
+        return json_path, csv_path
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Traffic Replay Engine for TravelwithDENCHE
+Re-issues a request capture (written by the API when REQUEST_CAPTURE_PATH is set)
+against a local server at 1x, 10x or max speed, keeping inter-arrival timing and
+per-session cookies, and reports latency drift against the original capture
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from backend_test import API_BASE, BASE_URL
+from perf_metrics import Histogram, parse_server_timing
+
+ID_SEGMENT = re.compile(r'^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+)$')
+
+
+def endpoint_key(method, path):
+    """Group requests by route, e.g. "GET /api/trips/:slug" """
+    parts = [':id' if ID_SEGMENT.match(part) else part for part in urlsplit(path).path.split('/')]
+    if len(parts) == 4 and parts[1:3] == ['api', 'trips']:
+        parts[3] = ':slug'
+    return f"{method} {'/'.join(parts)}"
+
+
+def load_capture(path, limit=None):
+    """Captured records in request start order (lines are written as responses finish)"""
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    records.sort(key=lambda record: record['ts'])
+    return records[:limit] if limit else records
+
+
+class ReplaySession:
+    """Cookie jar for one captured session, logged in with the captured role"""
+
+    def __init__(self, key, role):
+        self.key = key
+        self.role = role
+        self.cookies = {}
+
+    async def login(self, http):
+        if self.key is None or self.role not in ('admin', 'user'):
+            return
+        # A distinct test identity per captured session keeps their bookings apart
+        async with http.post(f"{API_BASE}/auth/login",
+                             json={'type': self.role, 'email': f"replay-{self.key}@test.dev"}) as response:
+            await response.read()
+            self.update_cookies(response)
+
+    def update_cookies(self, response):
+        if self.key is None or 'demo-session' not in response.cookies:
+            return
+        morsel = response.cookies['demo-session']
+        if morsel.value:
+            self.cookies['demo-session'] = morsel.value
+        else:
+            self.cookies.pop('demo-session', None)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.captured = Histogram()
+        self.replay_server = Histogram()
+        self.replay_wall = Histogram()
+        self.status_mismatches = 0
+        self.errors = 0
+
+    def summary(self):
+        captured_p95 = self.captured.percentile(95)
+        server_p95 = self.replay_server.percentile(95)
+        return {
+            'requests': self.captured.count,
+            'captured_p50_ms': self.captured.percentile(50),
+            'captured_p95_ms': captured_p95,
+            'replay_p50_ms': self.replay_server.percentile(50),
+            'replay_p95_ms': server_p95,
+            'replay_wall_p95_ms': self.replay_wall.percentile(95),
+            'p95_drift': server_p95 / captured_p95 if captured_p95 else None,
+            'status_mismatches': self.status_mismatches,
+            'errors': self.errors
+        }
+
+
+class ReplayEngine:
+    """Replays records open-loop: each request fires at its (scaled) captured offset,
+    whether or not earlier ones have answered. With speed=None they fire as fast as
+    `concurrency` in-flight requests allow.
+    """
+
+    def __init__(self, records, speed=1.0, concurrency=200, connections=200, timeout=30.0):
+        self.records = records
+        self.speed = speed
+        self.concurrency = concurrency
+        self.connections = connections
+        self.timeout = timeout
+        self.stats = {}
+        self.schedule_lag = Histogram()
+        self.sessions = {}
+
+    def session_for(self, record):
+        key = record.get('session')
+        if key not in self.sessions:
+            self.sessions[key] = ReplaySession(key, record.get('role'))
+        return self.sessions[key]
+
+    async def fire(self, http, record, session, scheduled_at, slots):
+        if scheduled_at is not None:
+            self.schedule_lag.record(max(time.monotonic() - scheduled_at, 0) * 1000)
+        stats = self.stats.setdefault(endpoint_key(record['method'], record['path']), EndpointStats())
+        stats.captured.record(record['duration_ms'])
+
+        body = record.get('body')
+        kwargs = {'data': body} if isinstance(body, str) else ({'json': body} if body is not None else {})
+        start = time.perf_counter()
+        try:
+            async with http.request(record['method'], f"{BASE_URL}{record['path']}",
+                                    cookies=session.cookies, **kwargs) as response:
+                await response.read()
+                stats.replay_wall.record((time.perf_counter() - start) * 1000)
+                total = parse_server_timing(response.headers.get('Server-Timing')).get('total', {}).get('dur')
+                if total is not None:
+                    stats.replay_server.record(total)
+                if response.status != record['status']:
+                    stats.status_mismatches += 1
+                session.update_cookies(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            stats.errors += 1
+        finally:
+            if slots:
+                slots.release()
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         cookie_jar=aiohttp.DummyCookieJar()) as http:
+            for record in self.records:
+                self.session_for(record)
+            # Log every session in before the clock starts, so logins don't skew timing
+            await asyncio.gather(*(session.login(http) for session in self.sessions.values()))
+
+            slots = asyncio.Semaphore(self.concurrency) if self.speed is None else None
+            first_ts = self.records[0]['ts']
+            started = time.monotonic()
+            tasks = []
+            for record in self.records:
+                scheduled_at = None
+                if slots:
+                    await slots.acquire()
+                else:
+                    scheduled_at = started + (record['ts'] - first_ts) / 1000 / self.speed
+                    delay = scheduled_at - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(
+                    self.fire(http, record, self.session_for(record), scheduled_at, slots)))
+            await asyncio.gather(*tasks)
+            elapsed = time.monotonic() - started
+
+        captured_span = max((self.records[-1]['ts'] - first_ts) / 1000, 1e-9)
+        return {
+            'requests': len(self.records),
+            'sessions': len(self.sessions),
+            'captured_span_s': captured_span,
+            'replay_span_s': elapsed,
+            'effective_speed': captured_span / max(elapsed, 1e-9),
+            'schedule_lag_p95_ms': self.schedule_lag.percentile(95) if self.schedule_lag.count else None,
+            'endpoints': {key: stats.summary() for key, stats in sorted(self.stats.items())}
+        }
+
+
+def print_report(summary):
+    print("\n" + "="*104)
+    print("🔁 REPLAY RESULTS (server-side ms: capture vs replay)")
+    print("="*104)
+    print(f"{'ENDPOINT':<36}{'REQS':>7}{'CAP P50':>9}{'CAP P95':>9}{'REP P50':>9}{'REP P95':>9}"
+          f"{'DRIFT':>8}{'STATUS≠':>9}{'ERR':>6}")
+    for endpoint, row in summary['endpoints'].items():
+        drift = f"{row['p95_drift']:.2f}x" if row['p95_drift'] is not None else '-'
+        print(f"{endpoint:<36}{row['requests']:>7}{row['captured_p50_ms']:>9.1f}{row['captured_p95_ms']:>9.1f}"
+              f"{row['replay_p50_ms']:>9.1f}{row['replay_p95_ms']:>9.1f}{drift:>8}"
+              f"{row['status_mismatches']:>9}{row['errors']:>6}")
+    print("-" * 104)
+    lag = summary['schedule_lag_p95_ms']
+    print(f"🎯 {summary['requests']} requests from {summary['sessions']} sessions: "
+          f"{summary['captured_span_s']:.1f}s captured, replayed in {summary['replay_span_s']:.1f}s "
+          f"({summary['effective_speed']:.1f}x)" + (f", schedule lag p95 {lag:.1f}ms" if lag is not None else ""))
+
+
+def parse_speed(value):
+    if value == 'max':
+        return None
+    speed = float(value.rstrip('x'))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive")
+    return speed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a TravelwithDENCHE request capture")
+    parser.add_argument('capture', help="JSONL file written with REQUEST_CAPTURE_PATH")
+    parser.add_argument('--speed', type=parse_speed, default=1.0,
+                        help="time scale: 1, 10 (ten times faster) or max")
+    parser.add_argument('--concurrency', type=int, default=200, help="max: requests in flight")
+    parser.add_argument('--connections', type=int, default=200, help="size of the shared connection pool")
+    parser.add_argument('--limit', type=int, help="only replay the first N requests")
+    parser.add_argument('--max-drift', type=float,
+                        help="fail when an endpoint's replay p95 exceeds the captured p95 by this ratio")
+    parser.add_argument('--min-samples', type=int, default=20,
+                        help="max-drift: ignore endpoints with fewer requests")
+    parser.add_argument('--json', metavar='PATH', help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    records = load_capture(args.capture, args.limit)
+    if not records:
+        print(f"❌ No requests in {args.capture}")
+        return False
+
+    speed = 'max' if args.speed is None else f"{args.speed:g}x"
+    print("🚀 Starting TravelwithDENCHE traffic replay...")
+    print(f"🌐 Target: {BASE_URL} | capture: {args.capture} ({len(records)} requests) | speed: {speed}")
+    engine = ReplayEngine(records, speed=args.speed, concurrency=args.concurrency,
+                          connections=args.connections)
+    summary = asyncio.run(engine.run())
+    print_report(summary)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    success = all(row['errors'] == 0 for row in summary['endpoints'].values())
+    if args.max_drift is not None:
+        for endpoint, row in summary['endpoints'].items():
+            if row['requests'] >= args.min_samples and (row['p95_drift'] or 0) > args.max_drift:
+                print(f"❌ {endpoint}: p95 drift {row['p95_drift']:.2f}x > {args.max_drift:.2f}x")
+                success = False
+    return success
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
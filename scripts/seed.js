@@ -1,6 +1,8 @@
 // Seed script for TravelwithDENCHE
 import { MongoClient } from 'mongodb';
 import { v4 as uuidv4 } from 'uuid';
+import { ensureIndexes } from '../lib/indexes.js';
+import { rebuildDashboardStats } from '../lib/stats.js';
 
 const uri = process.env.MONGO_URL || 'mongodb://localhost:27017';
 const dbName = process.env.DB_NAME || 'travelwithdenche';
@@ -257,6 +259,14 @@ Whether you're a seasoned hiker or taking your first steps into mountain adventu
     });
     console.log('  ✅ Created admin user');
     
+    // 7. Indexes
+    await ensureIndexes(db);
+    console.log('  ✅ Ensured indexes');
+    
+    // 8. Dashboard counters
+    await rebuildDashboardStats(db);
+    console.log('  ✅ Rebuilt dashboard stats');
+    
     console.log('🎉 Database seeded successfully!');
     console.log('\n📝 Summary:');
     console.log('  - Site configured for TravelwithDENCHE');
@@ -265,6 +275,7 @@ Whether you're a seasoned hiker or taking your first steps into mountain adventu
     console.log('  - 3 testimonials added');
     console.log('  - Admin user created for aimen.denche18@gmail.com');
     console.log('  - Standard refund policy created');
+    console.log('  - Indexes ensured on all collections');
     console.log('\n🚀 Ready to launch! Visit /auth to sign in as admin.');
     
   } catch (error) {
@@ -0,0 +1,149 @@
+"""
+Fixtures for the TravelwithDENCHE API test suite
+Every test logs in its own users and creates its own trips and departures, so the
+suite can run in parallel worker processes: python -m pytest -n auto
+"""
+
+import fcntl
+import os
+import uuid
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from backend_test import API_BASE, query_budget
+from perf_metrics import db_command_count
+from .helpers import departure_payload
+
+
+class ApiClient(requests.Session):
+    """Session against API_BASE that checks every response against QUERY_BUDGETS"""
+
+    def __init__(self):
+        super().__init__()
+        self.user = None
+        self.last_db_commands = None
+        self.budget_violations = []
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith('/'):
+            url = f"{API_BASE}{url}"
+        kwargs.setdefault('timeout', 10)
+        response = super().request(method, url, *args, **kwargs)
+
+        endpoint = f"{method.upper()} {urlsplit(url).path}"
+        self.last_db_commands = db_command_count(response.headers.get('Server-Timing'))
+        if self.last_db_commands is not None:
+            budget = query_budget(endpoint)
+            if budget is None or self.last_db_commands > budget:
+                self.budget_violations.append(
+                    f"{endpoint}: {self.last_db_commands} MongoDB commands, budget {budget}")
+        return response
+
+
+@pytest.fixture(scope='session', autouse=True)
+def api_server():
+    try:
+        requests.get(API_BASE, timeout=5)
+    except requests.ConnectionError:
+        pytest.skip(f"API server not reachable at {API_BASE}")
+
+
+@pytest.fixture(autouse=True)
+def global_state_lock(request, tmp_path_factory):
+    """Shared lock for ordinary tests, exclusive for tests marked `quiescent`.
+
+    Catalog cache hit ratios, dashboard counters and whole-collection listings
+    are process-wide, so tests asserting on them must not overlap with tests
+    that write. The lock file lives in the base temp dir all xdist workers share.
+    """
+    root = tmp_path_factory.getbasetemp()
+    if os.environ.get('PYTEST_XDIST_WORKER'):
+        root = root.parent
+    exclusive = request.node.get_closest_marker('quiescent') is not None
+    with open(root / 'global-state.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+@pytest.fixture
+def make_client():
+    clients = []
+
+    def make():
+        client = ApiClient()
+        clients.append(client)
+        return client
+
+    yield make
+
+    violations = [v for client in clients for v in client.budget_violations]
+    for client in clients:
+        client.close()
+    assert not violations, "Query budget exceeded:\n" + "\n".join(violations)
+
+
+@pytest.fixture
+def login(make_client):
+    """Log in a fresh demo identity with the given role, returning its client"""
+    def login(role='user'):
+        client = make_client()
+        email = f"{role}-{uuid.uuid4().hex[:12]}@test.dev"
+        response = client.post('/auth/login', json={'type': role, 'email': email})
+        assert response.status_code == 200, response.text
+        client.user = response.json()['user']
+        return client
+    return login
+
+
+@pytest.fixture
+def admin(login):
+    return login('admin')
+
+
+@pytest.fixture
+def user(login):
+    return login('user')
+
+
+@pytest.fixture
+def anonymous(make_client):
+    return make_client()
+
+
+@pytest.fixture
+def make_trip(admin):
+    def make(**fields):
+        key = uuid.uuid4().hex[:12]
+        response = admin.post('/admin/trips', json={
+            'title': f"Test trip {key}",
+            'subtitle': 'Created by the API test suite',
+            'difficulty': 'easy',
+            'featured': False,
+            'active': True,
+            **fields
+        })
+        assert response.status_code == 200, response.text
+        return response.json()['trip']
+    return make
+
+
+@pytest.fixture
+def trip(make_trip):
+    return make_trip()
+
+
+@pytest.fixture
+def make_departure(admin, trip):
+    def make(capacity=4, allow_free_rsvp=True, days_ahead=90, price_cents=49900, trip_id=None):
+        response = admin.post('/admin/departures', json=departure_payload(
+            trip_id or trip['id'], capacity=capacity, allow_free_rsvp=allow_free_rsvp,
+            days_ahead=days_ahead, price_cents=price_cents))
+        assert response.status_code == 200, response.text
+        return response.json()['departure']
+    return make
+
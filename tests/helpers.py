@@ -0,0 +1,52 @@
+"""
+Shared request helpers for the TravelwithDENCHE API test suite
+Also used by backend_test.py and load_test.py, so it imports nothing from them
+"""
+
+from datetime import datetime, timedelta
+
+
+def departure_payload(trip_id, capacity=4, allow_free_rsvp=True, days_ahead=90, price_cents=49900,
+                      deposit_cents=15000, **fields):
+    """Body for POST /api/admin/departures (or one bulk item): a 3-day departure `days_ahead` from now"""
+    start = datetime.now() + timedelta(days=days_ahead)
+    return {
+        'trip_id': trip_id,
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(days=3)).isoformat(),
+        'capacity': capacity,
+        'base_price_cents': price_cents,
+        'currency': 'EUR',
+        'deposit_cents': deposit_cents,
+        'allow_free_rsvp': allow_free_rsvp,
+        **fields
+    }
+
+
+def trip_departure(client, slug, departure_id):
+    """The departure as the public trip detail endpoint currently reports it"""
+    response = client.get(f"/trips/{slug}")
+    assert response.status_code == 200, response.text
+    return next(d for d in response.json()['trip']['departures'] if d['id'] == departure_id)
+
+
+def walk_pages(client, path, key, limit=1, fields=None):
+    """Follow next_cursor until exhausted, returning (rows, page_count)"""
+    rows = []
+    pages = 0
+    cursor = None
+    while True:
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        if fields:
+            params['fields'] = fields
+        response = client.get(path, params=params)
+        assert response.status_code == 200, f"{path} page {pages + 1}: {response.text}"
+        data = response.json()
+        rows.extend(data.get(key, []))
+        pages += 1
+        cursor = data.get('next_cursor')
+        if not cursor:
+            return rows, pages
+        assert pages <= 10000, f"{path} did not terminate"
@@ -0,0 +1,44 @@
+import pytest
+
+
+def test_dashboard_stats(admin):
+    response = admin.get('/admin/dashboard')
+    assert response.status_code == 200
+    data = response.json()
+    assert {'total_bookings', 'total_revenue', 'upcoming_departures'} <= set(data['stats'])
+    assert isinstance(data['upcoming_departures'], list)
+
+
+def test_admin_trips_list(admin, trip):
+    response = admin.get('/admin/trips', params={'limit': 10, 'fields': 'id'})
+    assert response.status_code == 200
+    assert response.json()['trips']
+
+
+def test_non_admin_denied(user, anonymous):
+    assert user.get('/admin/dashboard').status_code == 403
+    assert anonymous.get('/admin/dashboard').status_code == 401
+
+
+@pytest.mark.quiescent
+def test_dashboard_counters_track_bookings(admin, make_departure, user):
+    before = admin.get('/admin/dashboard').json()
+    departure = make_departure(capacity=1)
+    assert user.post('/bookings', json={'departure_id': departure['id'], 'seats': 1}).status_code == 200
+    after = admin.get('/admin/dashboard').json()
+
+    assert after['stats']['total_bookings'] - before['stats']['total_bookings'] == 1
+    starts = [d['start_date'] for d in after['upcoming_departures']]
+    assert starts == sorted(starts)
+
+
+def test_process_metrics(admin, user):
+    response = admin.get('/admin/metrics')
+    assert response.status_code == 200
+    # Sampling must not load the database it is watching
+    assert admin.last_db_commands in (None, 0)
+    data = response.json()
+    assert data['memory']['rss_mb'] > 0
+    assert data['mongo_pool']['open'] >= 1
+    assert {'p50_ms', 'p99_ms', 'max_ms'} <= set(data['event_loop'])
+    assert user.get('/admin/metrics').status_code == 403
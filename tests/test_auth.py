@@ -0,0 +1,73 @@
+import base64
+import json
+from urllib.parse import quote
+
+
+def test_admin_login(admin):
+    assert admin.user['role'] == 'admin'
+    assert admin.cookies.get('demo-session', '').startswith('v1.')
+
+
+def test_user_login(user):
+    assert user.user['role'] == 'user'
+
+
+def test_me_returns_session_user(admin, user):
+    for client, role in ((admin, 'admin'), (user, 'user')):
+        response = client.get('/auth/me')
+        assert response.status_code == 200
+        assert response.json()['user']['email'] == client.user['email']
+        assert response.json()['user']['role'] == role
+
+
+def test_login_rejects_non_test_identity(anonymous):
+    response = anonymous.post('/auth/login', json={'type': 'admin', 'email': 'someone@example.com'})
+    assert response.status_code == 400
+
+
+def test_logout_revokes_session(user, anonymous):
+    session_value = user.cookies['demo-session']
+    response = user.post('/auth/logout')
+    assert response.status_code == 200
+    assert response.json()['success']
+
+    # The cookie is revoked server-side, not just cleared in the browser
+    replay = anonymous.get('/bookings', cookies={'demo-session': session_value})
+    assert replay.status_code == 401
+
+
+def test_role_change_overrides_session_claims(make_client, user):
+    promoted = make_client()
+    response = promoted.post('/auth/login', json={'type': 'admin', 'email': user.user['email']})
+    assert response.status_code == 200
+    # The old cookie still claims `user`; the stored role change makes it re-resolve
+    assert user.get('/auth/me').json()['user']['role'] == 'admin'
+
+
+def test_tampered_and_forged_cookies_rejected(user, anonymous):
+    session_value = user.cookies['demo-session']
+    version, payload, signature = session_value.split('.')
+    claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    forged = base64.urlsafe_b64encode(json.dumps(dict(claims, role='admin')).encode()).decode().rstrip('=')
+
+    for value, path, expected in (
+        (f"{version}.{payload}.{signature[:-2]}xx", '/bookings', 401),
+        (f"{version}.{forged}.{signature}", '/admin/dashboard', 401),
+        (session_value, '/admin/dashboard', 403)
+    ):
+        response = anonymous.get(path, cookies={'demo-session': value})
+        assert response.status_code == expected, f"{path} with {value[:20]}..."
+
+
+def test_signed_session_skips_users_lookup(user):
+    response = user.get('/auth/me')
+    assert response.json()['user']['email'] == user.user['email']
+    assert user.last_db_commands == 0
+
+
+def test_legacy_unsigned_cookie_rejected(user, anonymous):
+    legacy = quote(json.dumps({'email': user.user['email'], 'role': 'user'}))
+    response = anonymous.get('/auth/me', cookies={'demo-session': legacy})
+    assert response.status_code == 200
+    assert response.json()['user'] is None
+    assert anonymous.get('/bookings', cookies={'demo-session': legacy}).status_code == 401
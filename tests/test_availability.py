@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+
+def sse_events(response):
+    """Yield (event, data) pairs from a text/event-stream response"""
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line == '':
+            if data:
+                yield event, json.loads('\n'.join(data))
+            event, data = None, []
+        elif line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].strip())
+
+
+def availability(client, *departures):
+    return client.get('/departures/availability', params={'ids': ','.join(d['id'] for d in departures)})
+
+
+def test_batch_returns_only_seat_counts(make_departure, anonymous):
+    open_departure = make_departure(capacity=3)
+    full = make_departure(capacity=0)
+
+    response = availability(anonymous, open_departure, full, {'id': 'no-such-departure'})
+    assert response.status_code == 200
+    rows = {row['id']: row for row in response.json()['departures']}
+    assert rows == {
+        open_departure['id']: {'id': open_departure['id'], 'spots_left': 3, 'status': 'available'},
+        full['id']: {'id': full['id'], 'spots_left': 0, 'status': 'full'}
+    }
+
+
+def test_batch_reflects_bookings(make_departure, user, anonymous):
+    departure = make_departure(capacity=4)
+    user.post('/bookings', json={'departure_id': departure['id'], 'seats': 3})
+    assert availability(anonymous, departure).json()['departures'][0]['spots_left'] == 1
+
+
+@pytest.mark.parametrize('ids', ['', ','.join(f"id-{i}" for i in range(101))], ids=['empty', 'too-many'])
+def test_batch_rejects_bad_id_lists(anonymous, ids):
+    assert anonymous.get('/departures/availability', params={'ids': ids}).status_code == 400
+
+
+def test_stream_pushes_spots_left_changes(make_departure, user, anonymous):
+    departure = make_departure(capacity=5)
+    other = make_departure(capacity=5)
+
+    with anonymous.get('/departures/availability/stream', params={'ids': departure['id']},
+                       stream=True) as response:
+        assert response.status_code == 200
+        assert response.headers['Content-Type'].startswith('text/event-stream')
+        events = sse_events(response)
+
+        event, data = next(events)
+        assert event == 'snapshot'
+        assert data['departures'] == [{'id': departure['id'], 'spots_left': 5, 'status': 'available'}]
+
+        # Bookings on departures the client did not ask for are not sent
+        user.post('/bookings', json={'departure_id': other['id'], 'seats': 1})
+        user.post('/bookings', json={'departure_id': departure['id'], 'seats': 2})
+        assert next(events) == ('availability', {'id': departure['id'], 'spots_left': 3, 'status': 'available'})
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .helpers import departure_payload, trip_departure
+
+
+def book(client, departure, seats=1):
+    return client.post('/bookings', json={'departure_id': departure['id'], 'seats': seats})
+
+
+def test_free_rsvp_booking(make_departure, user):
+    response = book(user, make_departure(allow_free_rsvp=True))
+    assert response.status_code == 200
+    data = response.json()
+    assert data['booking']['status'] == 'reserved_unpaid'
+    assert not data['payment_required']
+
+
+def test_paid_booking_requires_deposit(make_departure, user):
+    response = book(user, make_departure(allow_free_rsvp=False))
+    assert response.status_code == 200
+    data = response.json()
+    assert data['booking']['status'] == 'pending_deposit'
+    assert data['payment_required']
+    assert data['checkout_url']
+
+
+def test_user_sees_only_own_bookings(make_departure, login):
+    departure = make_departure(capacity=10)
+    alice, bob = login('user'), login('user')
+    mine = {book(alice, departure).json()['booking']['id'] for _ in range(2)}
+    book(bob, departure)
+
+    response = alice.get('/bookings')
+    assert response.status_code == 200
+    assert {b['id'] for b in response.json()['bookings']} == mine
+
+
+def test_admin_bookings_filtered_by_departure(make_departure, user, admin):
+    departure, other = make_departure(capacity=10), make_departure(capacity=10)
+    wanted = {book(user, departure).json()['booking']['id'] for _ in range(2)}
+    book(user, other)
+
+    response = admin.get('/bookings', params={'departure_id': departure['id'], 'fields': 'id,departure_id'})
+    assert response.status_code == 200
+    assert {b['id'] for b in response.json()['bookings']} == wanted
+
+
+def test_bookings_require_auth(anonymous):
+    assert anonymous.get('/bookings').status_code == 401
+
+
+def test_spots_left_decrements(trip, make_departure, user, anonymous):
+    departure = make_departure(capacity=5)
+    book(user, departure, seats=2)
+    assert trip_departure(anonymous, trip['slug'], departure['id'])['spots_left'] == 3
+
+
+@pytest.mark.parametrize('seats', [0, -1, 1.5, 'two'])
+def test_invalid_seats_rejected(make_departure, user, seats):
+    assert book(user, make_departure(), seats=seats).status_code == 400
+
+
+def test_unknown_departure_is_404(user):
+    assert book(user, {'id': 'no-such-departure'}).status_code == 404
+
+
+@pytest.mark.parametrize('free', [True, False], ids=['free-rsvp', 'paid'])
+def test_reservation_path_never_oversells(trip, make_departure, user, anonymous, free, capacity=3):
+    departure = make_departure(capacity=capacity, allow_free_rsvp=free)
+    for _ in range(capacity):
+        assert book(user, departure).status_code == 200
+        # Reserve, insert, counter update: no extra reads on the write path
+        assert user.last_db_commands is None or user.last_db_commands <= 3
+
+    assert book(user, departure).status_code == 400
+    assert trip_departure(anonymous, trip['slug'], departure['id'])['spots_left'] == 0
+
+
+def test_booking_after_deadline_rejected(admin, trip, user):
+    past = (datetime.now() - timedelta(days=1)).isoformat()
+    response = admin.post('/admin/departures', json=departure_payload(trip['id'], booking_deadline=past))
+    assert response.status_code == 200, response.text
+    departure = response.json()['departure']
+
+    response = book(user, departure)
+    assert response.status_code == 400
+    assert response.json()['error'] == 'Booking deadline has passed'
+    # The closed departure's seats were never taken
+    assert trip_departure(admin, trip['slug'], departure['id'])['spots_left'] == departure['capacity']
@@ -0,0 +1,65 @@
+import uuid
+
+import pytest
+
+from .helpers import departure_payload
+
+
+def test_bulk_trips_created(admin):
+    key = uuid.uuid4().hex[:12]
+    items = [{'title': f"Bulk trip {key} {i}", 'difficulty': 'easy', 'active': False} for i in range(3)]
+
+    response = admin.post('/admin/trips/bulk', json={'items': items})
+    assert response.status_code == 200
+    data = response.json()
+    assert data['created'] == 3
+    assert [r['status'] for r in data['results']] == ['created'] * 3
+    assert all(r['id'] for r in data['results'])
+
+
+def test_bulk_departures_set_spots_left(admin, trip, anonymous):
+    response = admin.post('/admin/departures/bulk', json={'items': [departure_payload(trip['id'], capacity=6)]})
+    departure_id = response.json()['results'][0]['id']
+
+    availability = anonymous.get('/departures/availability', params={'ids': departure_id}).json()
+    assert availability['departures'][0]['spots_left'] == 6
+
+
+def test_ordered_bulk_stops_at_first_invalid_item(admin, trip):
+    items = [departure_payload(trip['id']), departure_payload(trip['id'], capacity=-1), departure_payload(trip['id'])]
+
+    data = admin.post('/admin/departures/bulk', json={'items': items, 'ordered': True}).json()
+    assert [r['status'] for r in data['results']] == ['created', 'invalid', 'skipped']
+    assert data['results'][1]['errors'] == ['capacity must be a non-negative integer']
+
+
+def test_unordered_bulk_reports_each_failure(admin, trip):
+    items = [
+        departure_payload(trip['id']),
+        departure_payload('no-such-trip'),
+        departure_payload(trip['id'], currency='euro'),
+        departure_payload(trip['id'])
+    ]
+
+    data = admin.post('/admin/departures/bulk', json={'items': items, 'ordered': False}).json()
+    assert [r['status'] for r in data['results']] == ['created', 'invalid', 'invalid', 'created']
+    assert (data['created'], data['invalid']) == (2, 2)
+
+
+def test_resent_ids_fail_as_duplicates(admin):
+    trip_id = str(uuid.uuid4())
+    item = {'id': trip_id, 'title': f"Bulk trip {trip_id}", 'active': False}
+    assert admin.post('/admin/trips/bulk', json={'items': [item]}).json()['created'] == 1
+
+    data = admin.post('/admin/trips/bulk', json={'items': [item], 'ordered': False}).json()
+    assert data['results'] == [{'index': 0, 'status': 'failed', 'errors': ['id already exists']}]
+
+
+@pytest.mark.parametrize('body', [{}, {'items': []}, {'items': [{}] * 1001}, {'items': [{}], 'ordered': 'yes'}],
+                         ids=['missing', 'empty', 'too-many', 'bad-ordered'])
+def test_bulk_rejects_malformed_requests(admin, body):
+    assert admin.post('/admin/trips/bulk', json=body).status_code == 400
+
+
+def test_bulk_requires_admin(user):
+    assert user.post('/admin/trips/bulk', json={'items': [{'title': 'Nope'}]}).status_code == 403
@@ -0,0 +1,37 @@
+import pytest
+
+from .helpers import trip_departure
+
+
+pytestmark = pytest.mark.quiescent
+
+
+def test_admin_write_invalidates_then_warms(trip, make_departure, anonymous, warm_reads=20):
+    departure = make_departure()
+
+    cold = anonymous.get(f"/trips/{trip['slug']}")
+    assert cold.headers.get('X-Cache') == 'MISS'
+    assert any(d['id'] == departure['id'] for d in cold.json()['trip']['departures'])
+
+    statuses = [anonymous.get(f"/trips/{trip['slug']}").headers.get('X-Cache') for _ in range(warm_reads)]
+    assert statuses == ['HIT'] * warm_reads
+
+
+def test_booking_invalidates_spots_left(trip, make_departure, user, anonymous):
+    departure = make_departure(capacity=4)
+    anonymous.get(f"/trips/{trip['slug']}")
+
+    response = user.post('/bookings', json={'departure_id': departure['id'], 'seats': 1})
+    assert response.status_code == 200
+
+    assert trip_departure(anonymous, trip['slug'], departure['id'])['spots_left'] == 3
+
+
+def test_etag_conditional_request(anonymous):
+    response = anonymous.get('/trips')
+    etag = response.headers.get('ETag')
+    assert etag
+
+    conditional = anonymous.get('/trips', headers={'If-None-Match': etag})
+    assert conditional.status_code == 304
+    assert not conditional.content
@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+
+def recent():
+    return (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+
+
+def test_bookings_ndjson_export(admin, make_departure, user, trip):
+    departure = make_departure()
+    booking = user.post('/bookings', json={'departure_id': departure['id'], 'seats': 2}).json()['booking']
+
+    response = admin.get('/admin/export/bookings', params={'from': recent()})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('application/x-ndjson')
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    row = next(r for r in rows if r['id'] == booking['id'])
+    assert row['seats'] == 2
+    assert row['trip_title'] == trip['title']
+    assert row['departure_start_date']
+    created = [r['created_at'] for r in rows]
+    assert created == sorted(created)
+
+
+def test_payments_csv_export(admin):
+    response = admin.get('/admin/export/payments', params={'format': 'csv', 'from': recent()})
+    assert response.status_code == 200
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert reader.fieldnames[:3] == ['id', 'booking_id', 'type']
+
+
+def test_export_date_range_excludes_older_rows(admin):
+    future = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    response = admin.get('/admin/export/bookings', params={'from': future})
+    assert response.status_code == 200
+    assert response.text == ''
+
+
+def test_export_rejects_bad_params_and_non_admins(admin, user):
+    assert admin.get('/admin/export/bookings', params={'format': 'xml'}).status_code == 400
+    assert admin.get('/admin/export/bookings', params={'from': 'yesterday'}).status_code == 400
+    assert user.get('/admin/export/bookings').status_code == 403
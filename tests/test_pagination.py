@@ -0,0 +1,44 @@
+import pytest
+
+from .helpers import walk_pages
+
+
+def test_user_bookings_pagination(make_departure, user):
+    departure = make_departure(capacity=10)
+    booked = [user.post('/bookings', json={'departure_id': departure['id'], 'seats': 1}).json()['booking']['id']
+              for _ in range(5)]
+
+    small, pages = walk_pages(user, '/bookings', 'bookings', limit=2, fields='id')
+    large, _ = walk_pages(user, '/bookings', 'bookings', limit=500, fields='id')
+
+    assert pages == 3
+    assert [b['id'] for b in small] == [b['id'] for b in large]
+    assert {b['id'] for b in small} == set(booked)
+
+
+@pytest.mark.quiescent
+@pytest.mark.parametrize('path, key, role', [
+    ('/trips', 'trips', None),
+    ('/admin/trips', 'trips', 'admin'),
+    ('/bookings', 'bookings', 'admin')
+])
+def test_global_lists_paginate_consistently(login, anonymous, path, key, role):
+    client = login(role) if role else anonymous
+    small, pages = walk_pages(client, path, key, limit=50, fields='id')
+    large, _ = walk_pages(client, path, key, limit=500, fields='id')
+
+    small_ids = [row['id'] for row in small]
+    assert len(small_ids) == len(set(small_ids)), "duplicate rows across pages"
+    assert small_ids == [row['id'] for row in large]
+
+
+def test_field_projection(anonymous):
+    response = anonymous.get('/trips', params={'fields': 'slug,title'})
+    assert response.status_code == 200
+    trips = response.json()['trips']
+    assert trips
+    assert {field for trip in trips for field in trip} <= {'slug', 'title', 'id', 'featured', 'created_at'}
+
+
+def test_invalid_cursor_is_400(anonymous):
+    assert anonymous.get('/trips', params={'cursor': 'not-a-cursor'}).status_code == 400
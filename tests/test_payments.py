@@ -0,0 +1,125 @@
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+def checkout_completed(booking_id, intent, amount=15000):
+    return {
+        'id': f"evt_{uuid.uuid4().hex}",
+        'type': 'checkout.session.completed',
+        'data': {'object': {
+            'id': f"cs_test_{uuid.uuid4().hex}",
+            'payment_intent': intent,
+            'amount_total': amount,
+            'currency': 'eur',
+            'metadata': {'booking_id': booking_id, 'type': 'deposit'}
+        }}
+    }
+
+
+def charge_refunded(intent, amount=15000, refunded_before=0):
+    return {
+        'id': f"evt_{uuid.uuid4().hex}",
+        'type': 'charge.refunded',
+        'data': {'object': {
+            'id': f"ch_test_{intent}",
+            'payment_intent': intent,
+            'amount_refunded': refunded_before + amount,
+            'currency': 'eur',
+            'refunds': {'data': [{'id': f"re_test_{uuid.uuid4().hex}", 'amount': amount}]}
+        }}
+    }
+
+
+def wait_for_status(client, booking_id, status, timeout=15.0):
+    """Poll the user's bookings until the webhook worker has applied the event"""
+    deadline = time.monotonic() + timeout
+    while True:
+        bookings = client.get('/bookings', params={'fields': 'id,status'}).json()['bookings']
+        current = next(b['status'] for b in bookings if b['id'] == booking_id)
+        if current == status or time.monotonic() > deadline:
+            return current
+        time.sleep(0.2)
+
+
+@pytest.fixture
+def paid_booking(make_departure, user):
+    departure = make_departure(allow_free_rsvp=False)
+    response = user.post('/bookings', json={'departure_id': departure['id'], 'seats': 1})
+    assert response.status_code == 200
+    return response.json()['booking']
+
+
+def test_webhook_acknowledged(anonymous):
+    response = anonymous.post('/payments/webhook',
+                              json=checkout_completed('test-booking-id', f"pi_test_{uuid.uuid4().hex}"),
+                              headers={'stripe-signature': 'test-signature'})
+    assert response.status_code == 200
+    assert response.json()['received']
+
+
+def test_invalid_webhook_is_400(anonymous):
+    assert anonymous.post('/payments/webhook', json={'invalid': 'payload'}).status_code == 400
+
+
+def test_redelivered_event_is_duplicate(anonymous):
+    event = checkout_completed('test-booking-id', f"pi_test_{uuid.uuid4().hex}")
+    assert not anonymous.post('/payments/webhook', json=event).json()['duplicate']
+    assert anonymous.post('/payments/webhook', json=event).json()['duplicate']
+
+
+def test_checkout_then_refund_updates_booking(paid_booking, user, anonymous):
+    intent = f"pi_test_{uuid.uuid4().hex}"
+    for event in (checkout_completed(paid_booking['id'], intent),
+                  checkout_completed(paid_booking['id'], intent)):
+        assert anonymous.post('/payments/webhook', json=event).status_code == 200
+    assert wait_for_status(user, paid_booking['id'], 'reserved_deposit_paid') == 'reserved_deposit_paid'
+
+    assert anonymous.post('/payments/webhook', json=charge_refunded(intent)).status_code == 200
+    assert wait_for_status(user, paid_booking['id'], 'refunded') == 'refunded'
+
+
+def wait_for_queue(admin, timeout=15.0):
+    """Wait until the webhook worker has nothing pending or in flight"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        queue = admin.get('/admin/webhooks').json()['queue']
+        if queue['pending'] == 0 and queue['processing'] == 0:
+            return
+        time.sleep(0.2)
+
+
+def test_checkout_resent_after_refund_keeps_booking_refunded(paid_booking, user, admin, anonymous):
+    intent = f"pi_test_{uuid.uuid4().hex}"
+    assert anonymous.post('/payments/webhook', json=checkout_completed(paid_booking['id'], intent)).status_code == 200
+    assert wait_for_status(user, paid_booking['id'], 'reserved_deposit_paid') == 'reserved_deposit_paid'
+    assert anonymous.post('/payments/webhook', json=charge_refunded(intent)).status_code == 200
+    assert wait_for_status(user, paid_booking['id'], 'refunded') == 'refunded'
+
+    # Same payment, new event id: the ledger row exists, so nothing may change
+    resent = checkout_completed(paid_booking['id'], intent)
+    assert not anonymous.post('/payments/webhook', json=resent).json()['duplicate']
+    wait_for_queue(admin)
+
+    assert wait_for_status(user, paid_booking['id'], 'refunded', timeout=0) == 'refunded'
+
+
+def test_partial_refunds_on_one_intent_are_both_recorded(paid_booking, user, admin, anonymous):
+    intent = f"pi_test_{uuid.uuid4().hex}"
+    since = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    assert anonymous.post('/payments/webhook', json=checkout_completed(paid_booking['id'], intent)).status_code == 200
+    assert wait_for_status(user, paid_booking['id'], 'reserved_deposit_paid') == 'reserved_deposit_paid'
+
+    for event in (charge_refunded(intent, amount=5000),
+                  charge_refunded(intent, amount=4000, refunded_before=5000)):
+        assert not anonymous.post('/payments/webhook', json=event).json()['duplicate']
+    wait_for_queue(admin)
+
+    rows = [json.loads(line) for line in
+            admin.get('/admin/export/payments', params={'from': since}).text.splitlines()]
+    refunds = sorted(r['amount_cents'] for r in rows
+                     if r['stripe_payment_intent_id'] == intent and r['type'] == 'refund')
+    assert refunds == [-5000, -4000]
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def test_catalog_lists_seeded_trip(anonymous):
+    response = anonymous.get('/trips')
+    assert response.status_code == 200
+    assert any(trip['slug'] == 'alps-hiking-escape' for trip in response.json()['trips'])
+
+
+def test_trip_detail(anonymous):
+    response = anonymous.get('/trips/alps-hiking-escape')
+    assert response.status_code == 200
+    trip = response.json()['trip']
+    assert trip['slug'] == 'alps-hiking-escape'
+    assert trip['departures']
+
+
+def test_unknown_slug_is_404(anonymous):
+    assert anonymous.get('/trips/non-existent-trip').status_code == 404
+
+
+def test_admin_trip_creation(make_trip, anonymous):
+    trip = make_trip(title=f"Test Mountain Adventure {uuid.uuid4().hex[:8]}", difficulty='moderate')
+    response = anonymous.get(f"/trips/{trip['slug']}")
+    assert response.status_code == 200
+    assert response.json()['trip']['id'] == trip['id']
+
+
+def test_non_admin_cannot_create_trips(user):
+    response = user.post('/admin/trips', json={'title': 'Not allowed'})
+    assert response.status_code == 403
+
+
+@pytest.fixture
+def search_trips(make_trip, make_departure):
+    """Two trips sharing a unique search token, with departures at different dates and prices"""
+    token = f"zq{uuid.uuid4().hex[:10]}"
+    trips = {}
+    for key, difficulty, days, price in (('near', 'easy', 40, 30000), ('far', 'moderate', 200, 90000)):
+        trips[key] = make_trip(title=f"Search {token} {key}", difficulty=difficulty)
+        make_departure(days_ahead=days, price_cents=price, trip_id=trips[key]['id'])
+    return token, trips
+
+
+TODAY = datetime.now()
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({}, {'near', 'far'}),
+    ({'difficulty': 'easy'}, {'near'}),
+    ({'from': (TODAY + timedelta(days=100)).isoformat(), 'to': (TODAY + timedelta(days=300)).isoformat()}, {'far'}),
+    ({'min_price': 10000, 'max_price': 50000}, {'near'}),
+    ({'difficulty': 'moderate', 'max_price': 50000}, set())
+], ids=['text', 'difficulty', 'date-range', 'price-range', 'combined'])
+def test_search_filters(search_trips, anonymous, params, expected):
+    token, trips = search_trips
+    response = anonymous.get('/trips', params={'q': token, **params})
+    assert response.status_code == 200
+    results = response.json()['trips']
+
+    ids = {trip['id']: key for key, trip in trips.items()}
+    assert {ids[t['id']] for t in results if t['id'] in ids} == expected
+    assert [t['slug'] for t in results if t['id'] not in ids] == []
+
+    # Date/price filters also narrow the embedded departures
+    for result in results:
+        for departure in result.get('departures', []):
+            assert departure['base_price_cents'] >= params.get('min_price', 0)
+            assert departure['base_price_cents'] <= params.get('max_price', float('inf'))
+
+
+def test_invalid_filter_is_400(anonymous):
+    assert anonymous.get('/trips', params={'from': 'not-a-date'}).status_code == 400